@@ -1,11 +1,16 @@
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Body
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Body, Request
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Dict, Optional
+from contextlib import asynccontextmanager
+import asyncio
+import hmac
 import tempfile
 import os
 import json
+import time
+import uuid
 
 # Load environment variables from .env file
 try:
@@ -15,18 +20,64 @@ except ImportError:
     pass  # python-dotenv not installed, use system environment variables
 
 from backend.utils.file_reader import read_file
-from backend.utils.prompt import get_presentation as build_presentation_from_text, generate_image_hf
-from backend.utils.slide import parse_gpt_response, generate_pptx
+from backend.utils.prompt import (
+    get_presentation as build_presentation_from_text, build_offline_presentation,
+    regenerate_slide, hedge_stats
+)
 from backend.utils.storage import (
     save_presentation, load_presentation, update_presentation,
-    delete_presentation, list_presentations, generate_presentation_id
+    delete_presentation, list_presentations, generate_presentation_id, copy_presentation, load_changes,
+    migrate_flat_layout, presentation_lock, VersionConflict, STORAGE_MIGRATE_ON_STARTUP
+)
+from backend.utils.assets import prefetch_visual_assets, fetch_image_asset, image_visual
+from backend.utils.text_cleanup import reduce_prompt_text, estimate_tokens, CHARS_PER_TOKEN
+from backend.utils.source_index import (
+    save_source_index, load_source_index, copy_source_index, delete_source_index, search as search_source, slide_query
+)
+from backend.utils.dedup import upload_key, find_duplicate, remember_upload, forget_presentation
+from backend.utils.resilience import breaker_states
+from backend.utils.admission import admission_controller, classify_request, client_key, ADMISSION_RETRY_AFTER_SECONDS
+from backend.utils.profiling import (
+    PROFILING_ENABLED, SamplingProfiler, save_profile, list_profiles, profile_path
+)
+from backend.utils.logging_setup import configure_logging, get_logger, request_id_var
+from backend.utils.metrics import (
+    start_request_timings, finish_request_timings, server_timing_header, observe, inc, render_prometheus,
+    record_cache
 )
-from backend.utils.pdf_export import create_pdf_from_slides
+from backend.utils.lazy import lazy_function, warm_up, WARMUP_ON_STARTUP
+from backend.utils.batch import batch_pipeline, resolve_file_options, BatchError, BATCH_MAX_FILES
+from backend.utils.patches import diff_slides, reorder_patch, affected_indices, compile_operations
+from backend.utils.prerender import prerender_worker, current_artifact, render_artifact, delete_artifacts
+from backend.utils.jobs import create_job, get_job, set_stage, finish_job
+
+# python-pptx and reportlab are loaded on first use, not at process start
+parse_gpt_response = lazy_function("backend.utils.slide", "parse_gpt_response")
+generate_pptx = lazy_function("backend.utils.slide", "generate_pptx")
+get_thumbnail = lazy_function("backend.utils.thumbnails", "get_thumbnail")
+get_contact_sheet = lazy_function("backend.utils.thumbnails", "get_contact_sheet")
+
+configure_logging()
+logger = get_logger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Optionally preload heavy modules, before serving or in the background."""
+    if WARMUP_ON_STARTUP in ("1", "true", "yes"):
+        await asyncio.to_thread(warm_up)
+    elif WARMUP_ON_STARTUP == "background":
+        asyncio.get_running_loop().run_in_executor(None, warm_up)
+    if STORAGE_MIGRATE_ON_STARTUP:
+        asyncio.get_running_loop().run_in_executor(None, migrate_flat_layout)
+    yield
+
 
 app = FastAPI(
     title="Presentation Assistant API",
     version="2.0.0",
-    description="API for generating, editing, and exporting AI-powered presentations"
+    description="API for generating, editing, and exporting AI-powered presentations",
+    lifespan=lifespan
 )
 
 # CORS middleware for frontend integration
@@ -39,6 +90,124 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def admission_middleware(request: Request, call_next):
+    """Limit concurrency and per-client rate of expensive endpoints."""
+    endpoint_class = classify_request(request.method, request.url.path)
+    if endpoint_class is None:
+        return await call_next(request)
+
+    client = client_key(request.headers, request.client.host if request.client else None)
+    allowed, retry_after, reason = await admission_controller.admit(endpoint_class, client)
+    if not allowed:
+        return JSONResponse(
+            status_code=429,
+            content={"detail": reason},
+            headers={"Retry-After": str(retry_after)}
+        )
+
+    try:
+        response = await call_next(request)
+    except BaseException:
+        admission_controller.release(endpoint_class)
+        raise
+
+    # call_next returns once the headers are ready; a streamed body (e.g. /generate/batch)
+    # is still being produced, so the slot is held until the body has been sent
+    body_iterator = response.body_iterator
+
+    async def release_when_sent():
+        try:
+            async for chunk in body_iterator:
+                yield chunk
+        finally:
+            admission_controller.release(endpoint_class)
+
+    response.body_iterator = release_when_sent()
+    return response
+
+
+@app.middleware("http")
+async def request_id_middleware(request: Request, call_next):
+    """Attach a correlation id (X-Request-ID, generated if absent) to logs and the response."""
+    request_id = request.headers.get("x-request-id") or uuid.uuid4().hex
+    token = request_id_var.set(request_id)
+    try:
+        response = await call_next(request)
+    finally:
+        request_id_var.reset(token)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
+
+@app.middleware("http")
+async def metrics_middleware(request: Request, call_next):
+    """Record request latency and expose per-stage timings via Server-Timing."""
+    token = start_request_timings()
+    started = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+    finally:
+        elapsed = time.perf_counter() - started
+        timings = finish_request_timings(token)
+        route = request.scope.get("route")
+        route_path = getattr(route, "path", "unmatched")
+        observe("taskd_http_request_duration_seconds", elapsed,
+                help_text="HTTP request duration in seconds", method=request.method, route=route_path)
+        inc("taskd_http_requests_total", help_text="HTTP requests by status code",
+            method=request.method, route=route_path, status=str(status_code))
+        if status_code >= 500:
+            inc("taskd_errors_total", help_text="Requests that ended in a server error", route=route_path)
+
+    response.headers["Server-Timing"] = server_timing_header(timings, elapsed)
+    return response
+
+
+async def profiling_middleware(request: Request, call_next):
+    """
+    Profile a single request when asked via X-Profile: 1 header or ?profile=1.
+    Only admins may ask: other requests are served normally, without profiling.
+    """
+    if request.headers.get("x-profile") != "1" and request.query_params.get("profile") != "1":
+        return await call_next(request)
+    if not is_admin(request):
+        return await call_next(request)
+
+    profiler = SamplingProfiler()
+    if not profiler.start():
+        # Another request is being profiled; serve this one normally
+        return await call_next(request)
+    try:
+        response = await call_next(request)
+    finally:
+        profiler.stop()
+    response.headers["X-Profile-Id"] = save_profile(profiler, request.method, request.url.path)
+    return response
+
+
+# Installed only when enabled, so there is no per-request cost otherwise
+if PROFILING_ENABLED:
+    app.middleware("http")(profiling_middleware)
+
+
+def is_admin(request: Request) -> bool:
+    """True if ADMIN_TOKEN is configured and the X-Admin-Token header matches it."""
+    admin_token = os.getenv("ADMIN_TOKEN")
+    if not admin_token:
+        return False
+    return hmac.compare_digest(request.headers.get("x-admin-token", "").encode(), admin_token.encode())
+
+
+def require_admin(request: Request):
+    """Admin endpoints are disabled unless ADMIN_TOKEN is configured, and then require it."""
+    if not os.getenv("ADMIN_TOKEN"):
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled: ADMIN_TOKEN is not configured")
+    if not is_admin(request):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
 # Pydantic models for request/response
 class SlideUpdate(BaseModel):
     slides: List[Dict]
@@ -48,14 +217,91 @@ class SlideReorder(BaseModel):
     slide_indices: List[int]
 
 
+class SlideOperations(BaseModel):
+    operations: List[Dict]
+    expected_version: Optional[int] = None
+
+
 class ImageGenerationRequest(BaseModel):
     description: str
     slide_title: Optional[str] = None
 
 
+class SlideRegenerateRequest(BaseModel):
+    instructions: Optional[str] = None
+    top_k: int = 4
+
+
 @app.get("/health")
 def health():
-    return {"status": "ok", "message": "Presentation Assistant API is running"}
+    return {
+        "status": "ok",
+        "message": "Presentation Assistant API is running",
+        "model_breakers": breaker_states(),
+        "llm_hedging": hedge_stats.snapshot(),
+        "prerender": prerender_worker.stats()
+    }
+
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus metrics: stage latency histograms, cache, fallback and error counters."""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/admin/profiles")
+def get_profiles(request: Request):
+    """List saved request profiles."""
+    require_admin(request)
+    return {"profiling_enabled": PROFILING_ENABLED, "profiles": list_profiles()}
+
+
+@app.get("/admin/profiles/{name}")
+def download_profile(name: str, request: Request):
+    """Download a profile in collapsed-stack (flamegraph) format."""
+    require_admin(request)
+    file_path = profile_path(name)
+    if file_path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path=str(file_path), media_type="text/plain", filename=name)
+
+
+@app.get("/admission/stats")
+def admission_stats():
+    """Current concurrency, queue depth and rejection counters per endpoint class."""
+    return admission_controller.stats()
+
+
+def _read_upload(suffix: str, content: bytes) -> str:
+    # Unique per request so concurrent uploads never overwrite each other
+    tmp_path = os.path.join(tempfile.gettempdir(), f"upload_{os.getpid()}_{uuid.uuid4().hex}{suffix}")
+    with open(tmp_path, "wb") as f:
+        f.write(content)
+    logger.debug("Wrote %d bytes to %s", len(content), tmp_path)
+
+    try:
+        return read_file(tmp_path)
+    finally:
+        os.remove(tmp_path)
+
+
+def _copy_duplicate(duplicate_id: str, filename: str) -> str:
+    presentation_id = copy_presentation(
+        duplicate_id, generate_presentation_id(), metadata={"original_filename": filename}
+    )["id"]
+    copy_source_index(duplicate_id, presentation_id)
+    prerender_worker.schedule(presentation_id, delay=0)
+    return presentation_id
+
+
+def _store_generated(slides: List[Dict], document_text: str, dedup_key: str, metadata: Dict,
+                     remember: bool = True) -> Dict:
+    saved_presentation = save_presentation(generate_presentation_id(), slides, metadata=metadata)
+    # Chunked, indexed source text for single-slide regeneration
+    save_source_index(saved_presentation["id"], document_text)
+    if remember:
+        remember_upload(dedup_key, saved_presentation["id"], metadata["original_filename"])
+    return saved_presentation
 
 
 @app.post("/generate")
@@ -63,23 +309,47 @@ async def generate_presentation(
     file: UploadFile = File(..., description="PDF or DOCX file"),
     slide_count: int = Form(6, description="Total number of slides"),
     include_visuals: bool = Form(False, description="Whether to include visuals as slides"),
-    store: bool = Form(True, description="Whether to store the presentation for later editing")
+    store: bool = Form(True, description="Whether to store the presentation for later editing"),
+    draft: bool = Form(False, description="Build an instant extractive draft locally instead of calling the AI model"),
+    force: bool = Form(False, description="Generate again even if the same file was already processed with the same options"),
+    on_duplicate: str = Form("reuse", description="For repeated uploads: 'reuse' the existing presentation or return a 'copy'")
 ):
     """
     Generate a presentation from an uploaded document.
     Returns the presentation ID and optionally the PPTX file.
+    Extraction, the model call, asset prefetching, storage and rendering block,
+    so each runs in a worker thread and the event loop keeps serving other requests.
     """
+    if on_duplicate not in ("reuse", "copy"):
+        raise HTTPException(status_code=400, detail="on_duplicate must be 'reuse' or 'copy'")
+
     try:
         suffix = os.path.splitext(file.filename)[1]
-        tmp_path = os.path.join(tempfile.gettempdir(), f"upload_{os.getpid()}{suffix}")
         content = await file.read()
-        with open(tmp_path, "wb") as f:
-            f.write(content)
-        print(f"Wrote {len(content)} bytes to {tmp_path}")
 
-        document_text = read_file(tmp_path)
-        # Keep temp file for debugging
-        print(f"Temp file kept at: {tmp_path}")
+        # Same bytes and options as an earlier stored upload: skip extraction and the model call
+        dedup_key = await asyncio.to_thread(
+            upload_key, content, {"slide_count": slide_count, "include_visuals": include_visuals, "draft": draft}
+        )
+        if store and not force:
+            duplicate_id = await asyncio.to_thread(find_duplicate, dedup_key)
+            if duplicate_id is not None:
+                presentation_id = duplicate_id
+                if on_duplicate == "copy":
+                    presentation_id = await asyncio.to_thread(
+                        _copy_duplicate, duplicate_id, file.filename
+                    )
+                logger.info("Duplicate upload", extra={"duplicate_of": duplicate_id, "mode": on_duplicate})
+                existing = await asyncio.to_thread(load_presentation, presentation_id)
+                return JSONResponse(content={
+                    "presentation_id": presentation_id,
+                    "slide_count": len(existing["slides"]),
+                    "message": "Presentation already generated for this file",
+                    "deduplicated": True,
+                    "duplicate_of": duplicate_id
+                })
+
+        document_text = await asyncio.to_thread(_read_upload, suffix, content)
 
         # Validate extracted text
         if not document_text or len(document_text.strip()) < 50:
@@ -87,14 +357,23 @@ async def generate_presentation(
                 status_code=400,
                 detail="No text could be extracted from the document. The document might contain only images or be corrupted."
             )
-        
+
+        # Strip page furniture and trim to the token budget before prompting
+        document_text, preprocessing = await asyncio.to_thread(reduce_prompt_text, document_text)
+        logger.info("Prompt text reduced", extra=preprocessing)
+
         # Generate presentation using AI
         try:
-            gpt_response = build_presentation_from_text(
-                document_text,
-                slide_count=slide_count,
-                include_visuals=include_visuals
-            )
+            used_fallback = False
+            if draft:
+                gpt_response = await asyncio.to_thread(build_offline_presentation, document_text, slide_count)
+            else:
+                gpt_response, used_fallback = await asyncio.to_thread(
+                    build_presentation_from_text,
+                    document_text,
+                    slide_count=slide_count,
+                    include_visuals=include_visuals
+                )
         except ValueError as ve:
             # Handle API errors or other value errors
             error_msg = str(ve)
@@ -135,31 +414,46 @@ async def generate_presentation(
                 detail=f"Unexpected error parsing response: {str(e)}"
             )
 
+        # Resolve image visuals up front so exports never hit the network; the model may
+        # return image visuals even without include_visuals, so every one is prefetched
+        asset_errors = await asyncio.to_thread(prefetch_visual_assets, slides)
+
         # Store presentation if requested
         presentation_id = None
         if store:
-            presentation_id = generate_presentation_id()
-            saved_presentation = save_presentation(
-                presentation_id,
-                slides,
-                metadata={
+            saved_presentation = await asyncio.to_thread(
+                _store_generated, slides, document_text, dedup_key, {
                     "original_filename": file.filename,
                     "slide_count": slide_count,
                     "include_visuals": include_visuals,
-                    "source_text_length": len(document_text)
-                }
+                    "draft": draft,
+                    "source_text_length": len(document_text),
+                    "preprocessing": preprocessing
+                },
+                # A deck from the offline fallback (no key, breakers open, deadline hit) must
+                # not be returned for later uploads of the same file once the model is back
+                not used_fallback
             )
             presentation_id = saved_presentation["id"]
 
-        # Generate PPTX file
-        output_filename = f"generated_presentation_{presentation_id or 'temp'}.pptx"
-        generate_pptx(slides, output_filename)
+        # Generate PPTX file; a stored one becomes the current export and the PDF follows in the background
+        if presentation_id:
+            await asyncio.to_thread(render_artifact, saved_presentation, "pptx")
+            prerender_worker.schedule(presentation_id, delay=0)
+        else:
+            output_filename = "generated_presentation_temp.pptx"
+            await asyncio.to_thread(generate_pptx, slides, output_filename)
 
         response_data = {
             "presentation_id": presentation_id,
             "slide_count": len(slides),
-            "message": "Presentation generated successfully"
+            "message": "Presentation generated successfully",
+            "preprocessing": preprocessing
         }
+        if asset_errors:
+            response_data["asset_errors"] = asset_errors
+        if used_fallback:
+            response_data["offline_fallback"] = True
 
         if presentation_id:
             return JSONResponse(content=response_data)
@@ -177,6 +471,146 @@ async def generate_presentation(
         raise HTTPException(status_code=500, detail=f"Error generating presentation: {str(e)}")
 
 
+@app.post("/generate/batch")
+async def generate_batch(
+    files: List[UploadFile] = File(..., description="PDF or DOCX files"),
+    slide_count: int = Form(6, description="Total number of slides (shared default)"),
+    include_visuals: bool = Form(False, description="Whether to include visuals (shared default)"),
+    draft: bool = Form(False, description="Build extractive drafts locally (shared default)"),
+    options: Optional[str] = Form(None, description="JSON list of per-file option overrides, aligned with files"),
+    stream: bool = Form(True, description="Stream one NDJSON line per file as it finishes")
+):
+    """
+    Generate presentations for several documents in one request.
+    Files run through extraction, AI generation and rendering as a pipeline;
+    every presentation is stored and its ID returned.
+    """
+    if len(files) > BATCH_MAX_FILES:
+        raise HTTPException(status_code=400, detail=f"Too many files: at most {BATCH_MAX_FILES} per batch")
+
+    try:
+        overrides = json.loads(options) if options else None
+        file_options = resolve_file_options(
+            {"slide_count": slide_count, "include_visuals": include_visuals, "draft": draft},
+            overrides, len(files)
+        )
+    except (ValueError, BatchError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid options: {str(e)}")
+
+    # Read uploads now; the response body is produced after this handler returns
+    items = []
+    for upload, file_opts in zip(files, file_options):
+        items.append({"filename": upload.filename, "content": await upload.read(), "options": file_opts})
+
+    batch_id = uuid.uuid4().hex
+    logger.info("Batch started", extra={"batch_id": batch_id, "files": len(items)})
+
+    if not stream:
+        results = [result async for result in batch_pipeline.run(batch_id, items)]
+        results.sort(key=lambda r: r["index"])
+        return JSONResponse(content={
+            "batch_id": batch_id,
+            "succeeded": sum(1 for r in results if r["status"] == "ok"),
+            "failed": sum(1 for r in results if r["status"] != "ok"),
+            "results": results
+        })
+
+    async def events():
+        started = time.perf_counter()
+        succeeded = failed = 0
+        yield json.dumps({"event": "batch", "batch_id": batch_id, "files": len(items)}) + "\n"
+        async for result in batch_pipeline.run(batch_id, items):
+            if result["status"] == "ok":
+                succeeded += 1
+            else:
+                failed += 1
+            yield json.dumps({"event": "file", **result}, ensure_ascii=False) + "\n"
+        yield json.dumps({
+            "event": "done",
+            "batch_id": batch_id,
+            "succeeded": succeeded,
+            "failed": failed,
+            "elapsed": round(time.perf_counter() - started, 3)
+        }) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+# Strong references to running job tasks so they are not garbage collected mid-run
+_job_tasks = set()
+
+
+async def _run_job(job_id: str, filename: str, content: bytes, options: Dict, dedup_key: str):
+    # Jobs share the generate concurrency limit with /generate; the place reserved
+    # in the job backlog by create_generation_job is turned into a running slot here
+    await admission_controller.acquire_job("generate")
+    try:
+        result = await batch_pipeline.process(
+            0, filename, content, options, {"job_id": job_id},
+            on_stage=lambda stage: set_stage(job_id, stage)
+        )
+        if result["status"] == "ok" and not result.get("offline_fallback"):
+            await asyncio.to_thread(remember_upload, dedup_key, result["presentation_id"], filename)
+        await asyncio.to_thread(finish_job, job_id, result)
+    finally:
+        admission_controller.release_job("generate")
+
+
+@app.post("/generate/jobs", status_code=202)
+async def create_generation_job(
+    file: UploadFile = File(..., description="PDF or DOCX file"),
+    slide_count: int = Form(6, description="Total number of slides"),
+    include_visuals: bool = Form(False, description="Whether to include visuals as slides"),
+    draft: bool = Form(False, description="Build an instant extractive draft locally instead of calling the AI model"),
+    force: bool = Form(False, description="Generate again even if the same file was already processed with the same options")
+):
+    """
+    Start generating a stored presentation in the background.
+    Returns a job ID right away; poll GET /jobs/{job_id} for progress and the result.
+    """
+    content = await file.read()
+    options = {"slide_count": slide_count, "include_visuals": include_visuals, "draft": draft}
+    dedup_key = await asyncio.to_thread(upload_key, content, options)
+    duplicate_id = None if force else await asyncio.to_thread(find_duplicate, dedup_key)
+
+    if duplicate_id is None and not admission_controller.reserve_job("generate"):
+        raise HTTPException(
+            status_code=429,
+            detail="Job queue is full, please retry later",
+            headers={"Retry-After": str(ADMISSION_RETRY_AFTER_SECONDS)}
+        )
+    try:
+        job = await asyncio.to_thread(create_job, file.filename, options)
+    except BaseException:
+        if duplicate_id is None:
+            admission_controller.cancel_job("generate")
+        raise
+
+    if duplicate_id is not None:
+        existing = await asyncio.to_thread(load_presentation, duplicate_id)
+        await asyncio.to_thread(finish_job, job["id"], {
+            "status": "ok",
+            "presentation_id": duplicate_id,
+            "slide_count": len(existing["slides"]),
+            "deduplicated": True
+        })
+    else:
+        task = asyncio.create_task(_run_job(job["id"], file.filename, content, options, dedup_key))
+        _job_tasks.add(task)
+        task.add_done_callback(_job_tasks.discard)
+
+    return get_job(job["id"])
+
+
+@app.get("/jobs/{job_id}")
+def get_generation_job(job_id: str):
+    """Status, stage, progress and (when finished) the result of a generation job."""
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
 @app.get("/presentations")
 def get_all_presentations():
     """Get list of all stored presentations."""
@@ -196,66 +630,161 @@ def get_presentation(presentation_id: str):
     return presentation
 
 
-@app.put("/presentations/{presentation_id}")
-def update_presentation_endpoint(presentation_id: str, slide_update: SlideUpdate):
-    """Update slides in a presentation."""
-    existing = load_presentation(presentation_id)
-    if existing is None:
-        raise HTTPException(status_code=404, detail="Presentation not found")
-    
-    try:
-        # Validate slides structure
-        for slide in slide_update.slides:
-            slide_type = slide.get("type")
-            if slide_type not in {"title", "intro", "main", "recommendation"}:
-                raise ValueError(f"Invalid slide type: {slide_type}")
-        
-        updated = update_presentation(presentation_id, slide_update.slides)
+def _check_response_mode(response_mode: str):
+    if response_mode not in ("full", "delta"):
+        raise HTTPException(status_code=400, detail="response_mode must be 'full' or 'delta'")
+
+
+def _mutation_response(message: str, updated: Dict, patch: List[Dict], response_mode: str, full: Dict) -> Dict:
+    """Full body for existing clients, or only the new version and the patch that produced it."""
+    if response_mode == "delta":
         return {
-            "message": "Presentation updated successfully",
-            "presentation": updated
+            "message": message,
+            "presentation_id": updated["id"],
+            "version": updated["version"],
+            "affected": affected_indices(patch),
+            "patch": patch
         }
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+    return {"message": message, "version": updated["version"], **full}
 
 
-@app.post("/presentations/{presentation_id}/reorder")
-def reorder_slides(presentation_id: str, reorder: SlideReorder):
-    """Reorder slides in a presentation."""
+@app.get("/presentations/{presentation_id}/changes")
+def get_presentation_changes(presentation_id: str, since: int):
+    """
+    Patches applied after version `since`, oldest first, so a client can catch up without
+    reloading the deck. When the change log no longer reaches back that far, the full
+    slides are returned with reset=true.
+    """
     presentation = load_presentation(presentation_id)
     if presentation is None:
         raise HTTPException(status_code=404, detail="Presentation not found")
+
+    version = presentation.get("version", 0)
+    if since < 0 or since > version:
+        raise HTTPException(status_code=400, detail=f"since must be between 0 and the current version ({version})")
+
+    # Bounded by the version read above; entries written since then belong to the next poll
+    changes = [] if since == version else load_changes(presentation_id, since, version)
+    if changes is None:
+        return {"presentation_id": presentation["id"], "version": version, "reset": True, "slides": presentation["slides"]}
+    return {"presentation_id": presentation["id"], "version": version, "reset": False, "changes": changes}
+
+
+@app.put("/presentations/{presentation_id}")
+def update_presentation_endpoint(presentation_id: str, slide_update: SlideUpdate, response_mode: str = "full"):
+    """Update slides in a presentation."""
+    _check_response_mode(response_mode)
+    # Validate slides structure
+    for slide in slide_update.slides:
+        slide_type = slide.get("type")
+        if slide_type not in {"title", "intro", "main", "recommendation"}:
+            raise HTTPException(status_code=400, detail=f"Invalid slide type: {slide_type}")
     
-    slides = presentation["slides"]
-    if len(reorder.slide_indices) != len(slides):
-        raise HTTPException(
-            status_code=400,
-            detail=f"Expected {len(slides)} indices, got {len(reorder.slide_indices)}"
-        )
-    
-    # Validate indices
-    if set(reorder.slide_indices) != set(range(len(slides))):
-        raise HTTPException(status_code=400, detail="Invalid slide indices")
-    
-    # Reorder slides
-    reordered_slides = [slides[i] for i in reorder.slide_indices]
-    updated = update_presentation(presentation_id, reordered_slides)
+    # The patch is diffed against the version it replaces, so load and write under one lock
+    with presentation_lock(presentation_id):
+        existing = load_presentation(presentation_id)
+        if existing is None:
+            raise HTTPException(status_code=404, detail="Presentation not found")
+        try:
+            patch = diff_slides(existing["slides"], slide_update.slides)
+            updated = update_presentation(presentation_id, slide_update.slides, patch=patch)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    prerender_worker.schedule(presentation_id)
+    return _mutation_response(
+        "Presentation updated successfully", updated, patch, response_mode, {"presentation": updated}
+    )
+
+
+@app.post("/presentations/{presentation_id}/reorder")
+def reorder_slides(presentation_id: str, reorder: SlideReorder, response_mode: str = "full"):
+    """Reorder slides in a presentation."""
+    _check_response_mode(response_mode)
+    with presentation_lock(presentation_id):
+        presentation = load_presentation(presentation_id)
+        if presentation is None:
+            raise HTTPException(status_code=404, detail="Presentation not found")
+        
+        slides = presentation["slides"]
+        if len(reorder.slide_indices) != len(slides):
+            raise HTTPException(
+                status_code=400,
+                detail=f"Expected {len(slides)} indices, got {len(reorder.slide_indices)}"
+            )
+        
+        # Validate indices
+        if set(reorder.slide_indices) != set(range(len(slides))):
+            raise HTTPException(status_code=400, detail="Invalid slide indices")
+        
+        # Reorder slides
+        reordered_slides = [slides[i] for i in reorder.slide_indices]
+        patch = reorder_patch(reorder.slide_indices)
+        updated = update_presentation(presentation_id, reordered_slides, patch=patch)
+    prerender_worker.schedule(presentation_id)
     
-    return {
-        "message": "Slides reordered successfully",
-        "presentation": updated
-    }
+    return _mutation_response(
+        "Slides reordered successfully", updated, patch, response_mode, {"presentation": updated}
+    )
+
+
+@app.post("/presentations/{presentation_id}/ops")
+def apply_slide_operations(presentation_id: str, request: SlideOperations, response_mode: str = "delta"):
+    """
+    Apply an ordered batch of insert/delete/move/update/set_visual operations.
+    All operations are validated before anything is written; the result is stored with one write.
+    Loading, the version check, compiling and the write run under the presentation lock.
+    """
+    _check_response_mode(response_mode)
+    if not request.operations:
+        raise HTTPException(status_code=400, detail="operations must not be empty")
+
+    with presentation_lock(presentation_id):
+        presentation = load_presentation(presentation_id)
+        if presentation is None:
+            raise HTTPException(status_code=404, detail="Presentation not found")
+        version = presentation.get("version", 0)
+        expected_version = version if request.expected_version is None else request.expected_version
+        try:
+            slides, patch = compile_operations(presentation["slides"], request.operations)
+            updated = update_presentation(presentation_id, slides, patch=patch, expected_version=expected_version)
+        except VersionConflict as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    prerender_worker.schedule(presentation_id)
+    return _mutation_response(
+        "Operations applied successfully", updated, patch, response_mode, {"presentation": updated}
+    )
 
 
 @app.delete("/presentations/{presentation_id}")
 def delete_presentation_endpoint(presentation_id: str):
     """Delete a presentation."""
     if delete_presentation(presentation_id):
+        delete_source_index(presentation_id)
+        forget_presentation(presentation_id)
+        prerender_worker.cancel(presentation_id)
+        delete_artifacts(presentation_id)
         return {"message": "Presentation deleted successfully"}
     else:
         raise HTTPException(status_code=404, detail="Presentation not found")
 
 
+def _export_response(presentation: Dict, fmt: str, filename: str, media_type: str):
+    """Serve the pre-rendered export of the current version, rendering it now if there is none."""
+    path = current_artifact(presentation, fmt)
+    prerendered = path is not None
+    record_cache(f"export_{fmt}", hit=prerendered)
+    if path is None:
+        path = render_artifact(presentation, fmt)
+    return FileResponse(
+        path=str(path),
+        media_type=media_type,
+        filename=filename,
+        headers={"X-Prerendered": "true" if prerendered else "false"}
+    )
+
+
 @app.get("/presentations/{presentation_id}/export/pptx")
 def export_pptx(presentation_id: str):
     """Export presentation as PowerPoint file."""
@@ -264,15 +793,9 @@ def export_pptx(presentation_id: str):
         raise HTTPException(status_code=404, detail="Presentation not found")
     
     try:
-        slides = presentation["slides"]
         output_filename = f"presentation_{presentation_id}.pptx"
-        generate_pptx(slides, output_filename)
-        
-        return FileResponse(
-            path=output_filename,
-            media_type="application/vnd.openxmlformats-officedocument.presentationml.presentation",
-            filename=output_filename
-        )
+        return _export_response(presentation, "pptx", output_filename,
+                                "application/vnd.openxmlformats-officedocument.presentationml.presentation")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error exporting PPTX: {str(e)}")
 
@@ -285,22 +808,18 @@ def export_pdf(presentation_id: str):
         raise HTTPException(status_code=404, detail="Presentation not found")
     
     try:
-        slides = presentation["slides"]
         output_filename = f"presentation_{presentation_id}.pdf"
-        create_pdf_from_slides(slides, output_filename)
-        
-        return FileResponse(
-            path=output_filename,
-            media_type="application/pdf",
-            filename=output_filename
-        )
+        return _export_response(presentation, "pdf", output_filename, "application/pdf")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error exporting PDF: {str(e)}")
 
 
 @app.post("/presentations/{presentation_id}/slides/{slide_index}/image")
-async def generate_slide_image(presentation_id: str, slide_index: int, request: ImageGenerationRequest):
-    """Generate an image for a specific slide."""
+def generate_slide_image(presentation_id: str, slide_index: int, request: ImageGenerationRequest):
+    """
+    Generate an image for a specific slide into the asset store.
+    On a main slide it becomes the slide's visual; the same description reuses the stored image.
+    """
     presentation = load_presentation(presentation_id)
     if presentation is None:
         raise HTTPException(status_code=404, detail="Presentation not found")
@@ -314,46 +833,35 @@ async def generate_slide_image(presentation_id: str, slide_index: int, request:
     # Use provided description or generate from slide content
     if request.description:
         description = request.description
+    elif slide.get("type") == "main":
+        description = f"{slide.get('title', '')}: {', '.join([slide.get(f'point{i}', '') for i in range(1, 5) if slide.get(f'point{i}')])}"
     else:
-        # Generate description from slide content
-        if slide.get("type") == "main":
-            description = f"{slide.get('title', '')}: {', '.join([slide.get(f'point{i}', '') for i in range(1, 5) if slide.get(f'point{i}')])}"
-        else:
-            description = str(slide.get("title", "Presentation slide"))
+        description = str(slide.get("title", "Presentation slide"))
     
     try:
-        # Translate to English for image generation
-        from googletrans import Translator
-        translator = Translator()
-        translated = translator.translate(description, src='az', dest='en')
-        english_description = translated.text
-        
-        # Generate image
-        image_filename = f"slide_image_{presentation_id}_{slide_index}.png"
-        image_path = generate_image_hf(english_description, image_filename)
-        
-        if image_path and os.path.exists(image_path):
-            # Update slide visual
-            if slide.get("type") == "main":
-                if "visual" not in slide:
-                    slide["visual"] = {}
-                slide["visual"]["type"] = "image"
-                slide["visual"]["description"] = description
-                slide["visual"]["image_path"] = image_path
-            
-            # Update presentation
-            update_presentation(presentation_id, slides)
-            
-            return {
-                "message": "Image generated successfully",
-                "image_path": image_path,
-                "slide_index": slide_index
-            }
-        else:
-            raise HTTPException(status_code=500, detail="Failed to generate image")
-    
+        digest = fetch_image_asset(description)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating image: {str(e)}")
+    if digest is None:
+        raise HTTPException(status_code=500, detail="Failed to generate image")
+    visual = image_visual(description, digest)
+    
+    if slide.get("type") == "main":
+        slides[slide_index] = {**slide, "visual": visual}
+        patch = [{"op": "replace", "index": slide_index, "slide": slides[slide_index]}]
+        try:
+            # Generation ran without the lock; a retry after a conflict reuses the stored image
+            update_presentation(presentation_id, slides, patch=patch, expected_version=presentation.get("version", 0))
+        except VersionConflict as e:
+            raise HTTPException(status_code=409, detail=f"{e}; the presentation changed while the image was generated")
+        prerender_worker.schedule(presentation_id)
+    
+    return {
+        "message": "Image generated successfully",
+        "image_path": visual["image_path"],
+        "asset_hash": digest,
+        "slide_index": slide_index
+    }
 
 
 @app.get("/templates")
@@ -378,29 +886,111 @@ def get_templates():
 
 
 @app.post("/presentations/{presentation_id}/slides/{slide_index}")
-def update_single_slide(presentation_id: str, slide_index: int, slide_data: Dict = Body(...)):
+def update_single_slide(presentation_id: str, slide_index: int, slide_data: Dict = Body(...),
+                        response_mode: str = "full"):
     """Update a single slide in the presentation."""
-    presentation = load_presentation(presentation_id)
-    if presentation is None:
-        raise HTTPException(status_code=404, detail="Presentation not found")
-    
-    slides = presentation["slides"]
-    if slide_index < 0 or slide_index >= len(slides):
-        raise HTTPException(status_code=400, detail="Invalid slide index")
-    
+    _check_response_mode(response_mode)
     # Validate slide type
     slide_type = slide_data.get("type")
     if slide_type not in {"title", "intro", "main", "recommendation"}:
         raise HTTPException(status_code=400, detail=f"Invalid slide type: {slide_type}")
     
-    # Update the slide
-    slides[slide_index] = slide_data
-    updated = update_presentation(presentation_id, slides)
+    with presentation_lock(presentation_id):
+        presentation = load_presentation(presentation_id)
+        if presentation is None:
+            raise HTTPException(status_code=404, detail="Presentation not found")
+        
+        slides = presentation["slides"]
+        if slide_index < 0 or slide_index >= len(slides):
+            raise HTTPException(status_code=400, detail="Invalid slide index")
+        
+        # Update the slide
+        slides[slide_index] = slide_data
+        patch = [{"op": "replace", "index": slide_index, "slide": slide_data}]
+        updated = update_presentation(presentation_id, slides, patch=patch)
+    prerender_worker.schedule(presentation_id)
     
+    return _mutation_response(
+        "Slide updated successfully", updated, patch, response_mode,
+        {"slide": slide_data, "slide_index": slide_index}
+    )
+
+
+@app.post("/presentations/{presentation_id}/slides/{slide_index}/regenerate")
+def regenerate_single_slide(presentation_id: str, slide_index: int, request: Optional[SlideRegenerateRequest] = None):
+    """
+    Regenerate one main slide from the source chunks that best match it.
+    Only those chunks are sent to the model, not the whole document.
+    """
+    request = request or SlideRegenerateRequest()
+    presentation = load_presentation(presentation_id)
+    if presentation is None:
+        raise HTTPException(status_code=404, detail="Presentation not found")
+
+    slides = presentation["slides"]
+    if slide_index < 0 or slide_index >= len(slides):
+        raise HTTPException(status_code=400, detail="Invalid slide index")
+    slide = slides[slide_index]
+    if slide.get("type") != "main":
+        raise HTTPException(status_code=400, detail="Only main slides can be regenerated")
+    if not 1 <= request.top_k <= 20:
+        raise HTTPException(status_code=400, detail="top_k must be between 1 and 20")
+
+    index = load_source_index(presentation_id)
+    if index is None:
+        raise HTTPException(
+            status_code=409,
+            detail="Source text is not stored for this presentation. Generate it again to enable slide regeneration."
+        )
+
+    matches = search_source(index, slide_query(slide), top_k=request.top_k)
+    if not matches:
+        # Nothing matches the slide text; fall back to the opening chunks of the document
+        matches = [(n, 0.0) for n in range(min(request.top_k, len(index["chunks"])))]
+    context_chunks = [index["chunks"][n] for n, _ in matches]
+
+    title_slide = next((s for s in slides if s.get("type") == "title"), {})
+    try:
+        response_text, prompt = regenerate_slide(
+            slide, context_chunks, deck_title=title_slide.get("title", ""), instructions=request.instructions
+        )
+        parsed = parse_gpt_response(response_text)
+    except ValueError as ve:
+        # The model answered, but not with slide JSON
+        raise HTTPException(status_code=502, detail=f"Error regenerating slide: {str(ve)}")
+    if not parsed:
+        raise HTTPException(status_code=502, detail="Error regenerating slide: the model returned no slide")
+    regenerated = parsed[0]
+    if regenerated.get("type") != "main":
+        raise HTTPException(status_code=502, detail="Error regenerating slide: model did not return a main slide")
+
+    old_visual = slide.get("visual") or {}
+    new_visual = regenerated.get("visual") or {}
+    if new_visual.get("type") == old_visual.get("type") == "image" and \
+            new_visual.get("description") == old_visual.get("description"):
+        # Same picture; keep the already generated asset
+        regenerated["visual"] = old_visual
+    elif new_visual.get("type") == "image":
+        prefetch_visual_assets([regenerated])
+
+    slides[slide_index] = regenerated
+    try:
+        # The model call ran without the lock; refuse to overwrite edits made meanwhile
+        update_presentation(presentation_id, slides, expected_version=presentation.get("version", 0))
+    except VersionConflict as e:
+        raise HTTPException(status_code=409, detail=f"{e}; the presentation changed while the slide was regenerated")
+    prerender_worker.schedule(presentation_id)
+
+    prompt_tokens = estimate_tokens(prompt)
+    source_tokens = max(1, index.get("text_chars", 0) // CHARS_PER_TOKEN)
     return {
-        "message": "Slide updated successfully",
-        "slide": slide_data,
-        "slide_index": slide_index
+        "message": "Slide regenerated successfully",
+        "slide": regenerated,
+        "slide_index": slide_index,
+        "context": [{"chunk": n, "score": round(score, 3)} for n, score in matches],
+        "prompt_tokens": prompt_tokens,
+        "source_tokens": source_tokens,
+        "token_ratio": round(prompt_tokens / source_tokens, 3)
     }
 
 
@@ -422,53 +1012,86 @@ def get_single_slide(presentation_id: str, slide_index: int):
     }
 
 
+def _png_response(path, request: Request):
+    """Serve a cached PNG; its content-hash file name is the ETag."""
+    etag = f'"{path.stem}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path=str(path), media_type="image/png", headers=headers)
+
+
+@app.get("/presentations/{presentation_id}/slides/{slide_index}/thumbnail.png")
+def get_slide_thumbnail(presentation_id: str, slide_index: int, request: Request, size: str = "medium"):
+    """PNG preview of a single slide, cached by slide content."""
+    presentation = load_presentation(presentation_id)
+    if presentation is None:
+        raise HTTPException(status_code=404, detail="Presentation not found")
+
+    slides = presentation["slides"]
+    if slide_index < 0 or slide_index >= len(slides):
+        raise HTTPException(status_code=400, detail="Invalid slide index")
+
+    try:
+        path = get_thumbnail(slides[slide_index], size)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error rendering thumbnail: {str(e)}")
+    return _png_response(path, request)
+
+
+@app.get("/presentations/{presentation_id}/gallery.png")
+def get_gallery(presentation_id: str, request: Request, size: str = "small", columns: int = 4):
+    """Contact sheet with a thumbnail of every slide in the presentation."""
+    presentation = load_presentation(presentation_id)
+    if presentation is None:
+        raise HTTPException(status_code=404, detail="Presentation not found")
+    if columns < 1 or columns > 12:
+        raise HTTPException(status_code=400, detail="columns must be between 1 and 12")
+
+    try:
+        path = get_contact_sheet(presentation["slides"], size, columns)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error rendering gallery: {str(e)}")
+    return _png_response(path, request)
+
+
 @app.post("/presentations/{presentation_id}/generate-all-images")
-async def generate_all_slide_images(presentation_id: str):
-    """Generate images for all slides that need them (main slides with image visuals)."""
+def generate_all_slide_images(presentation_id: str):
+    """
+    Generate images for all main slides with image visuals that have no stored image yet.
+    Same pipeline as the prefetch stage of /generate.
+    """
     presentation = load_presentation(presentation_id)
     if presentation is None:
         raise HTTPException(status_code=404, detail="Presentation not found")
     
     slides = presentation["slides"]
-    generated_images = []
-    errors = []
-    
-    from googletrans import Translator
-    translator = Translator()
+    before = [(slide.get("visual") or {}).get("asset_hash") for slide in slides]
+    failures = prefetch_visual_assets(slides)
+    errors = [f"Error generating image for slide {e['slide_index']}: {e['error']}" for e in failures]
     
+    generated_images = []
+    patch = []
     for idx, slide in enumerate(slides):
-        if slide.get("type") == "main":
-            visual = slide.get("visual", {})
-            if visual.get("type") == "image":
-                try:
-                    # Generate description from slide content
-                    title = slide.get("title", "")
-                    points = [slide.get(f"point{i}", "") for i in range(1, 5) if slide.get(f"point{i}")]
-                    description = f"{title}: {', '.join(points[:2])}" if points else title
-                    
-                    # Translate to English
-                    translated = translator.translate(description, src='az', dest='en')
-                    english_description = translated.text
-                    
-                    # Generate image
-                    image_filename = f"slide_image_{presentation_id}_{idx}.png"
-                    image_path = generate_image_hf(english_description, image_filename)
-                    
-                    if image_path and os.path.exists(image_path):
-                        visual["image_path"] = image_path
-                        visual["description"] = description
-                        generated_images.append({
-                            "slide_index": idx,
-                            "image_path": image_path,
-                            "description": description
-                        })
-                    else:
-                        errors.append(f"Failed to generate image for slide {idx}")
-                except Exception as e:
-                    errors.append(f"Error generating image for slide {idx}: {str(e)}")
+        visual = slide.get("visual") or {}
+        if visual.get("asset_hash") and visual["asset_hash"] != before[idx]:
+            generated_images.append({
+                "slide_index": idx,
+                "image_path": visual["image_path"],
+                "description": visual.get("description", "")
+            })
+            patch.append({"op": "replace", "index": idx, "slide": slide})
     
-    # Update presentation with image paths
-    update_presentation(presentation_id, slides)
+    if patch:
+        try:
+            update_presentation(presentation_id, slides, patch=patch, expected_version=presentation.get("version", 0))
+        except VersionConflict as e:
+            raise HTTPException(status_code=409, detail=f"{e}; the presentation changed while images were generated")
+        prerender_worker.schedule(presentation_id)
     
     return {
         "message": f"Generated {len(generated_images)} images",
@@ -0,0 +1,250 @@
+"""
+Admission control for expensive endpoints.
+Per-endpoint-class concurrency limits with a bounded wait queue, a bounded
+backlog for background jobs, and per-client token-bucket quotas keyed by API key or IP.
+"""
+import asyncio
+import hashlib
+import math
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+# (concurrency, queue size, requests per minute per client)
+_DEFAULTS = {
+    "generate": (4, 16, 10),
+    "images": (2, 8, 10),
+    "export": (8, 32, 60),
+    # Submitting a background job is cheap; the job itself runs under "generate"
+    "jobs": (8, 16, 10),
+}
+
+ADMISSION_MAX_WAIT_SECONDS = float(os.getenv("ADMISSION_MAX_WAIT_SECONDS", "30"))
+ADMISSION_RETRY_AFTER_SECONDS = int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", "5"))
+# Background jobs waiting for a slot of their endpoint class; beyond this new jobs are rejected
+ADMISSION_JOB_QUEUE_SIZE = int(os.getenv("ADMISSION_JOB_QUEUE_SIZE", "32"))
+TRUST_PROXY_HEADERS = os.getenv("TRUST_PROXY_HEADERS", "false").lower() in ("1", "true", "yes")
+_MAX_TRACKED_CLIENTS = 10000
+
+_ROUTES = [
+    ("POST", re.compile(r"^/generate/jobs$"), "jobs"),
+    ("POST", re.compile(r"^/generate(?:/.*)?$"), "generate"),
+    ("POST", re.compile(r"^/presentations/[^/]+/slides/\d+/regenerate$"), "generate"),
+    ("POST", re.compile(r"^/presentations/[^/]+/generate-all-images$"), "images"),
+    ("POST", re.compile(r"^/presentations/[^/]+/slides/\d+/image$"), "images"),
+    (None, re.compile(r"^/presentations/[^/]+/export/(?:pptx|pdf)$"), "export"),
+    ("GET", re.compile(r"^/presentations/[^/]+/(?:slides/\d+/thumbnail|gallery)\.png$"), "export"),
+]
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
+
+
+def classify_request(method: str, path: str) -> Optional[str]:
+    """Return the endpoint class for a request, or None if it is not admission-controlled."""
+    for route_method, pattern, endpoint_class in _ROUTES:
+        if (route_method is None or route_method == method) and pattern.match(path):
+            return endpoint_class
+    return None
+
+
+def client_key(headers, client_host: Optional[str]) -> str:
+    """Identify the caller by API key when present, otherwise by IP address."""
+    api_key = headers.get("x-api-key")
+    if api_key:
+        return "key:" + hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+    if TRUST_PROXY_HEADERS:
+        forwarded = headers.get("x-forwarded-for")
+        if forwarded:
+            return "ip:" + forwarded.split(",")[0].strip()
+    return "ip:" + (client_host or "unknown")
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, holding at most `capacity`."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def take(self) -> Tuple[bool, float]:
+        """Consume one token. Returns (allowed, seconds until a token is available)."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True, 0.0
+        return False, (1 - self.tokens) / self.rate if self.rate > 0 else 60.0
+
+
+class EndpointLimiter:
+    """Concurrency limit with a bounded FIFO wait queue for one endpoint class."""
+
+    def __init__(self, name: str, concurrency: int, queue_size: int, max_wait: float,
+                 job_queue_size: int = ADMISSION_JOB_QUEUE_SIZE):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.max_wait = max_wait
+        self.job_queue_size = job_queue_size
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+        self.rejected_rate_limited = 0
+        self.jobs_queued = 0
+        self.jobs_running = 0
+        self.rejected_job_queue_full = 0
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def acquire(self) -> bool:
+        if self._semaphore.locked() and self.waiting >= self.queue_size:
+            self.rejected_queue_full += 1
+            return False
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.max_wait)
+        except asyncio.TimeoutError:
+            self.rejected_timeout += 1
+            return False
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+        self.admitted += 1
+        return True
+
+    def release(self):
+        self.active -= 1
+        self._semaphore.release()
+
+    def reserve_job(self) -> bool:
+        """Take a place in the job backlog. False if the backlog is full."""
+        if self.jobs_queued >= self.job_queue_size:
+            self.rejected_job_queue_full += 1
+            return False
+        self.jobs_queued += 1
+        return True
+
+    def cancel_job(self):
+        """Give back a backlog place that was reserved but never started."""
+        self.jobs_queued -= 1
+
+    async def acquire_job(self):
+        """
+        Wait for a slot for a reserved job. Unlike requests, jobs wait without a
+        timeout: the backlog is already bounded and nobody holds a connection open.
+        """
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.jobs_queued -= 1
+        self.active += 1
+        self.jobs_running += 1
+        self.admitted += 1
+
+    def release_job(self):
+        self.jobs_running -= 1
+        self.release()
+
+    def stats(self) -> Dict:
+        return {
+            "concurrency": self.concurrency,
+            "queue_size": self.queue_size,
+            "active": self.active,
+            "queue_depth": self.waiting,
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_timeout": self.rejected_timeout,
+            "rejected_rate_limited": self.rejected_rate_limited,
+            "job_queue_size": self.job_queue_size,
+            "jobs_running": self.jobs_running,
+            "jobs_queued": self.jobs_queued,
+            "rejected_job_queue_full": self.rejected_job_queue_full,
+        }
+
+
+class AdmissionController:
+    """
+    Holds one limiter per endpoint class and token buckets per (client, class).
+    Meant to be used from a single event loop (the ASGI server's).
+    """
+
+    def __init__(self):
+        self.limiters: Dict[str, EndpointLimiter] = {}
+        self.rates: Dict[str, float] = {}
+        for name, (concurrency, queue_size, per_minute) in _DEFAULTS.items():
+            prefix = f"ADMISSION_{name.upper()}"
+            self.limiters[name] = EndpointLimiter(
+                name,
+                concurrency=_env_int(f"{prefix}_CONCURRENCY", concurrency),
+                queue_size=_env_int(f"{prefix}_QUEUE_SIZE", queue_size),
+                max_wait=ADMISSION_MAX_WAIT_SECONDS,
+            )
+            self.rates[name] = float(_env_int(f"{prefix}_RATE_PER_MINUTE", per_minute))
+        self._buckets: "OrderedDict[Tuple[str, str], TokenBucket]" = OrderedDict()
+
+    def _bucket(self, client: str, endpoint_class: str) -> TokenBucket:
+        key = (client, endpoint_class)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            per_minute = self.rates[endpoint_class]
+            bucket = self._buckets[key] = TokenBucket(rate=per_minute / 60.0, capacity=max(per_minute, 1.0))
+            while len(self._buckets) > _MAX_TRACKED_CLIENTS:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket
+
+    async def admit(self, endpoint_class: str, client: str) -> Tuple[bool, int, str]:
+        """
+        Try to admit a request. Returns (allowed, retry_after_seconds, reason).
+        On success the caller must call release(endpoint_class) when done.
+        """
+        limiter = self.limiters[endpoint_class]
+
+        if self.rates[endpoint_class] > 0:
+            allowed, wait = self._bucket(client, endpoint_class).take()
+            if not allowed:
+                limiter.rejected_rate_limited += 1
+                return False, max(1, math.ceil(wait)), "Rate limit exceeded"
+
+        if not await limiter.acquire():
+            return False, ADMISSION_RETRY_AFTER_SECONDS, "Server is busy, please retry later"
+        return True, 0, ""
+
+    def release(self, endpoint_class: str):
+        self.limiters[endpoint_class].release()
+
+    def reserve_job(self, endpoint_class: str) -> bool:
+        """
+        Reserve a place for a background job of this class. On success the caller
+        must either start it with acquire_job/release_job or call cancel_job.
+        """
+        return self.limiters[endpoint_class].reserve_job()
+
+    def cancel_job(self, endpoint_class: str):
+        self.limiters[endpoint_class].cancel_job()
+
+    async def acquire_job(self, endpoint_class: str):
+        await self.limiters[endpoint_class].acquire_job()
+
+    def release_job(self, endpoint_class: str):
+        self.limiters[endpoint_class].release_job()
+
+    def stats(self) -> Dict:
+        return {
+            "endpoints": {name: limiter.stats() for name, limiter in self.limiters.items()},
+            "tracked_clients": len(self._buckets),
+        }
+
+
+admission_controller = AdmissionController()
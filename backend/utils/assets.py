@@ -0,0 +1,178 @@
+"""
+Visual asset handling for presentations.
+Resolves image visuals ahead of export so PPTX/PDF rendering stays local,
+and right-sizes images for the box they are embedded in.
+"""
+import hashlib
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .prompt import generate_image_hf
+from .storage import STORAGE_DIR
+from .metrics import record_cache
+from .logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+ASSETS_DIR = STORAGE_DIR / "assets"
+VARIANTS_DIR = ASSETS_DIR / "variants"
+
+# Resolution used when right-sizing images for the box they are placed in
+ASSET_DPI = int(os.getenv("ASSET_DPI", "150"))
+ASSET_JPEG_QUALITY = int(os.getenv("ASSET_JPEG_QUALITY", "85"))
+
+
+def asset_hash(description: str) -> str:
+    """Content hash used to name and deduplicate a generated image."""
+    return hashlib.sha256(description.strip().encode("utf-8")).hexdigest()[:32]
+
+
+def asset_path(digest: str) -> Path:
+    """Location of the original image for a given asset hash."""
+    return ASSETS_DIR / f"{digest}.png"
+
+
+def resolve_image_path(visual: Dict) -> Optional[str]:
+    """
+    Return a local image path for a visual if one is already available.
+    Never touches the network; returns None when the asset is missing.
+    """
+    image_path = visual.get("image_path")
+    if image_path and os.path.exists(image_path):
+        return image_path
+
+    digest = visual.get("asset_hash")
+    if digest:
+        candidate = asset_path(digest)
+        if candidate.exists():
+            return str(candidate)
+
+    return None
+
+
+def _translate_to_english(text: str) -> str:
+    from googletrans import Translator
+    translator = Translator()
+    return translator.translate(text, src='az', dest='en').text
+
+
+def fetch_image_asset(description: str) -> Optional[str]:
+    """
+    Return the asset hash of the image for a description, generating it into
+    the asset store if it is not there yet. Returns None when image generation
+    is unavailable; other failures raise.
+    """
+    digest = asset_hash(description)
+    target = asset_path(digest)
+    record_cache("image_asset", hit=target.exists())
+    if not target.exists():
+        ASSETS_DIR.mkdir(parents=True, exist_ok=True)
+        english_description = _translate_to_english(description)
+        if not generate_image_hf(english_description, str(target)):
+            return None
+    return digest
+
+
+def image_visual(description: str, digest: str) -> Dict:
+    """Image visual pointing at a stored asset."""
+    return {"type": "image", "description": description, "asset_hash": digest, "image_path": str(asset_path(digest))}
+
+
+def visual_description(slide: Dict) -> str:
+    """Text an image visual is generated from: its description, else the visual or slide title."""
+    visual = slide.get("visual") or {}
+    return visual.get("description") or visual.get("title") or slide.get("title", "")
+
+
+def prefetch_visual_assets(slides: List[Dict]) -> List[Dict]:
+    """
+    Generate images for every main slide whose visual is an image and
+    store the resulting path and hash on the visual.
+
+    Slides that already have a resolvable asset are skipped. Failures are
+    recorded per slide and leave the visual untouched, so export falls back
+    to the text description.
+    """
+    errors = []
+
+    for idx, slide in enumerate(slides):
+        if slide.get("type") != "main":
+            continue
+        visual = slide.get("visual") or {}
+        if visual.get("type") != "image":
+            continue
+        if resolve_image_path(visual):
+            continue
+
+        description = visual_description(slide)
+        if not description:
+            continue
+
+        try:
+            digest = fetch_image_asset(description)
+            if digest is None:
+                errors.append({"slide_index": idx, "error": "Image generation unavailable"})
+                continue
+            visual["asset_hash"] = digest
+            visual["image_path"] = str(asset_path(digest))
+        except Exception as e:
+            errors.append({"slide_index": idx, "error": str(e)})
+
+    return errors
+
+
+def _has_alpha(image) -> bool:
+    if image.mode in ("RGBA", "LA"):
+        return image.getchannel("A").getextrema()[0] < 255
+    return image.mode == "P" and "transparency" in image.info
+
+
+def prepare_image(image_path: str, width_in: float, height_in: float, dpi: Optional[int] = None) -> str:
+    """
+    Return a copy of the image right-sized for a box of the given size in inches.
+
+    The image is downsampled (never upscaled) so it still covers the box at
+    the configured DPI, and re-encoded as JPEG unless it has transparency.
+    Variants are cached per source and pixel size; on any failure the
+    original path is returned unchanged.
+    """
+    dpi = dpi or ASSET_DPI
+    box_w = max(1, int(round(width_in * dpi)))
+    box_h = max(1, int(round(height_in * dpi)))
+
+    try:
+        from PIL import Image as PILImage
+
+        source = Path(image_path).resolve()
+        source_key = hashlib.sha256(str(source).encode("utf-8")).hexdigest()[:8]
+        prefix = f"{source.stem}_{source_key}_{box_w}x{box_h}"
+
+        for ext in (".jpg", ".png"):
+            cached = VARIANTS_DIR / f"{prefix}{ext}"
+            if cached.exists() and cached.stat().st_mtime >= source.stat().st_mtime:
+                record_cache("image_variant", hit=True)
+                return str(cached)
+        record_cache("image_variant", hit=False)
+
+        with PILImage.open(source) as image:
+            image.load()
+            src_w, src_h = image.size
+            scale = min(1.0, max(box_w / src_w, box_h / src_h))
+            if scale < 1.0:
+                size = (max(1, int(src_w * scale)), max(1, int(src_h * scale)))
+                image = image.resize(size, PILImage.LANCZOS)
+
+            VARIANTS_DIR.mkdir(parents=True, exist_ok=True)
+            if _has_alpha(image):
+                target = VARIANTS_DIR / f"{prefix}.png"
+                image.save(target, format="PNG", optimize=True)
+            else:
+                target = VARIANTS_DIR / f"{prefix}.jpg"
+                image.convert("RGB").save(
+                    target, format="JPEG", quality=ASSET_JPEG_QUALITY, optimize=True, progressive=True
+                )
+        return str(target)
+    except Exception as e:
+        logger.warning("Could not preprocess image '%s': %s", image_path, e)
+        return image_path
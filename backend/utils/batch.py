@@ -0,0 +1,202 @@
+"""
+Batch generation pipeline.
+Each uploaded file moves through extraction, model generation and rendering;
+every stage has its own process-wide concurrency limit, so different files
+occupy different stages at the same time and results are emitted as each file finishes.
+"""
+import asyncio
+import os
+import tempfile
+import time
+import uuid
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from .file_reader import read_file
+from .text_cleanup import reduce_prompt_text
+from .prompt import get_presentation, build_offline_presentation
+from .storage import save_presentation, generate_presentation_id
+from .assets import prefetch_visual_assets
+from .source_index import save_source_index
+from .prerender import prerender_worker, render_artifact
+from .lazy import lazy_function
+from .logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+parse_gpt_response = lazy_function("backend.utils.slide", "parse_gpt_response")
+
+BATCH_MAX_FILES = int(os.getenv("BATCH_MAX_FILES", "50"))
+BATCH_EXTRACT_CONCURRENCY = int(os.getenv("BATCH_EXTRACT_CONCURRENCY", "4"))
+BATCH_LLM_CONCURRENCY = int(os.getenv("BATCH_LLM_CONCURRENCY", "4"))
+BATCH_RENDER_CONCURRENCY = int(os.getenv("BATCH_RENDER_CONCURRENCY", "2"))
+
+# Options a file may override; everything else comes from the shared form fields
+FILE_OPTIONS = {"slide_count": int, "include_visuals": bool, "draft": bool}
+
+MIN_TEXT_LENGTH = 50
+
+
+class BatchError(ValueError):
+    """A file failed in one of the stages; the message is returned to the client."""
+
+
+def _extract(filename: str, content: bytes):
+    suffix = os.path.splitext(filename)[1]
+    tmp_path = os.path.join(tempfile.gettempdir(), f"upload_{os.getpid()}_{uuid.uuid4().hex}{suffix}")
+    with open(tmp_path, "wb") as f:
+        f.write(content)
+    try:
+        text = read_file(tmp_path)
+    finally:
+        os.remove(tmp_path)
+
+    if not text or len(text.strip()) < MIN_TEXT_LENGTH:
+        raise BatchError(
+            "No text could be extracted from the document. The document might contain only images or be corrupted."
+        )
+    return reduce_prompt_text(text)
+
+
+def _generate(text: str, options: Dict) -> Tuple[List[Dict], bool]:
+    """Parsed slides and whether the offline fallback built them instead of the model."""
+    if options["draft"]:
+        return parse_gpt_response(build_offline_presentation(text, options["slide_count"])), False
+    response, used_fallback = get_presentation(
+        text, slide_count=options["slide_count"], include_visuals=options["include_visuals"]
+    )
+    return parse_gpt_response(response), used_fallback
+
+
+def _render(slides: List[Dict], text: str, filename: str, options: Dict, metadata: Dict) -> Dict:
+    asset_errors = prefetch_visual_assets(slides)
+    saved = save_presentation(generate_presentation_id(), slides, metadata={
+        "original_filename": filename,
+        **options,
+        **metadata,
+    })
+    save_source_index(saved["id"], text)
+    # Rendered straight into the current export; the PDF is left to the background worker
+    render_artifact(saved, "pptx")
+    prerender_worker.schedule(saved["id"], delay=0)
+    return {"presentation_id": saved["id"], "asset_errors": asset_errors}
+
+
+class BatchPipeline:
+    """Stage limits shared by all batches in the process."""
+
+    def __init__(self, extract: int = None, llm: int = None, render: int = None):
+        self.extract = asyncio.Semaphore(extract or BATCH_EXTRACT_CONCURRENCY)
+        self.llm = asyncio.Semaphore(llm or BATCH_LLM_CONCURRENCY)
+        self.render = asyncio.Semaphore(render or BATCH_RENDER_CONCURRENCY)
+
+    async def process(self, index: int, filename: str, content: bytes, options: Dict, metadata: Dict,
+                      on_stage: Optional[Callable[[str], None]] = None) -> Dict:
+        """
+        Run one file through all stages and return its result; failures are
+        returned as {"status": "error", ...}. on_stage is called as each stage starts,
+        in a worker thread since it may write files (job records).
+        """
+        timings = {}
+        stage = "extract"
+        started = time.perf_counter()
+        try:
+            if on_stage:
+                await asyncio.to_thread(on_stage, stage)
+            async with self.extract:
+                stage_started = time.perf_counter()
+                text, preprocessing = await asyncio.to_thread(_extract, filename, content)
+                timings["extract"] = time.perf_counter() - stage_started
+
+            stage = "generate"
+            if on_stage:
+                await asyncio.to_thread(on_stage, stage)
+            async with self.llm:
+                stage_started = time.perf_counter()
+                slides, used_fallback = await asyncio.to_thread(_generate, text, options)
+                timings["generate"] = time.perf_counter() - stage_started
+
+            stage = "render"
+            if on_stage:
+                await asyncio.to_thread(on_stage, stage)
+            async with self.render:
+                stage_started = time.perf_counter()
+                rendered = await asyncio.to_thread(_render, slides, text, filename, options, {
+                    **metadata,
+                    "source_text_length": len(text),
+                    "preprocessing": preprocessing,
+                })
+                timings["render"] = time.perf_counter() - stage_started
+        except Exception as e:
+            logger.warning("File %s failed in %s: %s", filename, stage, e, extra=metadata)
+            return {
+                "index": index,
+                "filename": filename,
+                "status": "error",
+                "stage": stage,
+                "detail": str(e),
+            }
+
+        result = {
+            "index": index,
+            "filename": filename,
+            "status": "ok",
+            "presentation_id": rendered["presentation_id"],
+            "slide_count": len(slides),
+            "preprocessing": preprocessing,
+            "timings": {name: round(seconds, 3) for name, seconds in timings.items()},
+            "elapsed": round(time.perf_counter() - started, 3),
+        }
+        if rendered["asset_errors"]:
+            result["asset_errors"] = rendered["asset_errors"]
+        if used_fallback:
+            result["offline_fallback"] = True
+        return result
+
+    async def run(self, batch_id: str, files: List[Dict]) -> AsyncIterator[Dict]:
+        """
+        Process files ({"filename", "content", "options"}) concurrently and
+        yield each file's result as soon as it finishes.
+        """
+        tasks = [
+            asyncio.create_task(
+                self.process(index, f["filename"], f["content"], f["options"], {"batch_id": batch_id})
+            )
+            for index, f in enumerate(files)
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Client went away: stop files that have not reached a worker thread yet
+            for task in tasks:
+                task.cancel()
+
+
+def resolve_file_options(shared: Dict, overrides: Optional[List], file_count: int) -> List[Dict]:
+    """
+    Merge shared options with per-file overrides (a list aligned with the files;
+    entries may be null). Raises BatchError on malformed overrides.
+    """
+    overrides = overrides or []
+    if not isinstance(overrides, list) or len(overrides) > file_count:
+        raise BatchError("options must be a JSON list with at most one entry per file")
+
+    resolved = []
+    for index in range(file_count):
+        entry = overrides[index] if index < len(overrides) else None
+        options = dict(shared)
+        if entry is not None:
+            if not isinstance(entry, dict):
+                raise BatchError(f"options[{index}] must be an object or null")
+            for key, value in entry.items():
+                expected = FILE_OPTIONS.get(key)
+                if expected is None:
+                    raise BatchError(f"options[{index}]: unknown option '{key}'")
+                if not isinstance(value, expected) or (expected is int and isinstance(value, bool)):
+                    raise BatchError(f"options[{index}].{key} must be of type {expected.__name__}")
+                options[key] = value
+        resolved.append(options)
+    return resolved
+
+
+batch_pipeline = BatchPipeline()
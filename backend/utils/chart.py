@@ -2,8 +2,28 @@ from pptx.util import Inches, Pt
 from pptx.chart.data import CategoryChartData
 from pptx.enum.chart import XL_CHART_TYPE, XL_DATA_LABEL_POSITION
 
-
-
+from .logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+
+def safe_float_conversion(values):
+    result = []
+    for v in values:
+        try:
+            if isinstance(v, str):
+                v = v.strip()
+                # Handle percentages
+                if v.endswith('%'):
+                    result.append(float(v[:-1]))
+                    continue
+                # Handle "Vmax" or other common non-numeric placeholders by treating as 0 or skipping
+                # For now, 0.0 is safer to keep alignment with X axis
+            result.append(float(v))
+        except (ValueError, TypeError):
+            logger.warning("Could not convert '%s' to float. Using 0.0 instead.", v, extra={"sample_every": 10})
+            result.append(0.0)
+    return result
 
 
 def add_chart(slide, chart_type, chart_title, x=None, y=None, xlabel=None, ylabel=None, labels=None, sizes=None):
@@ -14,17 +34,17 @@ def add_chart(slide, chart_type, chart_title, x=None, y=None, xlabel=None, ylabe
             chart_data.categories = labels
             chart_data.add_series("", sizes)
         else:
-            print("Warning: Pie chart requires 'labels' and 'sizes' data.")
+            logger.warning("Pie chart requires 'labels' and 'sizes' data")
             return  # Exit
     elif chart_type in ["bar", "line"]:
         if x is not None and y is not None:
             chart_data.categories = x
             chart_data.add_series("", y)
         else:
-            print(f"Warning: {chart_type} chart requires 'x' and 'y' data.")
+            logger.warning("%s chart requires 'x' and 'y' data", chart_type)
             return
     else:
-        print(f"Warning: Unsupported chart type: {chart_type}")
+        logger.warning("Unsupported chart type: %s", chart_type)
         return
 
 
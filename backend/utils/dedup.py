@@ -0,0 +1,103 @@
+"""
+Upload deduplication index.
+Maps a hash of the uploaded bytes plus the generation options to the
+presentation generated from them, so repeated uploads can reuse it.
+"""
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Dict, Optional
+
+from .storage import STORAGE_DIR, FileLock, load_presentation
+from .metrics import record_cache
+from .logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+# In a subdirectory so list_presentations() never mistakes it for a presentation
+DEDUP_INDEX_PATH = STORAGE_DIR / "dedup" / "uploads.json"
+
+# Other API workers write the same index, so read-modify-write holds an flock too
+_lock = FileLock(DEDUP_INDEX_PATH.with_suffix(".lock"))
+# Cached copy of the index file and the (inode, mtime) it was read at
+_cache = {"entries": None, "mtime": None}
+
+
+def upload_key(content: bytes, options: Dict) -> str:
+    """Hash of the file bytes and the options that affect the generated slides."""
+    digest = hashlib.sha256(content)
+    digest.update(json.dumps(options, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _entries() -> Dict[str, Dict]:
+    """Current index entries; call with _lock held."""
+    try:
+        stat = DEDUP_INDEX_PATH.stat()
+        mtime = (stat.st_ino, stat.st_mtime_ns)
+    except FileNotFoundError:
+        mtime = None
+    if _cache["entries"] is None or mtime != _cache["mtime"]:
+        entries = {}
+        if mtime is not None:
+            try:
+                with open(DEDUP_INDEX_PATH, "r", encoding="utf-8") as f:
+                    entries = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning("Could not read dedup index, starting empty: %s", e)
+        _cache["entries"] = entries
+        _cache["mtime"] = mtime
+    return _cache["entries"]
+
+
+def _write(entries: Dict[str, Dict]):
+    """Atomically replace the index file; call with _lock held."""
+    DEDUP_INDEX_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = DEDUP_INDEX_PATH.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(entries, f, ensure_ascii=False)
+    os.replace(tmp_path, DEDUP_INDEX_PATH)
+    stat = DEDUP_INDEX_PATH.stat()
+    _cache["entries"] = entries
+    _cache["mtime"] = (stat.st_ino, stat.st_mtime_ns)
+
+
+def find_duplicate(key: str) -> Optional[str]:
+    """Presentation id generated from the same upload and options, if it still exists."""
+    with _lock:
+        entry = _entries().get(key)
+    if entry is None:
+        record_cache("upload_dedup", hit=False)
+        return None
+
+    presentation_id = entry["presentation_id"]
+    if load_presentation(presentation_id) is None:
+        # Deleted outside the API; drop the stale entry
+        forget_presentation(presentation_id)
+        record_cache("upload_dedup", hit=False)
+        return None
+    record_cache("upload_dedup", hit=True)
+    return presentation_id
+
+
+def remember_upload(key: str, presentation_id: str, filename: str = ""):
+    with _lock:
+        entries = dict(_entries())
+        entries[key] = {
+            "presentation_id": presentation_id,
+            "filename": filename,
+            "created_at": datetime.now().isoformat(),
+        }
+        _write(entries)
+
+
+def forget_presentation(presentation_id: str) -> int:
+    """Remove every index entry that points to a presentation. Returns the number removed."""
+    with _lock:
+        entries = _entries()
+        remaining = {k: v for k, v in entries.items() if v.get("presentation_id") != presentation_id}
+        removed = len(entries) - len(remaining)
+        if removed:
+            _write(remaining)
+    return removed
@@ -1,45 +1,55 @@
 import os
-import pdfplumber
-from docx import Document
+
+from .metrics import timed_stage
+from .logging_setup import get_logger
+
+logger = get_logger(__name__)
 
 
 def read_pdf(file_path):
+    import pdfplumber
+
     text = ''
     try:
         with pdfplumber.open(file_path) as pdf:
             total_pages = len(pdf.pages)
-            print(f"Processing PDF with {total_pages} pages...")
+            logger.info("Processing PDF with %d pages", total_pages)
 
             for page_num, page in enumerate(pdf.pages, 1):
                 try:
                     page_text = page.extract_text()
                     if page_text and page_text.strip():
-                        text += page_text.strip() + '\n'
+                        # Form feed marks page boundaries for header/footer detection
+                        text += page_text.strip() + '\f'
                     else:
-                        print(f"Warning: Page {page_num} has no extractable text (might contain only images)")
+                        logger.warning(
+                            "Page %d has no extractable text (might contain only images)", page_num,
+                            extra={"sample_every": 10}
+                        )
                 except Exception as e:
-                    print(f"Warning: Failed to extract text from page {page_num}: {e}")
+                    logger.warning("Failed to extract text from page %d: %s", page_num, e, extra={"sample_every": 10})
                     continue
 
             if not text.strip():
                 raise ValueError(
                     "No text could be extracted from the PDF. The PDF might contain only images or be corrupted.")
 
-            print(f"Successfully extracted {len(text)} characters from PDF")
+            logger.info("Extracted %d characters from PDF", len(text), extra={"pages": total_pages})
             return text.strip()
 
     except Exception as e:
         raise ValueError(f"Error reading PDF file: {str(e)}")
 
 
+@timed_stage("read_file")
 def read_file(file_path):
     ext = os.path.splitext(file_path)[1].lower()
-    print(f"read_file called with {file_path}, ext={ext}")
+    logger.debug("read_file called with %s, ext=%s", file_path, ext)
 
     if ext == '.docx':
-        print(f"Opening DOCX: {file_path}")
+        from docx import Document
         doc = Document(file_path)
-        print(f"DOCX opened successfully")
+        logger.debug("Opened DOCX: %s", file_path)
         return '\n'.join([para.text for para in doc.paragraphs if para.text.strip()])
 
     elif ext == '.pdf':
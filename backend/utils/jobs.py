@@ -0,0 +1,110 @@
+"""
+Generation jobs for clients that poll instead of holding a request open.
+Job records are small JSON files, so every API worker sees the same status.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, Optional
+
+from .storage import STORAGE_DIR, _sanitize_identifier
+from .logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+JOBS_DIR = STORAGE_DIR / "jobs"
+JOB_TTL_SECONDS = int(os.getenv("JOB_TTL_SECONDS", "86400"))
+
+# Rough share of the total time spent before each stage starts
+STAGE_PROGRESS = {"queued": 0.0, "extract": 0.05, "generate": 0.2, "render": 0.85, "done": 1.0}
+
+_lock = threading.Lock()
+_last_prune = {"at": 0.0}
+
+
+def _job_path(job_id: str):
+    return JOBS_DIR / f"{_sanitize_identifier(job_id)}.json"
+
+
+def _write(job: Dict):
+    JOBS_DIR.mkdir(parents=True, exist_ok=True)
+    target = _job_path(job["id"])
+    tmp_path = target.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(job, f, ensure_ascii=False)
+    os.replace(tmp_path, target)
+
+
+def prune_jobs(max_age: int = None) -> int:
+    """Delete job records older than max_age seconds. Returns the number removed."""
+    max_age = JOB_TTL_SECONDS if max_age is None else max_age
+    if not JOBS_DIR.exists():
+        return 0
+    cutoff = time.time() - max_age
+    removed = 0
+    for file_path in JOBS_DIR.glob("*.json"):
+        try:
+            if file_path.stat().st_mtime < cutoff:
+                file_path.unlink()
+                removed += 1
+        except FileNotFoundError:
+            continue
+    return removed
+
+
+def create_job(filename: str, options: Dict) -> Dict:
+    now = datetime.now().isoformat()
+    job = {
+        "id": uuid.uuid4().hex,
+        "status": "queued",
+        "stage": "queued",
+        "progress": STAGE_PROGRESS["queued"],
+        "filename": filename,
+        "options": options,
+        "created_at": now,
+        "updated_at": now,
+        "result": None,
+        "error": None,
+    }
+    with _lock:
+        _write(job)
+        # Finished jobs are only polled for a short while; sweep at most once a minute
+        if time.time() - _last_prune["at"] > 60:
+            _last_prune["at"] = time.time()
+            removed = prune_jobs()
+            if removed:
+                logger.debug("Pruned %d expired jobs", removed)
+    return job
+
+
+def get_job(job_id: str) -> Optional[Dict]:
+    try:
+        with open(_job_path(job_id), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def update_job(job_id: str, **fields) -> Optional[Dict]:
+    with _lock:
+        job = get_job(job_id)
+        if job is None:
+            return None
+        job.update(fields)
+        job["updated_at"] = datetime.now().isoformat()
+        _write(job)
+    return job
+
+
+def set_stage(job_id: str, stage: str):
+    update_job(job_id, status="running", stage=stage, progress=STAGE_PROGRESS[stage])
+
+
+def finish_job(job_id: str, result: Dict):
+    if result.get("status") == "ok":
+        update_job(job_id, status="done", stage="done", progress=STAGE_PROGRESS["done"], result=result)
+    else:
+        update_job(job_id, status="error", error={"stage": result.get("stage"), "detail": result.get("detail")})
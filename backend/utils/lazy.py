@@ -0,0 +1,79 @@
+"""
+Deferred loading of heavy modules.
+Rendering and provider libraries are imported when the code that needs them
+first runs, so the API process starts quickly; warm_up() preloads them on demand.
+"""
+import importlib
+import os
+import time
+from typing import Callable, Iterable
+
+from .logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+# "false" (default), "true" (finish before serving) or "background"
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "false").lower()
+
+# Third-party packages that importing backend.api must not load
+HEAVY_MODULES = (
+    "google.generativeai", "huggingface_hub", "googletrans", "reportlab",
+    "pdfplumber", "docx", "pptx", "numpy", "PIL",
+)
+
+# Modules preloaded by warm_up(); the backend ones pull in python-pptx and reportlab
+WARMUP_MODULES = (
+    "backend.utils.slide",
+    "backend.utils.pdf_export",
+    "numpy",
+    "pdfplumber",
+    "docx",
+    "PIL.Image",
+    "google.generativeai",
+    "huggingface_hub",
+    "googletrans",
+)
+
+
+def lazy_function(module_name: str, attribute: str) -> Callable:
+    """Stand-in for module_name.attribute that imports the module on first call."""
+    target = None
+
+    def wrapper(*args, **kwargs):
+        nonlocal target
+        if target is None:
+            target = getattr(importlib.import_module(module_name), attribute)
+        return target(*args, **kwargs)
+
+    wrapper.__name__ = wrapper.__qualname__ = attribute
+    wrapper.__module__ = module_name
+    return wrapper
+
+
+def loaded_heavy_modules() -> list:
+    """Heavy packages that are currently imported."""
+    import sys
+    return [name for name in HEAVY_MODULES if name in sys.modules]
+
+
+def warm_up(modules: Iterable[str] = WARMUP_MODULES) -> float:
+    """
+    Import heavy modules and initialise shared renderers ahead of the first request.
+    Missing optional packages are logged and skipped. Returns the time taken.
+    """
+    started = time.perf_counter()
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            logger.warning("Warm-up could not import %s: %s", name, e)
+
+    try:
+        # Font registration and paragraph styles of the PDF renderer
+        importlib.import_module("backend.utils.pdf_export").get_pdf_renderer()
+    except Exception as e:
+        logger.warning("Warm-up could not initialise the PDF renderer: %s", e)
+
+    elapsed = time.perf_counter() - started
+    logger.info("Warm-up finished in %.2fs", elapsed, extra={"modules": len(tuple(modules))})
+    return elapsed
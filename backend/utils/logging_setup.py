@@ -0,0 +1,112 @@
+"""
+Structured logging for the backend.
+JSON (or plain text) records with request correlation ids, written to stdout
+through a non-blocking queue handler, with sampling for noisy per-item messages.
+"""
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+
+request_id_var: contextvars.ContextVar[str] = contextvars.ContextVar("request_id", default="-")
+
+_STANDARD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id", "sample_every"}
+
+_configure_lock = threading.Lock()
+_listener = None
+
+
+class RequestIdFilter(logging.Filter):
+    """Attach the current request id to every record."""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only one of every N records logged with extra={"sample_every": N}.
+    Counting is per logger and message template, so different messages are sampled independently.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def filter(self, record):
+        every = getattr(record, "sample_every", None)
+        if not every or every <= 1:
+            return True
+        key = (record.name, record.msg)
+        with self._lock:
+            count = self._counts.get(key, 0)
+            self._counts[key] = count + 1
+        if count % every == 0:
+            record.sampled = f"1/{every}"
+            return True
+        return False
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        payload = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+def configure_logging(level: str = None, fmt: str = None):
+    """
+    Route all backend loggers through a queue to a single stdout writer thread.
+    Safe to call more than once; only the first call has an effect.
+    """
+    global _listener
+    with _configure_lock:
+        if _listener is not None:
+            return
+
+        stream_handler = logging.StreamHandler(sys.stdout)
+        if (fmt or LOG_FORMAT) == "json":
+            stream_handler.setFormatter(JsonFormatter())
+        else:
+            stream_handler.setFormatter(logging.Formatter(
+                "%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s"
+            ))
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        # Filters run in the caller's thread so they see its request context
+        queue_handler.addFilter(RequestIdFilter())
+        queue_handler.addFilter(SamplingFilter())
+
+        root = logging.getLogger("backend")
+        root.setLevel(level or LOG_LEVEL)
+        root.addHandler(queue_handler)
+        root.propagate = False
+
+        _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+        _listener.start()
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger under the 'backend' hierarchy (module names already start with 'backend.')."""
+    return logging.getLogger(name if name.startswith("backend") else f"backend.{name}")
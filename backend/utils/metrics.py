@@ -0,0 +1,143 @@
+"""
+In-process metrics in Prometheus text format.
+Per-stage latency histograms, counters, and per-request stage timings
+used for the Server-Timing response header.
+"""
+import contextvars
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+_lock = threading.Lock()
+# name -> (help, {label tuple -> [bucket counts..., sum, count]})
+_histograms: Dict[str, Tuple[str, Dict[Tuple, List[float]]]] = {}
+# name -> (help, {label tuple -> value})
+_counters: Dict[str, Tuple[str, Dict[Tuple, float]]] = {}
+
+# Stage timings of the current request: list of (stage, seconds)
+_request_timings: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = contextvars.ContextVar(
+    "request_timings", default=None
+)
+
+
+def _label_key(labels: Dict[str, str]) -> Tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def observe(name: str, value: float, help_text: str = "", **labels):
+    """Add one observation to a histogram."""
+    key = _label_key(labels)
+    with _lock:
+        _, series = _histograms.setdefault(name, (help_text, {}))
+        values = series.get(key)
+        if values is None:
+            values = series[key] = [0.0] * (len(DEFAULT_BUCKETS) + 2)
+        for i, bound in enumerate(DEFAULT_BUCKETS):
+            if value <= bound:
+                values[i] += 1
+        values[-2] += value
+        values[-1] += 1
+
+
+def inc(name: str, amount: float = 1.0, help_text: str = "", **labels):
+    """Increment a counter."""
+    key = _label_key(labels)
+    with _lock:
+        _, series = _counters.setdefault(name, (help_text, {}))
+        series[key] = series.get(key, 0.0) + amount
+
+
+def record_cache(cache: str, hit: bool):
+    inc("taskd_cache_hits_total" if hit else "taskd_cache_misses_total",
+        help_text="Cache lookups by cache name", cache=cache)
+
+
+def record_fallback(reason: str):
+    inc("taskd_model_fallbacks_total", help_text="Fallbacks to another model or the offline generator",
+        reason=reason)
+
+
+def record_stage(stage: str, seconds: float):
+    observe("taskd_stage_duration_seconds", seconds,
+            help_text="Duration of pipeline stages in seconds", stage=stage)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((stage, seconds))
+
+
+@contextmanager
+def stage_timer(stage: str):
+    """Time a block as a pipeline stage; exceptions are counted as stage errors."""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        inc("taskd_stage_errors_total", help_text="Exceptions raised by pipeline stages", stage=stage)
+        raise
+    finally:
+        record_stage(stage, time.perf_counter() - started)
+
+
+def timed_stage(stage: str):
+    """Decorator form of stage_timer."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage_timer(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def start_request_timings() -> contextvars.Token:
+    """Begin collecting stage timings for the current request."""
+    return _request_timings.set([])
+
+
+def finish_request_timings(token: contextvars.Token) -> List[Tuple[str, float]]:
+    timings = _request_timings.get() or []
+    _request_timings.reset(token)
+    return timings
+
+
+def server_timing_header(timings: List[Tuple[str, float]], total: float) -> str:
+    """Format stage timings as a Server-Timing header value (durations in ms)."""
+    merged: Dict[str, float] = {}
+    for stage, seconds in timings:
+        merged[stage] = merged.get(stage, 0.0) + seconds
+    parts = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in merged.items()]
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+def _format_labels(key: Tuple, extra: Tuple = ()) -> str:
+    items = list(key) + list(extra)
+    if not items:
+        return ""
+    escaped = [(k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for k, v in items]
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+def render_prometheus() -> str:
+    """Render all metrics in the Prometheus text exposition format."""
+    lines = []
+    with _lock:
+        for name, (help_text, series) in sorted(_histograms.items()):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for key, values in series.items():
+                for i, bound in enumerate(DEFAULT_BUCKETS):
+                    lines.append(f"{name}_bucket{_format_labels(key, (('le', str(bound)),))} {values[i]:g}")
+                lines.append(f"{name}_bucket{_format_labels(key, (('le', '+Inf'),))} {values[-1]:g}")
+                lines.append(f"{name}_sum{_format_labels(key)} {values[-2]:.6f}")
+                lines.append(f"{name}_count{_format_labels(key)} {values[-1]:g}")
+        for name, (help_text, series) in sorted(_counters.items()):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for key, value in series.items():
+                lines.append(f"{name}{_format_labels(key)} {value:g}")
+    return "\n".join(lines) + "\n"
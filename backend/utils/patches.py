@@ -0,0 +1,149 @@
+"""
+Compact slide-list patches.
+A patch is an ordered list of operations on the slide list:
+  {"op": "replace", "index": i, "slide": {...}}
+  {"op": "insert", "index": i, "slide": {...}}
+  {"op": "delete", "index": i}
+  {"op": "move", "from": i, "to": j}
+Indices refer to the list as it is when that operation runs.
+"""
+import json
+from typing import Dict, List, Tuple
+
+SLIDE_TYPES = {"title", "intro", "main", "recommendation"}
+VISUAL_TYPES = ("bar", "line", "pie", "image")
+
+
+def _same(a: Dict, b: Dict) -> bool:
+    return json.dumps(a, sort_keys=True) == json.dumps(b, sort_keys=True)
+
+
+def diff_slides(old: List[Dict], new: List[Dict]) -> List[Dict]:
+    """Patch turning old into new: changed positions are replaced, the tail is inserted or deleted."""
+    patch = []
+    for index in range(min(len(old), len(new))):
+        if not _same(old[index], new[index]):
+            patch.append({"op": "replace", "index": index, "slide": new[index]})
+    for index in range(len(old), len(new)):
+        patch.append({"op": "insert", "index": index, "slide": new[index]})
+    for index in range(len(old) - 1, len(new) - 1, -1):
+        patch.append({"op": "delete", "index": index})
+    return patch
+
+
+def reorder_patch(order: List[int]) -> List[Dict]:
+    """Moves that apply a permutation (new position -> old index); one drag-and-drop is one move."""
+    current = list(range(len(order)))
+    patch = []
+    for target, wanted in enumerate(order):
+        position = current.index(wanted)
+        if position != target:
+            current.insert(target, current.pop(position))
+            patch.append({"op": "move", "from": position, "to": target})
+    return patch
+
+
+def _apply_operation(slides: List[Dict], operation: Dict):
+    """Apply one patch operation in place. Raises ValueError if it does not fit the list."""
+    op = operation.get("op")
+    if op == "insert":
+        index = operation.get("index")
+        if not isinstance(index, int) or not 0 <= index <= len(slides):
+            raise ValueError("insert index out of range")
+        slides.insert(index, operation["slide"])
+        return
+
+    if op == "move":
+        source, target = operation.get("from"), operation.get("to")
+        if not all(isinstance(i, int) and 0 <= i < len(slides) for i in (source, target)):
+            raise ValueError("move index out of range")
+        slides.insert(target, slides.pop(source))
+        return
+
+    index = operation.get("index")
+    if not isinstance(index, int) or not 0 <= index < len(slides):
+        raise ValueError(f"{op} index out of range")
+    if op == "replace":
+        slides[index] = operation["slide"]
+    elif op == "delete":
+        del slides[index]
+    else:
+        raise ValueError(f"unknown op '{op}'")
+
+
+def _check_slide(slide) -> Dict:
+    if not isinstance(slide, dict):
+        raise ValueError("slide must be an object")
+    if slide.get("type") not in SLIDE_TYPES:
+        raise ValueError(f"Invalid slide type: {slide.get('type')}")
+    return slide
+
+
+def _slide_at(slides: List[Dict], operation: Dict) -> int:
+    index = operation.get("index")
+    if not isinstance(index, int) or not 0 <= index < len(slides):
+        raise ValueError(f"{operation.get('op')} index out of range")
+    return index
+
+
+def compile_operations(slides: List[Dict], operations: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Validate editing operations against the slides and turn them into one patch.
+    Accepted operations (applied in order, indices as they are at that point):
+      {"op": "insert", "index": i, "slide": {...}}
+      {"op": "delete", "index": i}
+      {"op": "move", "from": i, "to": j}
+      {"op": "update", "index": i, "fields": {...}}   fields are merged, null removes a field
+      {"op": "set_visual", "index": i, "visual": {...} or null}   main slides only
+    Returns (new slides, patch). Raises ValueError naming the first invalid operation.
+    """
+    result = list(slides)
+    patch = []
+    for number, operation in enumerate(operations):
+        try:
+            if not isinstance(operation, dict):
+                raise ValueError("operation must be an object")
+            op = operation.get("op")
+            if op == "insert":
+                step = {"op": "insert", "index": operation.get("index"), "slide": _check_slide(operation.get("slide"))}
+            elif op == "delete":
+                step = {"op": "delete", "index": operation.get("index")}
+            elif op == "move":
+                step = {"op": "move", "from": operation.get("from"), "to": operation.get("to")}
+            elif op == "update":
+                index = _slide_at(result, operation)
+                fields = operation.get("fields")
+                if not isinstance(fields, dict) or not fields:
+                    raise ValueError("fields must be a non-empty object")
+                merged = {k: v for k, v in {**result[index], **fields}.items() if v is not None}
+                step = {"op": "replace", "index": index, "slide": _check_slide(merged)}
+            elif op == "set_visual":
+                index = _slide_at(result, operation)
+                if result[index].get("type") != "main":
+                    raise ValueError("visuals can only be set on main slides")
+                visual = operation.get("visual")
+                slide = {k: v for k, v in result[index].items() if k != "visual"}
+                if visual is not None:
+                    if not isinstance(visual, dict) or visual.get("type") not in VISUAL_TYPES:
+                        raise ValueError(f"visual type must be one of: {', '.join(VISUAL_TYPES)}")
+                    slide["visual"] = visual
+                step = {"op": "replace", "index": index, "slide": slide}
+            else:
+                raise ValueError(f"unknown op '{op}'")
+            _apply_operation(result, step)
+        except ValueError as e:
+            raise ValueError(f"operations[{number}]: {e}")
+        patch.append(step)
+    return result, patch
+
+
+def affected_indices(patch: List[Dict]) -> List[int]:
+    """Sorted slide positions touched by a patch."""
+    indices = set()
+    for operation in patch:
+        if operation["op"] == "move":
+            low, high = sorted((operation["from"], operation["to"]))
+            indices.update(range(low, high + 1))
+        else:
+            indices.add(operation["index"])
+    return sorted(indices)
@@ -0,0 +1,172 @@
+"""
+Vector chart rendering for PDF export.
+Mirrors the bar/line/pie charts that add_chart draws in PPTX.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from reportlab.graphics.shapes import Drawing, Group, String
+from reportlab.graphics.charts.barcharts import VerticalBarChart
+from reportlab.graphics.charts.linecharts import HorizontalLineChart
+from reportlab.graphics.charts.piecharts import Pie
+from reportlab.lib.colors import HexColor
+from reportlab.lib.units import inch
+
+from .chart import safe_float_conversion
+from .metrics import record_cache
+from .logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+CHART_COLOR = HexColor('#2c6fbb')
+PIE_COLORS = [HexColor(c) for c in (
+    '#2c6fbb', '#e67e22', '#27ae60', '#c0392b', '#8e44ad', '#16a085', '#f1c40f', '#7f8c8d'
+)]
+
+_CACHE_SIZE = 256
+_cache_lock = threading.Lock()
+# Validated chart data by hash; Drawings themselves are built per render
+_spec_cache: "OrderedDict[str, Dict]" = OrderedDict()
+
+
+def chart_data_hash(visual: Dict) -> str:
+    """Hash of the chart-relevant fields of a visual."""
+    payload = {
+        key: visual.get(key)
+        for key in ("type", "title", "xlabel", "ylabel", "x", "y", "labels", "sizes")
+    }
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def _add_title(drawing, title, width, height, font_name):
+    if title:
+        drawing.add(String(width / 2, height - 14, title, fontName=font_name, fontSize=12, textAnchor='middle'))
+
+
+def _chart_spec(visual: Dict) -> Optional[Dict]:
+    """Validated, truncated chart data, or None if the visual's data is unusable."""
+    chart_type = visual.get("type")
+    spec = {"type": chart_type, **{key: visual.get(key) or "" for key in ("title", "xlabel", "ylabel")}}
+    if chart_type == "pie":
+        labels = [str(v) for v in visual.get("labels") or []]
+        sizes = safe_float_conversion(visual.get("sizes") or [])
+        if not labels or not sizes:
+            logger.warning("Pie chart requires 'labels' and 'sizes' data")
+            return None
+        count = min(len(labels), len(sizes))
+        if sum(sizes[:count]) <= 0:
+            return None
+        return {**spec, "labels": labels[:count], "sizes": sizes[:count]}
+
+    x = [str(v) for v in visual.get("x") or []]
+    y = safe_float_conversion(visual.get("y") or [])
+    if not x or not y:
+        logger.warning("%s chart requires 'x' and 'y' data", chart_type)
+        return None
+    count = min(len(x), len(y))
+    return {**spec, "x": x[:count], "y": y[:count]}
+
+
+def _category_chart(spec, width, height, font_name):
+    chart_type, x, y = spec["type"], spec["x"], spec["y"]
+
+    drawing = Drawing(width, height)
+    chart = VerticalBarChart() if chart_type == "bar" else HorizontalLineChart()
+    chart.x = 50
+    chart.y = 40
+    chart.width = width - 80
+    chart.height = height - 80
+    chart.data = [y]
+    chart.categoryAxis.categoryNames = x
+    chart.categoryAxis.labels.fontName = font_name
+    chart.categoryAxis.labels.fontSize = 8
+    chart.valueAxis.labels.fontName = font_name
+    chart.valueAxis.labels.fontSize = 8
+    chart.valueAxis.valueMin = min(0, min(y))
+
+    if chart_type == "bar":
+        chart.bars[0].fillColor = CHART_COLOR
+        chart.barLabelFormat = '%s'
+        chart.barLabels.fontName = font_name
+        chart.barLabels.fontSize = 7
+        chart.barLabels.nudge = 6
+    else:
+        chart.lines[0].strokeColor = CHART_COLOR
+        chart.lines[0].strokeWidth = 2
+        chart.lineLabelFormat = '%s'
+        chart.lineLabels.fontName = font_name
+        chart.lineLabels.fontSize = 7
+
+    drawing.add(chart)
+    _add_title(drawing, spec["title"], width, height, font_name)
+
+    if spec["xlabel"]:
+        drawing.add(String(chart.x + chart.width / 2, 8, spec["xlabel"], fontName=font_name, fontSize=9, textAnchor='middle'))
+    if spec["ylabel"]:
+        label = Group(String(0, 0, spec["ylabel"], fontName=font_name, fontSize=9, textAnchor='middle'))
+        label.transform = (0, 1, -1, 0, 12, chart.y + chart.height / 2)
+        drawing.add(label)
+    return drawing
+
+
+def _pie_chart(spec, width, height, font_name):
+    labels, sizes = spec["labels"], spec["sizes"]
+    count = len(labels)
+
+    drawing = Drawing(width, height)
+    pie = Pie()
+    diameter = min(width, height) - 70
+    pie.width = pie.height = diameter
+    pie.x = (width - diameter) / 2
+    pie.y = (height - diameter) / 2 - 10
+    pie.data = sizes
+    pie.labels = [f"{label} ({value:g})" for label, value in zip(labels, sizes)]
+    pie.simpleLabels = 0
+    pie.sideLabels = 1
+    pie.slices.fontName = font_name
+    pie.slices.fontSize = 8
+    for i in range(count):
+        pie.slices[i].fillColor = PIE_COLORS[i % len(PIE_COLORS)]
+
+    drawing.add(pie)
+    _add_title(drawing, spec["title"], width, height, font_name)
+    return drawing
+
+
+def build_chart_drawing(visual: Dict, width: float = 6*inch, height: float = 3.5*inch,
+                        font_name: str = "Helvetica") -> Optional[Drawing]:
+    """
+    Return a reportlab Drawing for a bar/line/pie visual, or None if the
+    visual is not a chart or its data is unusable.
+
+    The validated chart data is cached by a hash of the visual, but every call
+    builds a new Drawing: reportlab keeps per-render state (canv, _parent) on
+    a drawing while drawing it, so one object cannot serve concurrent renders.
+    """
+    chart_type = visual.get("type")
+    if chart_type not in ("bar", "line", "pie"):
+        return None
+
+    key = chart_data_hash(visual)
+    with _cache_lock:
+        hit = key in _spec_cache
+        spec = _spec_cache.get(key)
+        if hit:
+            _spec_cache.move_to_end(key)
+    record_cache("chart_spec", hit=hit)
+    if not hit:
+        spec = _chart_spec(visual)
+        with _cache_lock:
+            _spec_cache[key] = spec
+            while len(_spec_cache) > _CACHE_SIZE:
+                _spec_cache.popitem(last=False)
+
+    if spec is None:
+        return None
+    if chart_type == "pie":
+        return _pie_chart(spec, width, height, font_name)
+    return _category_chart(spec, width, height, font_name)
@@ -2,7 +2,6 @@
 PDF export functionality for presentations.
 Converts presentation slides to PDF format.
 """
-from reportlab.lib.pagesizes import letter, A4
 from reportlab.lib.units import inch
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
@@ -10,149 +9,252 @@ from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak,
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.lib.colors import HexColor
-from typing import List, Dict
+from typing import List, Dict, Optional
 import os
-from PIL import Image as PILImage
-import tempfile
+import threading
 
+from .assets import resolve_image_path, prepare_image
+from .pdf_chart import build_chart_drawing
+from .metrics import timed_stage
+from .logging_setup import get_logger
 
+logger = get_logger(__name__)
+
+# Same aspect as the slides in format_new.pptx (16:9, 13.333 x 7.5 in)
+SLIDE_PAGE_SIZE = (13.333*inch, 7.5*inch)
+
+# TTF fonts covering Azerbaijani letters (ə, ğ, ş, ...); Helvetica is the fallback
+_FONT_CANDIDATES = [
+    os.getenv("PDF_FONT_PATH", ""),
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/TTF/DejaVuSans.ttf",
+    "/Library/Fonts/Arial Unicode.ttf",
+    "C:\\Windows\\Fonts\\arial.ttf",
+]
+
+_font_lock = threading.Lock()
+_registered_fonts: Optional[Dict[str, str]] = None
+
+
+def _register_fonts() -> Dict[str, str]:
+    """Register a Unicode TTF font once per process and return the font names to use."""
+    global _registered_fonts
+    with _font_lock:
+        if _registered_fonts is not None:
+            return _registered_fonts
+
+        fonts = {"regular": "Helvetica", "bold": "Helvetica-Bold"}
+        for path in _FONT_CANDIDATES:
+            if not path or not os.path.exists(path):
+                continue
+            try:
+                pdfmetrics.registerFont(TTFont("SlideSans", path))
+                bold_name = "SlideSans"
+                bold_path = path.replace(".ttf", "-Bold.ttf")
+                if os.path.exists(bold_path):
+                    pdfmetrics.registerFont(TTFont("SlideSans-Bold", bold_path))
+                    bold_name = "SlideSans-Bold"
+                # Needed so <b>/<i> markup inside paragraphs resolves to this family
+                pdfmetrics.registerFontFamily(
+                    "SlideSans", normal="SlideSans", bold=bold_name,
+                    italic="SlideSans", boldItalic=bold_name
+                )
+                fonts = {"regular": "SlideSans", "bold": bold_name}
+                break
+            except Exception as e:
+                logger.warning("Could not register font '%s': %s", path, e)
+
+        _registered_fonts = fonts
+        return fonts
+
+
+class PDFRenderer:
+    """
+    Reusable PDF renderer for presentations.
+
+    Styles and fonts are prepared once in the constructor, so a single
+    instance can render many decks. Each render builds its own flowables,
+    including a new Drawing per chart (only the validated chart data is
+    cached), so several threads can share one instance.
+    """
+
+    def __init__(self, pagesize=SLIDE_PAGE_SIZE, margin=0.5*inch):
+        self.pagesize = pagesize
+        self.margin = margin
+
+        fonts = _register_fonts()
+        self.font_name = fonts['regular']
+        styles = getSampleStyleSheet()
+
+        self.title_style = ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=32,
+            textColor=HexColor('#1a1a1a'),
+            spaceAfter=30,
+            alignment=TA_CENTER,
+            fontName=fonts['bold']
+        )
+
+        self.slide_title_style = ParagraphStyle(
+            'SlideTitle',
+            parent=styles['Heading2'],
+            fontSize=24,
+            textColor=HexColor('#2c3e50'),
+            spaceAfter=20,
+            alignment=TA_LEFT,
+            fontName=fonts['bold']
+        )
+
+        self.content_style = ParagraphStyle(
+            'Content',
+            parent=styles['Normal'],
+            fontSize=14,
+            textColor=HexColor('#34495e'),
+            spaceAfter=12,
+            alignment=TA_LEFT,
+            leading=18,
+            fontName=fonts['regular']
+        )
+
+        self.bullet_style = ParagraphStyle(
+            'Bullet',
+            parent=styles['Normal'],
+            fontSize=14,
+            textColor=HexColor('#34495e'),
+            spaceAfter=10,
+            alignment=TA_LEFT,
+            leading=18,
+            leftIndent=20,
+            fontName=fonts['regular']
+        )
+
+    def build_story(self, slides: List[Dict]) -> List:
+        """Build the list of flowables for a deck, one page per slide."""
+        story = []
+        last_index = len(slides) - 1
+
+        for index, slide in enumerate(slides):
+            slide_type = slide.get('type', '')
+
+            if slide_type == 'title':
+                # Title slide
+                title = slide.get('title', 'Presentation')
+                story.append(Spacer(1, 2*inch))
+                story.append(Paragraph(title, self.title_style))
+                story.append(Spacer(1, 0.5*inch))
+
+            elif slide_type == 'intro':
+                # Introduction slide
+                story.append(Paragraph("Giriş", self.slide_title_style))
+                story.append(Spacer(1, 0.2*inch))
+
+                aim = slide.get('aim', '')
+                if aim:
+                    story.append(Paragraph(f"<b>Məqsəd:</b> {aim}", self.content_style))
+                    story.append(Spacer(1, 0.15*inch))
+
+                summary = slide.get('summary', '')
+                if summary:
+                    story.append(Paragraph(f"<b>Xülasə:</b> {summary}", self.content_style))
+
+            elif slide_type == 'main':
+                # Main content slide
+                title = slide.get('title', '')
+                if title:
+                    story.append(Paragraph(title, self.slide_title_style))
+                    story.append(Spacer(1, 0.2*inch))
+
+                # Add bullet points
+                for i in range(1, 5):
+                    point = slide.get(f'point{i}', '')
+                    if point:
+                        story.append(Paragraph(f"• {point}", self.bullet_style))
+
+                # Handle visual if present
+                visual = slide.get('visual', {})
+                if visual and visual.get('type') == 'image':
+                    image_path = resolve_image_path(visual)
+                    if image_path:
+                        try:
+                            # Add image to PDF
+                            img = Image(prepare_image(image_path, 5, 3), width=5*inch, height=3*inch)
+                            story.append(Spacer(1, 0.2*inch))
+                            story.append(img)
+                        except Exception as e:
+                            # Fallback to description if image can't be loaded
+                            description = visual.get('description', 'Image')
+                            story.append(Spacer(1, 0.2*inch))
+                            story.append(Paragraph(f"<i>[Vizual: {description}]</i>", self.content_style))
+                    elif visual.get('description'):
+                        story.append(Spacer(1, 0.2*inch))
+                        story.append(Paragraph(f"<i>[Vizual: {visual['description']}]</i>", self.content_style))
+                elif visual and visual.get('type') in ('bar', 'line', 'pie'):
+                    try:
+                        drawing = build_chart_drawing(visual, font_name=self.font_name)
+                    except Exception as e:
+                        logger.warning("Could not draw %s chart: %s", visual.get('type'), e)
+                        drawing = None
+                    if drawing is not None:
+                        story.append(Spacer(1, 0.2*inch))
+                        story.append(drawing)
+                    elif visual.get('title'):
+                        story.append(Spacer(1, 0.2*inch))
+                        story.append(Paragraph(f"<i>[Vizual: {visual['title']}]</i>", self.content_style))
+
+            elif slide_type == 'recommendation':
+                # Recommendations slide
+                story.append(Paragraph("Tövsiyələr", self.slide_title_style))
+                story.append(Spacer(1, 0.2*inch))
+
+                for i in range(1, 6):
+                    rec = slide.get(f'recommendation{i}', '')
+                    if rec:
+                        story.append(Paragraph(f"• {rec}", self.bullet_style))
+
+            # Add page break between slides (except for the last one)
+            if index != last_index:
+                story.append(PageBreak())
+
+        return story
+
+    def render(self, slides: List[Dict], output_path: str) -> int:
+        """Render a deck to output_path and return the number of pages written."""
+        doc = SimpleDocTemplate(
+            output_path,
+            pagesize=self.pagesize,
+            rightMargin=self.margin,
+            leftMargin=self.margin,
+            topMargin=self.margin,
+            bottomMargin=self.margin
+        )
+        doc.build(self.build_story(slides))
+        return doc.page
+
+
+_renderer_lock = threading.Lock()
+_default_renderer: Optional[PDFRenderer] = None
+
+
+def get_pdf_renderer() -> PDFRenderer:
+    """Return the shared, lazily created renderer."""
+    global _default_renderer
+    if _default_renderer is None:
+        with _renderer_lock:
+            if _default_renderer is None:
+                _default_renderer = PDFRenderer()
+    return _default_renderer
+
+
+@timed_stage("create_pdf_from_slides")
 def create_pdf_from_slides(slides: List[Dict], output_path: str, template_info: Dict = None):
     """
     Create a PDF presentation from slides data.
-    
+
     Args:
         slides: List of slide dictionaries
         output_path: Path where PDF will be saved
         template_info: Optional template information (colors, fonts, etc.)
     """
-    doc = SimpleDocTemplate(
-        output_path,
-        pagesize=A4,
-        rightMargin=0.75*inch,
-        leftMargin=0.75*inch,
-        topMargin=0.75*inch,
-        bottomMargin=0.75*inch
-    )
-    
-    # Build story (content)
-    story = []
-    styles = getSampleStyleSheet()
-    
-    # Custom styles
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=32,
-        textColor=HexColor('#1a1a1a'),
-        spaceAfter=30,
-        alignment=TA_CENTER,
-        fontName='Helvetica-Bold'
-    )
-    
-    slide_title_style = ParagraphStyle(
-        'SlideTitle',
-        parent=styles['Heading2'],
-        fontSize=24,
-        textColor=HexColor('#2c3e50'),
-        spaceAfter=20,
-        alignment=TA_LEFT,
-        fontName='Helvetica-Bold'
-    )
-    
-    content_style = ParagraphStyle(
-        'Content',
-        parent=styles['Normal'],
-        fontSize=14,
-        textColor=HexColor('#34495e'),
-        spaceAfter=12,
-        alignment=TA_LEFT,
-        leading=18,
-        fontName='Helvetica'
-    )
-    
-    bullet_style = ParagraphStyle(
-        'Bullet',
-        parent=styles['Normal'],
-        fontSize=14,
-        textColor=HexColor('#34495e'),
-        spaceAfter=10,
-        alignment=TA_LEFT,
-        leading=18,
-        leftIndent=20,
-        fontName='Helvetica'
-    )
-    
-    for slide in slides:
-        slide_type = slide.get('type', '')
-        
-        if slide_type == 'title':
-            # Title slide
-            title = slide.get('title', 'Presentation')
-            story.append(Spacer(1, 2*inch))
-            story.append(Paragraph(title, title_style))
-            story.append(Spacer(1, 0.5*inch))
-            
-        elif slide_type == 'intro':
-            # Introduction slide
-            story.append(Paragraph("Giriş", slide_title_style))
-            story.append(Spacer(1, 0.2*inch))
-            
-            aim = slide.get('aim', '')
-            if aim:
-                story.append(Paragraph(f"<b>Məqsəd:</b> {aim}", content_style))
-                story.append(Spacer(1, 0.15*inch))
-            
-            summary = slide.get('summary', '')
-            if summary:
-                story.append(Paragraph(f"<b>Xülasə:</b> {summary}", content_style))
-            
-        elif slide_type == 'main':
-            # Main content slide
-            title = slide.get('title', '')
-            if title:
-                story.append(Paragraph(title, slide_title_style))
-                story.append(Spacer(1, 0.2*inch))
-            
-            # Add bullet points
-            for i in range(1, 5):
-                point = slide.get(f'point{i}', '')
-                if point:
-                    story.append(Paragraph(f"• {point}", bullet_style))
-            
-            # Handle visual if present
-            visual = slide.get('visual', {})
-            if visual and visual.get('type') == 'image':
-                image_path = visual.get('image_path')
-                if image_path and os.path.exists(image_path):
-                    try:
-                        # Add image to PDF
-                        img = Image(image_path, width=5*inch, height=3*inch)
-                        story.append(Spacer(1, 0.2*inch))
-                        story.append(img)
-                    except Exception as e:
-                        # Fallback to description if image can't be loaded
-                        description = visual.get('description', 'Image')
-                        story.append(Spacer(1, 0.2*inch))
-                        story.append(Paragraph(f"<i>[Vizual: {description}]</i>", content_style))
-                elif visual.get('description'):
-                    story.append(Spacer(1, 0.2*inch))
-                    story.append(Paragraph(f"<i>[Vizual: {visual['description']}]</i>", content_style))
-        
-        elif slide_type == 'recommendation':
-            # Recommendations slide
-            story.append(Paragraph("Tövsiyələr", slide_title_style))
-            story.append(Spacer(1, 0.2*inch))
-            
-            for i in range(1, 6):
-                rec = slide.get(f'recommendation{i}', '')
-                if rec:
-                    story.append(Paragraph(f"• {rec}", bullet_style))
-        
-        # Add page break between slides (except for the last one)
-        if slide != slides[-1]:
-            story.append(PageBreak())
-    
-    # Build PDF
-    doc.build(story)
+    get_pdf_renderer().render(slides, output_path)
     return output_path
-
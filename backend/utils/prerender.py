@@ -0,0 +1,184 @@
+"""
+Background pre-rendering of exports.
+After a presentation is generated or edited, a low-priority worker renders
+its PPTX and PDF so the download endpoints can serve a finished file.
+Artifacts are named by presentation version: a file is current exactly when
+its version matches the stored presentation.
+"""
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from .storage import STORAGE_DIR, load_presentation, _sanitize_identifier, shard_path, find_sharded
+from .lazy import lazy_function
+from .metrics import timed_stage
+from .logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+generate_pptx = lazy_function("backend.utils.slide", "generate_pptx")
+create_pdf_from_slides = lazy_function("backend.utils.pdf_export", "create_pdf_from_slides")
+
+EXPORTS_DIR = STORAGE_DIR / "exports"
+
+PRERENDER_ENABLED = os.getenv("PRERENDER_ENABLED", "true").lower() in ("1", "true", "yes")
+# Quiet period after an edit before rendering, so a burst of edits renders once
+PRERENDER_DELAY_SECONDS = float(os.getenv("PRERENDER_DELAY_SECONDS", "2"))
+PRERENDER_FORMATS = tuple(f.strip() for f in os.getenv("PRERENDER_FORMATS", "pptx,pdf").split(",") if f.strip())
+# Added to the worker thread's nice value (Linux) so it yields to request handling
+PRERENDER_NICE = int(os.getenv("PRERENDER_NICE", "10"))
+
+RENDERERS = {"pptx": generate_pptx, "pdf": create_pdf_from_slides}
+
+
+def artifact_path(presentation_id: str, version: int, fmt: str) -> Path:
+    safe_id = _sanitize_identifier(presentation_id)
+    return shard_path(EXPORTS_DIR, f"{safe_id}.v{version}.{fmt}", safe_id)
+
+
+def _artifact_files(presentation_id: str, fmt: str = "*") -> List[Path]:
+    """Every rendered version of a presentation, in its shard and in the old flat layout."""
+    safe_id = _sanitize_identifier(presentation_id)
+    pattern = f"{safe_id}.v*.{fmt}"
+    shard_dir = shard_path(EXPORTS_DIR, pattern, safe_id).parent
+    return list(shard_dir.glob(pattern)) + list(EXPORTS_DIR.glob(pattern))
+
+
+def current_artifact(presentation: Dict, fmt: str) -> Optional[Path]:
+    """Rendered file for the presentation's current version, if there is one."""
+    safe_id = _sanitize_identifier(presentation["id"])
+    return find_sharded(EXPORTS_DIR, f"{safe_id}.v{presentation.get('version', 0)}.{fmt}", safe_id)
+
+
+def delete_artifacts(presentation_id: str) -> int:
+    if not EXPORTS_DIR.exists():
+        return 0
+    removed = 0
+    for path in _artifact_files(presentation_id):
+        path.unlink(missing_ok=True)
+        removed += 1
+    return removed
+
+
+@timed_stage("render_artifact")
+def render_artifact(presentation: Dict, fmt: str, still_current: Callable[[], bool] = None) -> Optional[Path]:
+    """
+    Render an export for the presentation's version and publish it atomically.
+    Older versions of the same format are removed. If still_current() is False
+    once rendering finishes, the result is discarded and None is returned.
+    """
+    version = presentation.get("version", 0)
+    target = artifact_path(presentation["id"], version, fmt)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = target.parent / f".{uuid.uuid4().hex}.tmp.{fmt}"
+    try:
+        RENDERERS[fmt](presentation["slides"], str(tmp_path))
+        if still_current is not None and not still_current():
+            return None
+        os.replace(tmp_path, target)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+    # Only older versions: a concurrent render may already have published a newer one
+    for old in _artifact_files(presentation["id"], fmt):
+        old_version = old.name.rsplit(".", 2)[-2][1:]
+        if old_version.isdigit() and int(old_version) < version:
+            old.unlink(missing_ok=True)
+    return target
+
+
+class PrerenderWorker:
+    """
+    One background thread rendering exports for recently changed presentations.
+    Scheduling a presentation again before it is rendered only pushes its due time
+    back; a render whose presentation changed meanwhile is discarded.
+    """
+
+    def __init__(self, delay: float = PRERENDER_DELAY_SECONDS, formats=PRERENDER_FORMATS):
+        self.delay = delay
+        self.formats = formats
+        self._due: Dict[str, float] = {}
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stats = {"scheduled": 0, "coalesced": 0, "rendered": 0, "stale": 0, "failed": 0}
+
+    def schedule(self, presentation_id: str, delay: float = None):
+        if not PRERENDER_ENABLED:
+            return
+        with self._cond:
+            self._stats["scheduled"] += 1
+            if presentation_id in self._due:
+                self._stats["coalesced"] += 1
+            self._due[presentation_id] = time.monotonic() + (self.delay if delay is None else delay)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="prerender", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def cancel(self, presentation_id: str):
+        with self._cond:
+            self._due.pop(presentation_id, None)
+
+    def stats(self) -> Dict:
+        with self._cond:
+            return {**self._stats, "pending": len(self._due)}
+
+    def _count(self, key: str):
+        with self._cond:
+            self._stats[key] += 1
+
+    def _run(self):
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), PRERENDER_NICE)
+        except (AttributeError, OSError):
+            pass
+
+        while True:
+            with self._cond:
+                while True:
+                    if self._due:
+                        presentation_id, due = min(self._due.items(), key=lambda item: item[1])
+                        wait = due - time.monotonic()
+                        if wait <= 0:
+                            del self._due[presentation_id]
+                            break
+                        self._cond.wait(wait)
+                    else:
+                        self._cond.wait()
+            try:
+                self._render(presentation_id)
+            except Exception as e:
+                self._count("failed")
+                logger.warning("Pre-rendering %s failed: %s", presentation_id, e)
+
+    def _is_stale(self, presentation_id: str, version: int) -> bool:
+        with self._cond:
+            if presentation_id in self._due:
+                return True
+        stored = load_presentation(presentation_id)
+        return stored is None or stored.get("version", 0) != version
+
+    def _render(self, presentation_id: str):
+        presentation = load_presentation(presentation_id)
+        if presentation is None:
+            return
+        version = presentation.get("version", 0)
+        for fmt in self.formats:
+            if current_artifact(presentation, fmt) is not None:
+                continue
+            # A newer edit arrived: stop here, the rescheduled run renders the new version
+            if self._is_stale(presentation_id, version):
+                self._count("stale")
+                return
+            if render_artifact(presentation, fmt, still_current=lambda: not self._is_stale(presentation_id, version)):
+                self._count("rendered")
+            else:
+                self._count("stale")
+                return
+        logger.debug("Pre-rendered exports", extra={"presentation_id": presentation_id, "version": version})
+
+
+prerender_worker = PrerenderWorker()
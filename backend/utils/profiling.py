@@ -0,0 +1,127 @@
+"""
+On-demand request profiling.
+A wall-clock sampling profiler over all threads of the process (event loop,
+request threadpool and executor threads), saved in the collapsed-stack
+format understood by flamegraph.pl, speedscope and inferno.
+"""
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .storage import STORAGE_DIR
+from .logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+# Profiling is opt-in per process; when off, the middleware is not even installed
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.005"))
+PROFILES_DIR = STORAGE_DIR / "profiles"
+
+_PROFILE_NAME = re.compile(r"^[A-Za-z0-9_.-]+\.folded$")
+_IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("thread.py", "_worker"),
+}
+
+# Only one request is profiled at a time
+_active_lock = threading.Lock()
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Samples the stacks of every other thread at a fixed interval."""
+
+    def __init__(self, interval: float = None):
+        self.interval = interval or PROFILE_SAMPLE_INTERVAL
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.started_at = None
+        self.duration = 0.0
+
+    def start(self) -> bool:
+        """Start sampling. Returns False if another profile is already running."""
+        if not _active_lock.acquire(blocking=False):
+            return False
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration = time.perf_counter() - self.started_at
+        _active_lock.release()
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        while not self._stop.is_set():
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                leaf = (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name)
+                if leaf in _IDLE_LEAVES:
+                    continue
+                stack: List[str] = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                self.samples[";".join(reversed(stack))] += 1
+            self._stop.wait(self.interval)
+
+    def folded(self) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common()) + "\n"
+
+
+def save_profile(profiler: SamplingProfiler, method: str, path: str) -> str:
+    """Write a profile to PROFILES_DIR and return its file name."""
+    PROFILES_DIR.mkdir(parents=True, exist_ok=True)
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", path).strip("_")[:60] or "root"
+    name = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}_{method.lower()}_{slug}_{uuid.uuid4().hex[:6]}.folded"
+    (PROFILES_DIR / name).write_text(profiler.folded(), encoding="utf-8")
+    logger.info(
+        "Saved profile %s", name,
+        extra={"duration": round(profiler.duration, 3), "samples": sum(profiler.samples.values())}
+    )
+    return name
+
+
+def list_profiles() -> List[Dict]:
+    if not PROFILES_DIR.exists():
+        return []
+    profiles = []
+    for file_path in sorted(PROFILES_DIR.glob("*.folded"), reverse=True):
+        stat = file_path.stat()
+        profiles.append({
+            "name": file_path.name,
+            "size": stat.st_size,
+            "created_at": datetime.fromtimestamp(stat.st_mtime).isoformat(),
+        })
+    return profiles
+
+
+def profile_path(name: str) -> Optional[Path]:
+    """Resolve a profile name to its file, rejecting anything that is not a plain profile file name."""
+    if not _PROFILE_NAME.match(name):
+        return None
+    file_path = PROFILES_DIR / name
+    return file_path if file_path.exists() else None
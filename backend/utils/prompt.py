@@ -1,11 +1,17 @@
-
-import google.generativeai as genai
-from google.generativeai.types import GenerationConfig
-from huggingface_hub import InferenceClient
+# google.generativeai, huggingface_hub and numpy (via the summarizer) are imported
+# where they are used, so importing this module stays cheap at process start
 import os
-import re
 import json
 import textwrap
+import threading
+import time
+import contextvars
+import logging
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from .metrics import timed_stage, record_cache, record_fallback
+from .logging_setup import get_logger
+from .resilience import available_models, backoff_delay, get_breaker, BREAKER_NOT_FOUND_SECONDS, HedgeStats
 
 # Load environment variables from .env file
 try:
@@ -24,6 +30,8 @@ if sys.platform.startswith('win'):
         # For older Python versions that don't support reconfigure
         pass
 
+logger = get_logger(__name__)
+
 
 def build_prompt(text, slide_count=6, include_visuals=False):
     remaining = slide_count - 3
@@ -152,23 +160,26 @@ CAVABI BU FORMATA JSON ARRAY KİMİ QAYTAR:
 
 
 def build_offline_presentation(text, slide_count):
-    sentences = [s.strip() for s in re.split(r'[\.\n]+', text) if s.strip()]
-    title = (sentences[0] if sentences else "Təqdimat")[:60]
+    """
+    Build slides locally with the extractive summarizer (no API calls).
+    Used when no API key is set, when every model fails, and for drafts.
+    """
+    from .summarizer import summarize_sections, find_recommendations
+
     remaining = max(slide_count - 3, 1)
+    result = summarize_sections(text, remaining)
+    sentences = result["sentences"]
+
+    first_line = next((line.strip() for line in text.splitlines() if line.strip()), "")
+    title = (first_line or (sentences[0] if sentences else "Təqdimat"))[:60]
 
     mains = []
-    idx = 0
-    for i in range(remaining):
-        points = []
-        for _ in range(4):
-            if idx < len(sentences):
-                points.append(textwrap.shorten(sentences[idx], width=120, placeholder="…"))
-                idx += 1
-            else:
-                points.append("")
+    for i, section in enumerate(result["sections"]):
+        points = [textwrap.shorten(p, width=120, placeholder="…") for p in section["points"]]
+        points += [""] * (4 - len(points))
         mains.append({
             "type": "main",
-            "title": f"Mövzu {i+1}",
+            "title": section["title"] or f"Mövzu {i+1}",
             "point1": points[0],
             "point2": points[1],
             "point3": points[2],
@@ -176,59 +187,155 @@ def build_offline_presentation(text, slide_count):
             "visual": {"type": "none", "title": "", "description": "", "xlabel": "", "ylabel": "", "x": [], "y": [], "labels": [], "sizes": []}
         })
 
+    default_recommendations = [
+        "Məzmunu daha da dəqiqləşdirin",
+        "Əlavə sübutlar toplayın",
+        "Riskləri qiymətləndirin",
+        "Növbəti mərhələləri planlayın",
+        "Komanda ilə paylaşın",
+    ]
+    recommendations = [textwrap.shorten(r, width=120, placeholder="…") for r in find_recommendations(sentences)]
+    recommendations += default_recommendations[len(recommendations):]
+
     slides = [
         {"type": "title", "title": title},
-        {"type": "intro", "aim": "Sənədin əsas ideyalarını təqdim etmək", "summary": textwrap.shorten(" ".join(sentences[:5]), width=300, placeholder="…")},
+        {"type": "intro", "aim": "Sənədin əsas ideyalarını təqdim etmək", "summary": textwrap.shorten(" ".join(result["summary"]), width=300, placeholder="…")},
         *mains,
-        {"type": "recommendation", "recommendation1": "Məzmunu daha da dəqiqləşdirin", "recommendation2": "Əlavə sübutlar toplayın", "recommendation3": "Riskləri qiymətləndirin", "recommendation4": "Növbəti mərhələləri planlayın", "recommendation5": "Komanda ilə paylaşın"}
+        {"type": "recommendation", **{f"recommendation{i+1}": rec for i, rec in enumerate(recommendations[:5])}}
     ]
     return json.dumps(slides, ensure_ascii=False)
 
 
-def get_presentation(text, slide_count=6, model_name='gemini-pro', include_visuals=False):
-    api_key = os.getenv("GOOGLE_API_KEY")
-    if not api_key:
-        return build_offline_presentation(text, slide_count)
+def build_slide_prompt(slide, context_chunks, deck_title="", instructions=None):
+    """Prompt that rewrites one main slide from the given source excerpts only."""
+    current = {k: slide.get(k, "") for k in ("title", "point1", "point2", "point3", "point4")}
+    current["visual"] = slide.get("visual") or {"type": "none"}
+    excerpts = "\n\n".join(f"[{n + 1}] {chunk}" for n, chunk in enumerate(context_chunks))
+    extra = f"\nƏLAVƏ GÖSTƏRİŞ: {instructions}\n" if instructions else ""
+    return f"""
+"{deck_title}" adlı təqdimatın bir Əsas slaydını yenidən hazırla.
+Yalnız aşağıdakı sənəd parçalarına əsaslan, əlavə məlumat əlavə etmə.
+
+HAZIRKI SLAYD:
+{json.dumps(current, ensure_ascii=False, indent=2)}
+
+SƏNƏD PARÇALARI:
+\"\"\"
+{excerpts}
+\"\"\"
+{extra}
+QAYDALAR:
+- Slaydın mövzusunu saxla, başlığı və 4 bəndi daha dəqiq və məzmunlu et.
+- Slayd dili rəsmi və aydın olmalıdır, cümlələr qısa olsun.
+- Cümlə dəyərlərinin içində qaçırılmamış qoşa dırnaq işarələrindən istifadə etmə.
+- `visual` obyektinin strukturu eyni qalmalıdır ("type": "none" | "image" | "bar" | "pie" | "line"); uyğun rəqəmlər parçalarda varsa, onları istifadə et.
+
+CAVABI BİR ELEMENTLİ JSON ARRAY KİMİ QAYTAR:
+[{{"type": "main", "title": "...", "point1": "...", "point2": "...", "point3": "...", "point4": "...", "visual": {{...}}}}]
+"""
+
+
+def build_offline_slide(slide, context_chunks):
+    """Refill a main slide's points with the excerpt sentences closest to it (no API calls)."""
+    from .summarizer import split_sentences, tokenize
+
+    query_terms = set(tokenize(" ".join(str(slide.get(k, "")) for k in ("title", "point1", "point2", "point3", "point4"))))
+    candidates = []
+    seen = set()
+    for chunk in context_chunks:
+        for sentence in split_sentences(chunk):
+            if sentence in seen:
+                continue
+            seen.add(sentence)
+            terms = set(tokenize(sentence))
+            overlap = len(terms & query_terms) / (len(terms) ** 0.5) if terms else 0.0
+            candidates.append((overlap, len(candidates), sentence))
+
+    best = sorted(candidates, key=lambda c: (-c[0], c[1]))[:4]
+    points = [textwrap.shorten(sentence, width=120, placeholder="…") for _, _, sentence in sorted(best, key=lambda c: c[1])]
+    regenerated = dict(slide)
+    for i in range(4):
+        if i < len(points):
+            regenerated[f"point{i + 1}"] = points[i]
+    return json.dumps([regenerated], ensure_ascii=False)
+
+
+SYSTEM_INSTRUCTION = "Sən təqdimat üzrə Azərbaycan dilində AI asistentsən. Sənəvərə cavabını YALNIZ JSON formatında qaytar. Heç bir əlavə mətn, izahat və ya formatlaşdırma olmadan."
+
+# How long the result of genai.list_models() is reused between requests
+MODEL_LIST_TTL_SECONDS = float(os.getenv("MODEL_LIST_TTL_SECONDS", "600"))
+# Extra attempts on the same model for rate-limit / transient errors
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+# Upper bound on time spent across all models before falling back offline
+LLM_DEADLINE_SECONDS = float(os.getenv("LLM_DEADLINE_SECONDS", "90"))
+# Longest a single model call may take; exceeding it counts against the model's breaker
+LLM_CALL_TIMEOUT_SECONDS = float(os.getenv("LLM_CALL_TIMEOUT_SECONDS", "60"))
+
+# Hedging: send a second request when the first is slower than this percentile of recent calls
+LLM_HEDGING = os.getenv("LLM_HEDGING", "false").lower() in ("1", "true", "yes")
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "90"))
+LLM_HEDGE_DEFAULT_DELAY_SECONDS = float(os.getenv("LLM_HEDGE_DEFAULT_DELAY_SECONDS", "15"))
+
+# Provider endpoint overrides, e.g. the local fakes in benchmarks/fake_providers.py for load testing
+GEMINI_API_ENDPOINT = os.getenv("GEMINI_API_ENDPOINT")
+HF_INFERENCE_ENDPOINT = os.getenv("HF_INFERENCE_ENDPOINT")
+HF_IMAGE_MODEL = "stabilityai/stable-diffusion-3-medium-diffusers"
+
+hedge_stats = HedgeStats(LLM_HEDGE_PERCENTILE, LLM_HEDGE_DEFAULT_DELAY_SECONDS)
+_hedge_executor = ThreadPoolExecutor(max_workers=int(os.getenv("LLM_HEDGE_WORKERS", "8")), thread_name_prefix="llm-hedge")
+
+_model_list_lock = threading.Lock()
+_model_list_cache = {"names": None, "fetched_at": 0.0}
+
+
+def _list_generate_models():
+    """Names of models that support generateContent, cached for MODEL_LIST_TTL_SECONDS."""
+    with _model_list_lock:
+        names = _model_list_cache["names"]
+        if names is not None and time.monotonic() - _model_list_cache["fetched_at"] < MODEL_LIST_TTL_SECONDS:
+            record_cache("model_list", hit=True)
+            return list(names)
+    record_cache("model_list", hit=False)
+
+    import google.generativeai as genai
 
-    genai.configure(api_key=api_key)
-    
-    # Try different model names with correct format
-    # First, try to list available models to see what's actually available
     available_model_names = []
     try:
-        print("Checking available models from API...")
+        logger.debug("Checking available models from API")
         for model in genai.list_models():
             if 'generateContent' in model.supported_generation_methods:
                 model_full_name = model.name  # This already includes 'models/' prefix
                 model_short_name = model.name.replace('models/', '')
                 if not any(x in model_short_name.lower() for x in ["exp", "preview", "beta", "gemma"]):
                     available_model_names.append(model_full_name)
-                print(f"Found available model: {model_full_name}")
-        
+                logger.debug("Found available model: %s", model_full_name)
+
         if available_model_names:
-            print(f"Using {len(available_model_names)} available model(s)")
+            logger.info("Using %d available model(s)", len(available_model_names))
     except Exception as e:
-        print(f"Could not list models from API: {e}")
-        print("Will try default model list...")
-    
-    # Try different model names with correct format
+        logger.warning("Could not list models from API, will try default model list: %s", e)
+        # Do not cache failures; the next request probes again
+        return available_model_names
+
+    with _model_list_lock:
+        _model_list_cache["names"] = list(available_model_names)
+        _model_list_cache["fetched_at"] = time.monotonic()
+    return available_model_names
+
+
+def _candidate_models(model_name):
     # Prioritize models found from API, then try common ones
-    model_names_to_try = []
-    
-    # First, add models we found from the API
-    for av_model in available_model_names:
-        if av_model not in model_names_to_try:
-            model_names_to_try.append(av_model)
-    
+    available_model_names = _list_generate_models()
+    model_names_to_try = list(available_model_names)
+
     # Then add the provided model name (if any)
     if model_name:
         provided_model = model_name if model_name.startswith('models/') else f'models/{model_name}'
-        if provided_model not in model_names_to_try:
-            model_names_to_try.append(provided_model)
-    
+        model_names_to_try.append(provided_model)
+
     # Add common fallback models (only if we didn't find any from API)
     if not available_model_names:
-        fallback_models = [
+        model_names_to_try.extend([
             'models/gemini-1.5-flash-8b',
             'models/gemini-1.5-flash',
             'models/gemini-1.5-pro',
@@ -237,11 +344,8 @@ def get_presentation(text, slide_count=6, model_name='gemini-pro', include_visua
             'gemini-1.5-flash',
             'gemini-1.5-pro',
             'gemini-pro',
-        ]
-        for m in fallback_models:
-            if m not in model_names_to_try:
-                model_names_to_try.append(m)
-    
+        ])
+
     # Remove duplicates while preserving order
     seen = set()
     unique_models = []
@@ -249,21 +353,199 @@ def get_presentation(text, slide_count=6, model_name='gemini-pro', include_visua
         if m and m not in seen:
             seen.add(m)
             unique_models.append(m)
-    model_names_to_try = unique_models
-    
-    if not model_names_to_try:
-        raise ValueError("No models available. Please check your API key and ensure Generative AI API is enabled.")
-    
-    print(f"Will try these models in order: {model_names_to_try}")
-    
+    return unique_models
+
+
+def _classify_error(error_str):
+    """Map a provider error message to 'not_found', 'retryable', 'blocked' or None (fatal)."""
+    lowered = error_str.lower()
+    if "Response blocked" in error_str:
+        return "blocked"
+    if "not found" in lowered or "not supported" in lowered or "404" in error_str:
+        return "not_found"
+    if (
+        "quota" in lowered or
+        "rate limit" in lowered or
+        "429" in error_str or
+        "503" in error_str or
+        "unavailable" in lowered or
+        "deadline exceeded" in lowered or
+        "timed out" in lowered or
+        "timeout" in lowered
+    ):
+        return "retryable"
+    return None
+
+
+def _is_timeout(error):
+    if isinstance(error, TimeoutError):
+        return True
+    lowered = str(error).lower()
+    return "timed out" in lowered or "timeout" in lowered or "deadline exceeded" in lowered
+
+
+def _generate_with_model(model_name, prompt, generation_config, timeout=None):
+    """
+    Send the prompt to one Gemini model and return the response text.
+    `timeout` (seconds) bounds the HTTP call itself, so a hung request cannot outlive the deadline.
+    """
+    import google.generativeai as genai
+
+    try:
+        model = genai.GenerativeModel(
+            model_name=model_name,
+            system_instruction=SYSTEM_INSTRUCTION
+        )
+    except Exception as e:
+        if "Developer instruction is not enabled" in str(e):
+            logger.info("Model %s does not support system_instruction; trying without", model_name)
+            model = genai.GenerativeModel(model_name=model_name)
+        else:
+            raise
+
+    # Send the prompt to the Gemini model
+    response = model.generate_content(
+        contents=[
+            {"role": "user", "parts": [{"text": prompt}]}
+        ],
+        generation_config=generation_config,
+        request_options={"timeout": timeout} if timeout is not None else None
+    )
+
+    if not response.candidates:
+        raise ValueError("No candidates in response. The API may have encountered an error.")
+
+    candidate = response.candidates[0]
+    finish_reason = getattr(candidate, 'finish_reason', None)
+    # Check for various forms of STOP (1, "STOP", FinishReason.STOP)
+    is_stop = (
+        str(finish_reason) == 'STOP' or
+        str(finish_reason) == 'FinishReason.STOP' or
+        finish_reason == 1
+    )
+
+    if finish_reason and not is_stop:
+        logger.warning("Response blocked by %s. Finish reason: %s", model_name, finish_reason)
+        raise ValueError(f"Response blocked. Finish reason: {finish_reason}")
+
+    if not (candidate.content and candidate.content.parts):
+        raise ValueError("Model did not return expected content structure. Response has no content parts.")
+
+    response_text = candidate.content.parts[0].text
+    if not response_text:
+        raise ValueError("Empty response received from API. The model did not generate any content.")
+
+    logger.info("Model %s responded", model_name, extra={"model": model_name, "response_chars": len(response_text)})
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Response preview: %s...", response_text[:200])
+    return response_text
+
+
+def _hedge_partner(model_name, model_names):
+    """Prefer the next available model in the list as the hedge; fall back to the same model."""
+    later = model_names[model_names.index(model_name) + 1:] if model_name in model_names else []
+    for candidate in later:
+        if get_breaker(candidate).is_available():
+            return candidate
+    return model_name
+
+
+def _guarded_generate(model_name, prompt, generation_config, deadline=None):
+    """
+    Call one model, bounded by LLM_CALL_TIMEOUT_SECONDS and the deadline, and record
+    the outcome on its circuit breaker.
+    """
+    breaker = get_breaker(model_name)
+    started = time.monotonic()
+    timeout = LLM_CALL_TIMEOUT_SECONDS
+    cut_by_deadline = False
+    if deadline is not None:
+        remaining = deadline - started
+        if remaining <= 0:
+            breaker.release()
+            raise TimeoutError("LLM deadline exceeded")
+        if remaining < timeout:
+            timeout = remaining
+            cut_by_deadline = True
+    try:
+        response_text = _generate_with_model(model_name, prompt, generation_config, timeout=timeout)
+    except Exception as e:
+        kind = _classify_error(str(e))
+        if cut_by_deadline and _is_timeout(e):
+            # Our own budget ran out before the model's call timeout; that says nothing about the model
+            breaker.release()
+        elif kind == "blocked":
+            # The model is healthy, it just refused this content
+            breaker.record_success()
+        elif kind == "not_found":
+            breaker.record_failure(open_for=BREAKER_NOT_FOUND_SECONDS)
+        else:
+            breaker.record_failure()
+        raise
+    breaker.record_success()
+    hedge_stats.observe_latency(time.monotonic() - started)
+    return response_text
+
+
+def _hedged_generate(primary, backup, prompt, generation_config, deadline):
+    """
+    Run the primary call; if it has not answered within the hedge delay,
+    start the backup call and return whichever succeeds first.
+
+    Python threads cannot be interrupted, so the losing call is cancelled
+    only if it has not started yet; otherwise its result is discarded.
+    If every call fails, the primary's error is raised.
+    """
+    # Run in a copy of the caller's context so request ids reach the worker threads' logs
+    primary_future = _hedge_executor.submit(
+        contextvars.copy_context().run, _guarded_generate, primary, prompt, generation_config, deadline
+    )
+    delay = min(hedge_stats.hedge_delay(), max(0.0, deadline - time.monotonic()))
+    done, _ = wait([primary_future], timeout=delay)
+    if done or backup is None or not get_breaker(backup).allow():
+        remaining = max(0.0, deadline - time.monotonic())
+        done, _ = wait([primary_future], timeout=remaining)
+        if not done:
+            raise TimeoutError("LLM deadline exceeded")
+        result = primary_future.result()
+        hedge_stats.record(hedged=False)
+        return result
+
+    logger.info("Model %s slower than %.1fs; hedging with %s", primary, delay, backup)
+    backup_future = _hedge_executor.submit(
+        contextvars.copy_context().run, _guarded_generate, backup, prompt, generation_config, deadline
+    )
+    pending = {primary_future, backup_future}
+    while pending:
+        remaining = max(0.0, deadline - time.monotonic())
+        done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+        if not done:
+            break
+        for future in done:
+            if future.exception() is None:
+                for other in pending:
+                    other.cancel()
+                hedge_won = future is backup_future
+                hedge_stats.record(hedged=True, hedge_won=hedge_won)
+                logger.info("Hedged request won by %s model", "backup" if hedge_won else "primary")
+                return future.result()
+
+    for future in pending:
+        future.cancel()
+    if primary_future.done() and primary_future.exception() is not None:
+        raise primary_future.exception()
+    raise TimeoutError("LLM deadline exceeded")
+
+
+def _truncate_for_prompt(text):
     # Truncate text if it's too long (Gemini has token limits)
     # Rough estimate: 1 token ≈ 4 characters, so 1M tokens ≈ 4M characters
     # For safety, limit to ~500k characters (~125k tokens) to leave room for prompt
     MAX_TEXT_LENGTH = 500000
-    
+
     original_text_length = len(text)
     if len(text) > MAX_TEXT_LENGTH:
-        print(f"Warning: Text is too long ({original_text_length} chars). Truncating to {MAX_TEXT_LENGTH} chars.")
+        logger.warning("Text is too long (%d chars). Truncating to %d chars.", original_text_length, MAX_TEXT_LENGTH)
         truncated = text[:MAX_TEXT_LENGTH]
         last_period = truncated.rfind('.')
         last_newline = truncated.rfind('\n')
@@ -272,97 +554,131 @@ def get_presentation(text, slide_count=6, model_name='gemini-pro', include_visua
             text = truncated[:last_boundary + 1]
         else:
             text = truncated
-        print(f"Text truncated to {len(text)} characters.")
-    
-    prompt = build_prompt(text, slide_count, include_visuals)
-    print(f"Prompt length: {len(prompt)} characters, Text length: {len(text)} characters")
-    
+        logger.info("Text truncated to %d characters", len(text))
+    return text
+
+
+def _call_models(prompt, model_name='gemini-pro', hedge=None, max_output_tokens=4096):
+    """
+    Send a prompt to the available Gemini models with circuit breakers, retries with
+    backoff, optional hedging and an overall deadline.
+    Returns the response text, or None when the caller should use its offline
+    fallback (the reason is recorded in the fallback metric).
+    """
+    api_key = os.getenv("GOOGLE_API_KEY")
+    if not api_key:
+        record_fallback("no_api_key")
+        return None
+
+    import google.generativeai as genai
+    from google.generativeai.types import GenerationConfig
+
+    if GEMINI_API_ENDPOINT:
+        # The REST transport accepts plain http:// endpoints such as a local fake server
+        genai.configure(api_key=api_key, transport="rest", client_options={"api_endpoint": GEMINI_API_ENDPOINT})
+    else:
+        genai.configure(api_key=api_key)
+    if hedge is None:
+        hedge = LLM_HEDGING
+
+    model_names_to_try = _candidate_models(model_name)
+    if not model_names_to_try:
+        raise ValueError("No models available. Please check your API key and ensure Generative AI API is enabled.")
+
+    # Skip models whose circuit breaker is open; if none are left, go offline immediately
+    model_names_to_try = available_models(model_names_to_try)
+    if not model_names_to_try:
+        logger.warning("All model circuit breakers are open. Using offline generator.")
+        record_fallback("breakers_open")
+        return None
+
+    logger.debug("Will try these models in order: %s", model_names_to_try)
+
     generation_config = GenerationConfig(
         temperature=0.3,
-        max_output_tokens=4096,
+        max_output_tokens=max_output_tokens,
     )
 
-    # Try each model name until one works
-    last_error = None
+    # Try each model name until one works, retrying transient errors with backoff
+    deadline = time.monotonic() + LLM_DEADLINE_SECONDS
     for current_model_name in model_names_to_try:
-        try:
-            print(f"Trying model: {current_model_name}")
+        breaker = get_breaker(current_model_name)
+        for attempt in range(LLM_MAX_RETRIES + 1):
+            if time.monotonic() >= deadline:
+                logger.warning("LLM deadline of %ss exceeded. Using offline generator.", LLM_DEADLINE_SECONDS)
+                record_fallback("deadline")
+                return None
+            if not breaker.allow():
+                break
+
             try:
-                model = genai.GenerativeModel(
-                    model_name=current_model_name,
-                    system_instruction="Sən təqdimat üzrə Azərbaycan dilində AI asistentsən. Sənəvərə cavabını YALNIZ JSON formatında qaytar. Heç bir əlavə mətn, izahat və ya formatlaşdırma olmadan."
-                )
+                logger.debug("Trying model: %s (attempt %d)", current_model_name, attempt + 1)
+                if hedge:
+                    return _hedged_generate(
+                        current_model_name,
+                        _hedge_partner(current_model_name, model_names_to_try),
+                        prompt, generation_config, deadline
+                    )
+                return _guarded_generate(current_model_name, prompt, generation_config, deadline)
             except Exception as e:
-                if "Developer instruction is not enabled" in str(e):
-                    print(f"Model {current_model_name} does not support system_instruction; trying without...")
-                    model = genai.GenerativeModel(model_name=current_model_name)
-                else:
+                error_str = str(e)
+                kind = _classify_error(error_str)
+                logger.warning("Model %s failed: %s", current_model_name, error_str, extra={"error_kind": kind})
+
+                if kind in ("blocked", "not_found"):
+                    record_fallback(kind)
+                    break
+                if kind != "retryable":
                     raise
-            
-            # Send the prompt to the Gemini model
-            response = model.generate_content(
-                contents=[
-                    {"role": "user", "parts": [{"text": prompt}]}
-                ],
-                generation_config=generation_config
-            )
-
-            if response.candidates and len(response.candidates) > 0:
-                candidate = response.candidates[0]
-                finish_reason = getattr(candidate, 'finish_reason', None)
-                # Check for various forms of STOP (1, "STOP", FinishReason.STOP)
-                is_stop = (
-                    str(finish_reason) == 'STOP' or 
-                    str(finish_reason) == 'FinishReason.STOP' or 
-                    finish_reason == 1
-                )
-                
-                if finish_reason and not is_stop:
-                    print(f"Response blocked. Finish reason: {finish_reason}. Trying next model or fallback.")
-                    last_error = ValueError(f"Response blocked. Finish reason: {finish_reason}")
-                    continue
-                
-                if candidate.content and candidate.content.parts:
-                    response_text = candidate.content.parts[0].text
-                    if not response_text:
-                        raise ValueError("Empty response received from API. The model did not generate any content.")
-                    
-                    print(f"Successfully used model: {current_model_name}")
-                    print(f"Response received: {len(response_text)} characters")
-                    print(f"Response preview: {response_text[:200]}...")
-                    
-                    return response_text
-                else:
-                    raise ValueError("Model did not return expected content structure. Response has no content parts.")
-            else:
-                raise ValueError("No candidates in response. The API may have encountered an error.")
-        
-        except Exception as e:
-            error_str = str(e)
-            if (
-                "not found" in error_str.lower() or
-                "not supported" in error_str.lower() or
-                "404" in error_str or
-                "quota" in error_str.lower() or
-                "rate limit" in error_str.lower() or
-                "429" in error_str or
-                "Response blocked" in error_str
-            ):
-                print(f"Model {current_model_name} failed: {error_str}")
-                last_error = e
-                continue
-            raise
-    
-    # If we tried all models and none worked, raise the last error
-    if last_error:
-        return build_offline_presentation(text, slide_count)
+                if attempt < LLM_MAX_RETRIES:
+                    delay = min(backoff_delay(attempt), max(0.0, deadline - time.monotonic()))
+                    time.sleep(delay)
 
+    # If we tried all models and none worked, fall back to the local generator
+    record_fallback("all_models_failed")
+    return None
+
+
+@timed_stage("get_presentation")
+def get_presentation(text, slide_count=6, model_name='gemini-pro', include_visuals=False, hedge=None):
+    """
+    Generate the slides JSON for a document.
+    Returns (response text, used_fallback); used_fallback is True when no model
+    answered and the offline extractive deck was built instead.
+    """
+    text = _truncate_for_prompt(text)
+    prompt = build_prompt(text, slide_count, include_visuals)
+    logger.info("Prompt built", extra={"prompt_chars": len(prompt), "text_chars": len(text)})
 
+    response_text = _call_models(prompt, model_name, hedge)
+    if response_text is None:
+        return build_offline_presentation(text, slide_count), True
+    return response_text, False
+
+
+@timed_stage("regenerate_slide")
+def regenerate_slide(slide, context_chunks, deck_title="", instructions=None, model_name='gemini-pro', hedge=None):
+    """
+    Rewrite one main slide from retrieved source chunks.
+    Returns (response text, prompt) so callers can report the prompt size.
+    """
+    prompt = build_slide_prompt(slide, context_chunks, deck_title, instructions)
+    logger.info("Slide prompt built", extra={"prompt_chars": len(prompt), "chunks": len(context_chunks)})
+
+    response_text = _call_models(prompt, model_name, hedge, max_output_tokens=1024)
+    if response_text is None:
+        return build_offline_slide(slide, context_chunks), prompt
+    return response_text, prompt
+
+
+@timed_stage("generate_image_hf")
 def generate_image_hf(prompt, output_path):
     hf_key = os.getenv("HF_API_KEY")
     if not hf_key:
         # Graceful no-op when no HF key is set; caller may insert fallback text
         return None
+    from huggingface_hub import InferenceClient
+
     client = InferenceClient(
         provider="hf-inference",
         api_key=hf_key
@@ -372,7 +688,7 @@ def generate_image_hf(prompt, output_path):
     # This returns a PIL.Image object
     image = client.text_to_image(
         prompt,
-        model="stabilityai/stable-diffusion-3-medium-diffusers",
+        model=HF_INFERENCE_ENDPOINT or HF_IMAGE_MODEL,
     )
 
     # Save PIL image to file
@@ -0,0 +1,177 @@
+"""
+Resilience helpers for provider calls.
+Jittered exponential backoff, per-model circuit breakers shared across
+requests, and latency statistics for hedged requests.
+"""
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Dict, List
+
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "3"))
+BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "60"))
+# Models that return 404 / "not supported" stay disabled for much longer
+BREAKER_NOT_FOUND_SECONDS = float(os.getenv("BREAKER_NOT_FOUND_SECONDS", "3600"))
+
+BACKOFF_BASE_SECONDS = float(os.getenv("BACKOFF_BASE_SECONDS", "0.5"))
+BACKOFF_MAX_SECONDS = float(os.getenv("BACKOFF_MAX_SECONDS", "8"))
+
+
+def backoff_delay(attempt: int, base: float = None, cap: float = None) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2**attempt)]."""
+    base = BACKOFF_BASE_SECONDS if base is None else base
+    cap = BACKOFF_MAX_SECONDS if cap is None else cap
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    closed    -> calls allowed; failures are counted
+    open      -> calls rejected until the reset timeout has passed
+    half-open -> one probe call allowed; success closes, failure re-opens
+    """
+
+    def __init__(self, name: str, failure_threshold: int = None, reset_seconds: float = None):
+        self.name = name
+        self.failure_threshold = failure_threshold or BREAKER_FAILURE_THRESHOLD
+        self.reset_seconds = reset_seconds or BREAKER_RESET_SECONDS
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._open_for = self.reset_seconds
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self._open_for:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        """Return True if a call may be made now (claims the probe slot when half-open)."""
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def is_available(self) -> bool:
+        """Like allow(), but without claiming the half-open probe slot."""
+        with self._lock:
+            state = self._state()
+            return state == "closed" or (state == "half-open" and not self._probe_in_flight)
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probe_in_flight = False
+
+    def record_failure(self, open_for: float = None):
+        """Count a failure; open the breaker at the threshold or when open_for is given."""
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if open_for is not None or self._failures >= self.failure_threshold or self._opened_at is not None:
+                self._opened_at = time.monotonic()
+                self._open_for = open_for or self.reset_seconds
+
+    def release(self):
+        """End a call without a verdict (cut short by the caller), freeing the half-open probe slot."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {"name": self.name, "state": self._state(), "failures": self._failures}
+
+
+_breakers_lock = threading.Lock()
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Return the process-wide breaker for a model, creating it on first use."""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(name)
+        return breaker
+
+
+def available_models(names: List[str]) -> List[str]:
+    """Filter model names down to those whose breaker currently lets calls through."""
+    return [name for name in names if get_breaker(name).is_available()]
+
+
+def breaker_states() -> List[Dict]:
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return [b.snapshot() for b in breakers]
+
+
+class HedgeStats:
+    """
+    Latency samples of successful model calls plus hedging counters.
+    The hedge delay is a percentile of recent latencies.
+    """
+
+    def __init__(self, percentile: float, default_delay: float, min_samples: int = 20, window: int = 200):
+        self.percentile = percentile
+        self.default_delay = default_delay
+        self.min_samples = min_samples
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.primary_wins_after_hedge = 0
+
+    def observe_latency(self, seconds: float):
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def hedge_delay(self) -> float:
+        with self._lock:
+            samples = sorted(self._latencies)
+        if len(samples) < self.min_samples:
+            return self.default_delay
+        index = min(len(samples) - 1, int(len(samples) * self.percentile / 100.0))
+        return samples[index]
+
+    def record(self, hedged: bool, hedge_won: bool = False):
+        with self._lock:
+            self.calls += 1
+            if hedged:
+                self.hedged += 1
+                if hedge_won:
+                    self.hedge_wins += 1
+                else:
+                    self.primary_wins_after_hedge += 1
+
+    def snapshot(self) -> Dict:
+        delay = self.hedge_delay()
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "hedged": self.hedged,
+                "hedge_rate": self.hedged / self.calls if self.calls else 0.0,
+                "hedge_wins": self.hedge_wins,
+                "primary_wins_after_hedge": self.primary_wins_after_hedge,
+                "hedge_win_rate": self.hedge_wins / self.hedged if self.hedged else 0.0,
+                "current_delay_seconds": round(delay, 3),
+                "latency_samples": len(self._latencies),
+            }
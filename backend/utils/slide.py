@@ -3,12 +3,18 @@ import json
 from pptx import Presentation
 from pptx.util import Inches, Pt
 from pptx.dml.color import RGBColor
-from googletrans import Translator
 from datetime import date
 
 
-from .chart import add_chart
-from .prompt import generate_image_hf
+from .chart import add_chart, safe_float_conversion
+from .assets import resolve_image_path, prepare_image
+from .slide_cache import slide_part_cache, PartNames
+from .metrics import timed_stage
+from .logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+EMU_PER_INCH = 914400
 
 
 
@@ -71,7 +77,7 @@ def add_intro_slide(prs, slide):
                     run_content.font.bold = False
 
                 else:
-                    print("Summary data is missing or empty.")
+                    logger.warning("Summary data is missing or empty")
 
             elif text == "Məqsəd":
 
@@ -101,28 +107,9 @@ def add_intro_slide(prs, slide):
 
 
                 else:
-                    print("Aim data is missing or empty.")
+                    logger.warning("Aim data is missing or empty")
         else:
-            print("    Does not have a text frame.")
-
-
-def safe_float_conversion(values):
-    result = []
-    for v in values:
-        try:
-            if isinstance(v, str):
-                v = v.strip()
-                # Handle percentages
-                if v.endswith('%'):
-                    result.append(float(v[:-1]))
-                    continue
-                # Handle "Vmax" or other common non-numeric placeholders by treating as 0 or skipping
-                # For now, 0.0 is safer to keep alignment with X axis
-            result.append(float(v))
-        except (ValueError, TypeError):
-            print(f"Warning: Could not convert '{v}' to float. Using 0.0 instead.")
-            result.append(0.0)
-    return result
+            logger.debug("Intro shape does not have a text frame", extra={"sample_every": 20})
 
 
 def add_main_slide(prs, slide):
@@ -170,21 +157,22 @@ def add_main_slide(prs, slide):
             add_chart(visual_s, visual["type"], visual["title"],
                       labels=visual['labels'], sizes=sizes)
         elif visual["type"] == "image":
-            try:
-                image_path = f"generated_image_{visual['title'][:10].replace(' ', '_')}.png"
-                translator = Translator()
-                translated = translator.translate(visual["description"], src='az', dest='en')
-                english_description = translated.text
-                generate_image_hf(english_description, image_path)
-
+            # Images are resolved by prefetch_visual_assets before export;
+            # only already-stored assets are embedded here.
+            image_path = resolve_image_path(visual)
+            if image_path:
                 try:
-                    placeholder = visual_s.placeholders[1]
-                    left, top, width, height = placeholder.left, placeholder.top, placeholder.width, placeholder.height
-                except IndexError:
-                    left, top, width, height = Inches(1), Inches(2), Inches(8), Inches(4)
-
-                visual_s.shapes.add_picture(image_path, left, top, width=width, height=height)
-            except Exception as e:
+                    try:
+                        placeholder = visual_s.placeholders[1]
+                        left, top, width, height = placeholder.left, placeholder.top, placeholder.width, placeholder.height
+                    except IndexError:
+                        left, top, width, height = Inches(1), Inches(2), Inches(8), Inches(4)
+
+                    image_path = prepare_image(image_path, width / EMU_PER_INCH, height / EMU_PER_INCH)
+                    visual_s.shapes.add_picture(image_path, left, top, width=width, height=height)
+                except Exception as e:
+                    insert_text_or_fallback(visual_s, f"[Şəkil təsviri: {visual.get('description','')}]")
+            else:
                 insert_text_or_fallback(visual_s, f"[Şəkil təsviri: {visual.get('description','')}]")
         else:
             insert_text_or_fallback(visual_s, f"[Vizual növü '{visual['type']}' hələ dəstəklənmir]")
@@ -235,9 +223,9 @@ def add_recommendation_slide(prs, slide):
                 p.font.color.rgb = RGBColor(0, 0, 0)
                 p.font.size = Pt(21)
 
-                print(f"Added recommendation{i}: {rec}")
+                logger.debug("Added recommendation%d", i, extra={"sample_every": 10})
             else:
-                print(f"No data for recommendation{i}.")
+                logger.debug("No data for recommendation%d", i, extra={"sample_every": 10})
 
 
 def delete_slide(prs, slide_index):
@@ -245,12 +233,15 @@ def delete_slide(prs, slide_index):
     prs.slides._sldIdLst.remove(slide_id)
 
 
+@timed_stage("generate_pptx")
 def generate_pptx(slides, output_filename="presentation.pptx"):
     # Get the directory where this script is located
     import os
     template_dir = os.path.dirname(os.path.abspath(__file__))
     template_path = os.path.join(template_dir, "..", "format_new.pptx")
     prs = Presentation(template_path)
+    names = PartNames(prs.part.package)
+    reused = 0
 
     for slide in slides:
         t = slide.get('type')
@@ -259,17 +250,19 @@ def generate_pptx(slides, output_filename="presentation.pptx"):
         elif t == 'intro':
             add_intro_slide(prs, slide)
         elif t == 'main':
-            add_main_slide(prs, slide)
+            # Added slides are reused from the part cache when their content is unchanged
+            reused += slide_part_cache.render(prs, slide, add_main_slide, names)
         elif t == 'recommendation':
-            add_recommendation_slide(prs, slide)
+            reused += slide_part_cache.render(prs, slide, add_recommendation_slide, names)
 
     delete_slide(prs, 3)
     delete_slide(prs, 2)
 
     prs.save(output_filename)
-    print(f"Presentation saved as '{output_filename}'")
+    logger.info("Presentation saved as '%s'", output_filename, extra={"slides": len(slides), "reused_slides": reused})
 
 
+@timed_stage("parse_gpt_response")
 def parse_gpt_response(response_text):
     try:
         # Check if response is an error message
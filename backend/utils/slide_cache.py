@@ -0,0 +1,201 @@
+"""
+Per-slide part cache for PPTX export.
+After a slide is rendered, its slide XML, chart parts (chart XML plus the
+embedded workbook) and images are kept in memory, keyed by a hash of the
+slide content. The next export re-creates unchanged slides from those blobs
+instead of rebuilding shapes and charts, so only edited slides are rendered.
+"""
+import copy
+import hashlib
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+from pptx.opc.constants import CONTENT_TYPE as CT, RELATIONSHIP_TYPE as RT
+from pptx.opc.packuri import PackURI
+from pptx.oxml import parse_xml
+from pptx.oxml.ns import qn
+from pptx.opc.oxml import serialize_part_xml
+from pptx.parts.chart import ChartPart
+from pptx.parts.embeddedpackage import EmbeddedXlsxPart
+from pptx.parts.slide import SlidePart
+
+from .assets import resolve_image_path
+from .metrics import record_cache
+from .logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+PPTX_SLIDE_CACHE_SIZE = int(os.getenv("PPTX_SLIDE_CACHE_SIZE", "500"))
+
+# Relationship attributes that may point from slide XML to its related parts
+_REL_ATTRIBUTES = (qn("r:id"), qn("r:embed"), qn("r:link"))
+
+
+def slide_cache_key(slide: Dict) -> str:
+    visual = slide.get("visual") or {}
+    # The embedded picture depends on which asset file exists, not only on the slide JSON
+    image_path = resolve_image_path(visual) if visual.get("type") == "image" else None
+    payload = json.dumps([slide, image_path], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class PartNames:
+    """
+    Hands out unused partnames for one package. Walking the package once here
+    replaces python-pptx's per-part walk, which is quadratic in deck size.
+    """
+
+    def __init__(self, package):
+        self.used = {str(part.partname) for part in package.iter_parts()}
+        self._next = {}
+
+    def register(self, part):
+        """Record the names of a part rendered by python-pptx and of the parts it relates to."""
+        self.used.add(str(part.partname))
+        for rel in part.rels.values():
+            if not rel.is_external and str(rel.target_part.partname) not in self.used:
+                self.register(rel.target_part)
+
+    def allocate(self, template: str) -> PackURI:
+        n = self._next.get(template, 1)
+        while template % n in self.used:
+            n += 1
+        self._next[template] = n + 1
+        self.used.add(template % n)
+        return PackURI(template % n)
+
+
+def _capture(prs, slide) -> Optional[Dict]:
+    """Blobs needed to re-create a rendered slide, or None if it has parts this cache does not handle."""
+    slide_part = slide.part
+    rels = []
+    for rId, rel in slide_part.rels.items():
+        if rel.is_external:
+            return None
+        if rel.reltype == RT.SLIDE_LAYOUT:
+            continue
+        if rel.reltype == RT.CHART:
+            chart_part = rel.target_part
+            if len(chart_part.rels) != 1:
+                return None
+            element = copy.deepcopy(chart_part._element)
+            external_data = element.find(qn("c:externalData"))
+            if external_data is not None:
+                # Re-added with the new workbook's rId on restore
+                element.remove(external_data)
+            rels.append((rId, "chart", {
+                "xml": serialize_part_xml(element),
+                "xlsx": chart_part.chart_workbook.xlsx_part.blob,
+            }))
+        elif rel.reltype == RT.IMAGE:
+            rels.append((rId, "image", rel.target_part.blob))
+        else:
+            return None
+    return {
+        "layout": prs.slide_layouts.index(slide.slide_layout),
+        "xml": slide_part.blob,
+        "rels": rels,
+    }
+
+
+def _restore(prs, unit: Dict, names: PartNames):
+    """Append a slide re-created from captured blobs."""
+    package = prs.part.package
+    presentation_part = prs.part
+    slide_part = SlidePart(
+        presentation_part._next_slide_partname, CT.PML_SLIDE, package, parse_xml(unit["xml"])
+    )
+    names.used.add(str(slide_part.partname))
+    slide_part.relate_to(prs.slide_layouts[unit["layout"]].part, RT.SLIDE_LAYOUT)
+
+    rid_map = {}
+    for old_rId, kind, payload in unit["rels"]:
+        if kind == "chart":
+            chart_part = ChartPart.load(
+                names.allocate(ChartPart.partname_template), CT.DML_CHART, package, payload["xml"]
+            )
+            chart_part.chart_workbook.xlsx_part = EmbeddedXlsxPart(
+                names.allocate(EmbeddedXlsxPart.partname_template),
+                EmbeddedXlsxPart.content_type, package, payload["xlsx"]
+            )
+            new_rId = slide_part.relate_to(chart_part, RT.CHART)
+        else:
+            image_part, new_rId = slide_part.get_or_add_image_part(io.BytesIO(payload))
+            names.used.add(str(image_part.partname))
+        rid_map[old_rId] = new_rId
+
+    if any(old != new for old, new in rid_map.items()):
+        for element in slide_part._element.iter():
+            for attribute in _REL_ATTRIBUTES:
+                value = element.get(attribute)
+                if value in rid_map:
+                    element.set(attribute, rid_map[value])
+
+    # The part is new, so skip relate_to()'s scan of every existing relationship
+    rId = presentation_part.rels._add_relationship(RT.SLIDE, slide_part)
+    prs.slides._sldIdLst.add_sldId(rId)
+
+
+class SlidePartCache:
+    """LRU of captured slide blobs shared by all exports in the process."""
+
+    def __init__(self, max_entries: int = PPTX_SLIDE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, List[Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key: str) -> Optional[List[Dict]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def _put(self, key: str, units: List[Dict]):
+        with self._lock:
+            self._entries[key] = units
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def render(self, prs, slide: Dict, render_fn: Callable, names: PartNames) -> bool:
+        """
+        Add the pptx slides for one deck slide, from cache when possible.
+        render_fn(prs, slide) draws it from scratch on a miss. Returns True on a hit.
+        """
+        if self.max_entries <= 0:
+            render_fn(prs, slide)
+            return False
+
+        key = slide_cache_key(slide)
+        units = self._get(key)
+        if units is not None:
+            record_cache("pptx_slide", hit=True)
+            for unit in units:
+                _restore(prs, unit, names)
+            return True
+
+        record_cache("pptx_slide", hit=False)
+        first = len(prs.slides)
+        render_fn(prs, slide)
+        captured = []
+        for index in range(first, len(prs.slides)):
+            rendered = prs.slides[index]
+            names.register(rendered.part)
+            captured.append(_capture(prs, rendered))
+        if all(unit is not None for unit in captured):
+            self._put(key, captured)
+        else:
+            logger.debug("Slide has parts that cannot be cached", extra={"sample_every": 10})
+        return False
+
+
+slide_part_cache = SlidePartCache()
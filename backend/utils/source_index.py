@@ -0,0 +1,162 @@
+"""
+Source text index for stored presentations.
+The cleaned document text is split into overlapping sentence chunks and
+indexed with BM25, so a single slide can be regenerated from the few chunks
+that match it instead of the whole document.
+"""
+import json
+import math
+import os
+import shutil
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from .storage import (
+    STORAGE_DIR, _sanitize_identifier, shard_path, find_sharded, register_sidecar_dir, presentation_lock
+)
+from .summarizer import split_sentences, tokenize
+from .logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+SOURCES_DIR = STORAGE_DIR / "sources"
+register_sidecar_dir(SOURCES_DIR, ".json")
+
+SOURCE_CHUNK_CHARS = int(os.getenv("SOURCE_CHUNK_CHARS", "1200"))
+# Sentences repeated at the start of the next chunk so ideas are not cut in half
+SOURCE_CHUNK_OVERLAP = 1
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+
+def chunk_text(text: str, chunk_chars: int = None) -> List[str]:
+    """Group consecutive sentences into chunks of about chunk_chars characters."""
+    chunk_chars = chunk_chars or SOURCE_CHUNK_CHARS
+    sentences = split_sentences(text)
+    chunks = []
+    current: List[str] = []
+    size = 0
+    for sentence in sentences:
+        if current and size + len(sentence) > chunk_chars:
+            chunks.append(" ".join(current))
+            current = current[-SOURCE_CHUNK_OVERLAP:] if SOURCE_CHUNK_OVERLAP else []
+            size = sum(len(s) + 1 for s in current)
+        current.append(sentence)
+        size += len(sentence) + 1
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def build_index(text: str) -> Dict:
+    """Chunks plus per-chunk term frequencies and document frequencies for BM25."""
+    chunks = chunk_text(text)
+    term_freqs = [dict(Counter(tokenize(chunk))) for chunk in chunks]
+    doc_freq = Counter()
+    for tf in term_freqs:
+        doc_freq.update(tf.keys())
+    lengths = [sum(tf.values()) for tf in term_freqs]
+    return {
+        "chunks": chunks,
+        "tf": term_freqs,
+        "df": dict(doc_freq),
+        "lengths": lengths,
+        "avg_length": (sum(lengths) / len(lengths)) if lengths else 0.0,
+        "text_chars": len(text),
+    }
+
+
+def _source_path(presentation_id: str):
+    safe_id = _sanitize_identifier(presentation_id)
+    return shard_path(SOURCES_DIR, f"{safe_id}.json", safe_id)
+
+
+def _find_source(presentation_id: str):
+    """Stored index in the sharded layout, or in the flat one it has not been migrated from."""
+    safe_id = _sanitize_identifier(presentation_id)
+    return find_sharded(SOURCES_DIR, f"{safe_id}.json", safe_id)
+
+
+def save_source_index(presentation_id: str, text: str) -> Dict:
+    """Index the source text of a presentation and store it next to the presentation."""
+    index = build_index(text)
+    index["presentation_id"] = presentation_id
+    index["created_at"] = datetime.now().isoformat()
+    file_path = _source_path(presentation_id)
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    # Under the presentation lock, like every per-presentation write, so the migration never races it
+    with presentation_lock(presentation_id):
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False)
+    logger.debug("Indexed source text", extra={"chunks": len(index["chunks"]), "text_chars": len(text)})
+    return index
+
+
+def load_source_index(presentation_id: str) -> Optional[Dict]:
+    file_path = _find_source(presentation_id)
+    if file_path is None:
+        return None
+    with open(file_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def copy_source_index(presentation_id: str, new_id: str) -> bool:
+    source = _find_source(presentation_id)
+    if source is None:
+        return False
+    target = _source_path(new_id)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    with presentation_lock(new_id):
+        shutil.copyfile(source, target)
+    return True
+
+
+def delete_source_index(presentation_id: str) -> bool:
+    deleted = False
+    file_path = _source_path(presentation_id)
+    for path in (file_path, SOURCES_DIR / file_path.name):
+        if path.exists():
+            path.unlink(missing_ok=True)
+            deleted = True
+    return deleted
+
+
+def search(index: Dict, query: str, top_k: int = 4) -> List[Tuple[int, float]]:
+    """Return (chunk number, BM25 score) of the best matching chunks, best first."""
+    terms = set(tokenize(query))
+    chunk_count = len(index["chunks"])
+    if not terms or not chunk_count:
+        return []
+
+    avg_length = index["avg_length"] or 1.0
+    idf = {}
+    for term in terms:
+        df = index["df"].get(term, 0)
+        if df:
+            idf[term] = math.log((chunk_count - df + 0.5) / (df + 0.5) + 1.0)
+
+    scores = []
+    for number, tf in enumerate(index["tf"]):
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * index["lengths"][number] / avg_length)
+        score = 0.0
+        for term, weight in idf.items():
+            freq = tf.get(term)
+            if freq:
+                score += weight * freq * (BM25_K1 + 1) / (freq + norm)
+        if score > 0:
+            scores.append((number, score))
+
+    scores.sort(key=lambda item: item[1], reverse=True)
+    return scores[:top_k]
+
+
+def slide_query(slide: Dict) -> str:
+    """Text of a slide used as the retrieval query."""
+    parts = [slide.get("title", ""), slide.get("aim", ""), slide.get("summary", "")]
+    parts += [slide.get(f"point{i}", "") for i in range(1, 5)]
+    parts += [slide.get(f"recommendation{i}", "") for i in range(1, 6)]
+    visual = slide.get("visual") or {}
+    parts += [visual.get("title", ""), visual.get("description", "")]
+    return " ".join(p for p in parts if isinstance(p, str) and p)
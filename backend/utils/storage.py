@@ -2,15 +2,38 @@
 Storage system for managing presentations.
 Uses JSON files to store presentation data.
 """
+import hashlib
 import json
+import os
 import uuid
 import re
+import threading
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
-STORAGE_DIR = Path("presentations_storage")
-STORAGE_DIR.mkdir(exist_ok=True)
+try:
+    import fcntl
+except ImportError:  # Windows: only the in-process lock applies
+    fcntl = None
+
+from .metrics import timed_stage
+from .patches import diff_slides
+from .logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+# Created on first write rather than at import time
+STORAGE_DIR = Path(os.getenv("STORAGE_DIR", "presentations_storage"))
+# Per-presentation JSON-lines log of the patch behind each version
+CHANGES_DIR = STORAGE_DIR / "changes"
+CHANGE_LOG_LIMIT = int(os.getenv("CHANGE_LOG_LIMIT", "200"))
+# Lock files shared by all API workers; ids are hashed onto a fixed set of them
+LOCKS_DIR = STORAGE_DIR / "locks"
+_LOCK_STRIPES = 256
+# Move presentations from the old flat layout into shard directories in the background at startup
+STORAGE_MIGRATE_ON_STARTUP = os.getenv("STORAGE_MIGRATE_ON_STARTUP", "true").lower() in ("1", "true", "yes")
 
 
 def generate_presentation_id() -> str:
@@ -42,6 +65,149 @@ def _sanitize_identifier(identifier: str) -> str:
     return candidate
 
 
+def shard_path(base_dir: Path, name: str, key: str) -> Path:
+    """
+    Sharded location <base_dir>/<ab>/<cd>/<name>, where abcd starts a hash of key
+    (the presentation id for per-presentation files), so custom ids spread as evenly
+    as UUIDs and no directory grows too large.
+    """
+    digest = hashlib.md5(key.encode("utf-8")).hexdigest()
+    return base_dir / digest[:2] / digest[2:4] / name
+
+
+def find_sharded(base_dir: Path, name: str, key: str) -> Optional[Path]:
+    """Existing file in the sharded layout, else in the old flat layout, else None."""
+    path = shard_path(base_dir, name, key)
+    if path.exists():
+        return path
+    flat = base_dir / name
+    if flat.exists():
+        return flat
+    # The migration may have moved the file between the two checks
+    return path if path.exists() else None
+
+
+def move_to_shard(flat: Path, target: Path, key: str) -> bool:
+    """
+    Move a flat-layout file to its sharded location without ever overwriting a
+    newer sharded copy: it is hard-linked into place and then unlinked.
+    key is the presentation id the file belongs to. Returns False if the flat
+    file was already gone.
+    """
+    target.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.link(flat, target)
+    except FileExistsError:
+        pass  # Already written in the sharded layout; the flat file is outdated
+    except FileNotFoundError:
+        return False  # Deleted or migrated meanwhile
+    except OSError:
+        # No hard links on this filesystem: move it unless a newer copy is already there.
+        # Writes hold the presentation lock, so none can land between the check and the move
+        with presentation_lock(key):
+            if not target.exists():
+                try:
+                    os.replace(flat, target)
+                except FileNotFoundError:
+                    return False
+                return True
+    flat.unlink(missing_ok=True)
+    return True
+
+
+# Per-presentation sidecar directories (files named <id><suffix>) moved by migrate_flat_layout
+_SIDECAR_DIRS: List[Tuple[Path, str]] = [(CHANGES_DIR, ".jsonl")]
+
+
+def register_sidecar_dir(directory: Path, suffix: str):
+    """Have migrate_flat_layout also shard a module's per-presentation files."""
+    _SIDECAR_DIRS.append((directory, suffix))
+
+
+def _presentation_path(safe_id: str) -> Path:
+    """Sharded location of a presentation: <ab>/<cd>/<id>.json."""
+    return shard_path(STORAGE_DIR, f"{safe_id}.json", safe_id)
+
+
+def _legacy_path(safe_id: str) -> Path:
+    """Location in the old flat layout, still read until the file is migrated."""
+    return STORAGE_DIR / f"{safe_id}.json"
+
+
+def _find_presentation(safe_id: str) -> Optional[Path]:
+    return find_sharded(STORAGE_DIR, f"{safe_id}.json", safe_id)
+
+
+class VersionConflict(ValueError):
+    """The presentation is not at the version the caller based its change on."""
+
+    def __init__(self, version: int, expected: int):
+        super().__init__(f"Presentation is at version {version}, not {expected}")
+        self.version = version
+        self.expected = expected
+
+
+class FileLock:
+    """
+    Reentrant lock shared across processes: a thread lock for this process
+    plus an flock on a lock file for the other workers.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._file = None
+
+    def __enter__(self):
+        self._lock.acquire()
+        if self._depth == 0 and fcntl is not None:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = open(self.path, "a")
+                fcntl.flock(self._file, fcntl.LOCK_EX)
+            except BaseException:
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                self._lock.release()
+                raise
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc):
+        self._depth -= 1
+        if self._depth == 0 and self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+        self._lock.release()
+
+
+# One lock per stripe of presentation ids
+_stripe_locks = [FileLock(LOCKS_DIR / f"{i:02x}.lock") for i in range(_LOCK_STRIPES)]
+
+
+@contextmanager
+def presentation_lock(presentation_id: str):
+    """
+    Hold the write lock of a presentation. Reads need no lock (files are replaced
+    atomically); wrap a load-modify-update sequence in it so no update is lost.
+    """
+    digest = hashlib.md5(_sanitize_identifier(presentation_id).encode("utf-8")).digest()
+    with _stripe_locks[digest[0] % _LOCK_STRIPES]:
+        yield
+
+
+def _write_json(file_path: Path, data: Dict):
+    """Write through a temp file so readers never see a partially written presentation."""
+    tmp_path = file_path.with_suffix(f".{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, file_path)
+
+
+@timed_stage("save_presentation")
 def save_presentation(presentation_id: str, slides: List[Dict], metadata: Optional[Dict] = None) -> Dict:
     """Save presentation data to storage."""
     if metadata is None:
@@ -50,6 +216,7 @@ def save_presentation(presentation_id: str, slides: List[Dict], metadata: Option
     
     presentation_data = {
         "id": safe_id,
+        "version": 1,
         "slides": slides,
         "metadata": {
             "created_at": datetime.now().isoformat(),
@@ -58,72 +225,206 @@ def save_presentation(presentation_id: str, slides: List[Dict], metadata: Option
         }
     }
     
-    file_path = STORAGE_DIR / f"{safe_id}.json"
-    with open(file_path, 'w', encoding='utf-8') as f:
-        json.dump(presentation_data, f, ensure_ascii=False, indent=2)
+    file_path = _presentation_path(safe_id)
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    with presentation_lock(safe_id):
+        _write_json(file_path, presentation_data)
+        # Saving over an id that still has a flat-layout file replaces it
+        _legacy_path(safe_id).unlink(missing_ok=True)
     
     return presentation_data
 
 
 def load_presentation(presentation_id: str) -> Optional[Dict]:
     """Load presentation data from storage."""
+    file_path = _find_presentation(_sanitize_identifier(presentation_id))
+    if file_path is None:
+        return None
+    return _read_presentation(file_path)
+
+
+def _read_presentation(file_path: Path) -> Optional[Dict]:
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        if file_path.parent != STORAGE_DIR:
+            return None
+    # A flat-layout file moved by the migration after it was found
+    try:
+        with open(_presentation_path(file_path.stem), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _changes_path(safe_id: str) -> Path:
+    return shard_path(CHANGES_DIR, f"{safe_id}.jsonl", safe_id)
+
+
+def _append_change(safe_id: str, version: int, patch: List[Dict]):
+    file_path = _changes_path(safe_id)
+    # Called under the presentation lock; a log still in the flat layout is moved before appending
+    if not move_to_shard(CHANGES_DIR / file_path.name, file_path, safe_id):
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(file_path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps({"version": version, "patch": patch, "at": datetime.now().isoformat()}, ensure_ascii=False) + "\n")
+
+    # Compact every CHANGE_LOG_LIMIT versions instead of reading the log on each write
+    if version % CHANGE_LOG_LIMIT == 0:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            lines = f.readlines()[-CHANGE_LOG_LIMIT:]
+        tmp_path = file_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.writelines(lines)
+        os.replace(tmp_path, file_path)
+
+
+def load_changes(presentation_id: str, since: int, until: int) -> Optional[List[Dict]]:
+    """
+    Change entries ({"version", "patch", "at"}) for versions since+1 .. until, oldest first.
+    Returns None when the log does not hold each of those versions exactly once and
+    in order (it was compacted, or written by an older server without the write lock).
+    """
     safe_id = _sanitize_identifier(presentation_id)
-    file_path = STORAGE_DIR / f"{safe_id}.json"
-    
-    if not file_path.exists():
+    file_path = find_sharded(CHANGES_DIR, f"{safe_id}.jsonl", safe_id)
+    if file_path is None:
         return None
-    
+    changes = []
     with open(file_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+        for line in f:
+            entry = json.loads(line)
+            if since < entry["version"] <= until:
+                changes.append(entry)
+    if len(changes) != until - since or \
+            any(entry["version"] != since + n for n, entry in enumerate(changes, start=1)):
+        return None
+    return changes
 
 
-def update_presentation(presentation_id: str, slides: List[Dict], metadata: Optional[Dict] = None) -> Optional[Dict]:
-    """Update existing presentation."""
+def update_presentation(presentation_id: str, slides: List[Dict], metadata: Optional[Dict] = None,
+                        patch: Optional[List[Dict]] = None, expected_version: Optional[int] = None) -> Optional[Dict]:
+    """
+    Update existing presentation and bump its version.
+    `patch` describes the change for the change log; it is computed from the old slides when omitted.
+    With `expected_version`, raises VersionConflict unless the stored version still matches.
+    The version bump, the write and the change log entry happen under the presentation lock.
+    """
     safe_id = _sanitize_identifier(presentation_id)
+    with presentation_lock(safe_id):
+        return _update_locked(safe_id, slides, metadata, patch, expected_version)
+
+
+def _update_locked(safe_id: str, slides: List[Dict], metadata: Optional[Dict],
+                   patch: Optional[List[Dict]], expected_version: Optional[int]) -> Optional[Dict]:
     existing = load_presentation(safe_id)
     if existing is None:
         return None
+    if expected_version is not None and existing.get("version", 0) != expected_version:
+        raise VersionConflict(existing.get("version", 0), expected_version)
     
     if metadata is None:
         metadata = {}
     
+    if patch is None:
+        patch = diff_slides(existing["slides"], slides)
     existing["slides"] = slides
+    existing["version"] = existing.get("version", 0) + 1
     existing["metadata"]["updated_at"] = datetime.now().isoformat()
     existing["metadata"].update(metadata)
     
-    file_path = STORAGE_DIR / f"{safe_id}.json"
-    with open(file_path, 'w', encoding='utf-8') as f:
-        json.dump(existing, f, ensure_ascii=False, indent=2)
+    # Updates always write the sharded layout, which migrates a flat-layout file
+    file_path = _presentation_path(safe_id)
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    _write_json(file_path, existing)
+    _legacy_path(safe_id).unlink(missing_ok=True)
+    _append_change(safe_id, existing["version"], patch)
     
     return existing
 
 
+def copy_presentation(presentation_id: str, new_id: str, metadata: Optional[Dict] = None) -> Optional[Dict]:
+    """Store a copy of an existing presentation under a new ID."""
+    existing = load_presentation(presentation_id)
+    if existing is None:
+        return None
+    copied = {k: v for k, v in existing.get("metadata", {}).items() if k not in ("created_at", "updated_at")}
+    return save_presentation(new_id, existing["slides"], metadata={
+        **copied,
+        "copied_from": existing["id"],
+        **(metadata or {})
+    })
+
+
 def delete_presentation(presentation_id: str) -> bool:
     """Delete presentation from storage."""
     safe_id = _sanitize_identifier(presentation_id)
-    file_path = STORAGE_DIR / f"{safe_id}.json"
-    
-    if file_path.exists():
-        file_path.unlink()
-        return True
-    return False
+    deleted = False
+    with presentation_lock(safe_id):
+        for file_path in (_presentation_path(safe_id), _legacy_path(safe_id)):
+            if file_path.exists():
+                file_path.unlink(missing_ok=True)
+                deleted = True
+        
+        if deleted:
+            _changes_path(safe_id).unlink(missing_ok=True)
+            (CHANGES_DIR / f"{safe_id}.jsonl").unlink(missing_ok=True)
+    return deleted
+
+
+def _presentation_files():
+    """Presentation files in both layouts; sharded files first."""
+    yield from STORAGE_DIR.glob("[0-9a-f][0-9a-f]/[0-9a-f][0-9a-f]/*.json")
+    yield from STORAGE_DIR.glob("*.json")
+
+
+def migrate_flat_layout(limit: Optional[int] = None) -> int:
+    """
+    Move presentations and their per-presentation sidecar files from the flat
+    layout into shard directories. Safe to run while serving (see move_to_shard).
+    `limit` caps the number of presentations moved. Returns the number of files moved.
+    """
+    moved = 0
+    for legacy in STORAGE_DIR.glob("*.json"):
+        if limit is not None and moved >= limit:
+            break
+        if move_to_shard(legacy, _presentation_path(legacy.stem), legacy.stem):
+            moved += 1
+    presentations_moved = moved
+
+    if limit is None or moved < limit:
+        for directory, suffix in _SIDECAR_DIRS:
+            for flat in directory.glob(f"*{suffix}"):
+                key = flat.name[:-len(suffix)]
+                if move_to_shard(flat, shard_path(directory, flat.name, key), key):
+                    moved += 1
+    if moved:
+        logger.info("Migrated files to the sharded layout",
+                    extra={"moved": moved, "presentations": presentations_moved})
+    return moved
 
 
 def list_presentations() -> List[Dict]:
     """List all presentations."""
     presentations = []
+    seen = set()
     
-    for file_path in STORAGE_DIR.glob("*.json"):
+    for file_path in _presentation_files():
+        # During migration a presentation can briefly exist in both layouts
+        if file_path.stem in seen:
+            continue
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                presentations.append({
-                    "id": data["id"],
-                    "metadata": data.get("metadata", {}),
-                    "slide_count": len(data.get("slides", []))
-                })
+            data = _read_presentation(file_path)
+            if data is None:
+                continue
+            seen.add(file_path.stem)
+            presentations.append({
+                "id": data["id"],
+                "metadata": data.get("metadata", {}),
+                "slide_count": len(data.get("slides", []))
+            })
         except Exception as e:
-            print(f"Error loading {file_path}: {e}")
+            logger.warning("Error loading %s: %s", file_path, e)
     
     return sorted(presentations, key=lambda x: x["metadata"].get("created_at", ""), reverse=True)
 
@@ -0,0 +1,156 @@
+"""
+Extractive summarizer used as the offline presentation engine.
+Scores sentences with TF-IDF against their section centroid (NumPy, no model calls).
+"""
+import re
+from typing import Dict, List
+
+_SENTENCE_END = ('.', '!', '?', '…')
+_SENTENCE_SPLIT = re.compile(r'(?<=[.!?…])\s+')
+_WORD = re.compile(r"[^\W\d_]{3,}", re.UNICODE)
+
+STOPWORDS = frozenset("""
+və ilə üçün bu bir da də ki olan olaraq isə həm ya yaxud amma lakin çünki görə qədər kimi sonra əvvəl
+daha çox az hər bütün bəzi belə elə onun onlar bizim sizin mən sən biz siz həmin artıq hələ yalnız
+edir edilir olunur olub olur etmək olmaq edilən olunan vardır var yox deyil kimə nədir necə harada
+the and for with that this from are was were has have had not but which their there they them into
+about also been more most such than then these those will would can could should its our your his her
+""".split())
+
+RECOMMENDATION_CUES = ("tövsiyə", "lazımdır", "vacibdir", "məqsədəuyğun", "should", "recommend", "must", "need to")
+
+
+def _join_wrapped_lines(text: str) -> List[str]:
+    """
+    Rebuild blocks from extracted lines. A line runs on into the next one only when
+    it does not end a sentence and the next starts in lowercase (a PDF line wrap);
+    headings, bullets and DOCX paragraphs stay separate blocks.
+    """
+    blocks = []
+    current = []
+    # splitlines also breaks at the form feeds between pages
+    for line in text.splitlines():
+        line = " ".join(line.split())
+        if current and (not line or current[-1].endswith(_SENTENCE_END) or not line[0].islower()):
+            blocks.append(" ".join(current))
+            current = []
+        if line:
+            current.append(line)
+    if current:
+        blocks.append(" ".join(current))
+    return blocks
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into trimmed sentences, dropping fragments that are too short to be useful."""
+    sentences = []
+    for block in _join_wrapped_lines(text):
+        for raw in _SENTENCE_SPLIT.split(block):
+            if len(raw) >= 20:
+                sentences.append(raw)
+    return sentences
+
+
+def tokenize(sentence: str) -> List[str]:
+    return [w for w in (m.lower() for m in _WORD.findall(sentence)) if w not in STOPWORDS]
+
+
+def summarize_sections(text: str, section_count: int, points_per_section: int = 4, title_terms: int = 3) -> Dict:
+    """
+    Split text into contiguous sections and pick the most representative sentences of each.
+
+    Returns a dict with:
+        sentences: all sentences in document order
+        sections: list of {"title": str, "points": [str, ...]} (one per requested section)
+        summary: top-scoring sentences of the whole document, in document order
+        scores: np.ndarray of per-sentence scores
+    """
+    import numpy as np
+
+    sentences = split_sentences(text)
+    section_count = max(section_count, 1)
+    if not sentences:
+        return {"sentences": [], "sections": [{"title": "", "points": []} for _ in range(section_count)],
+                "summary": [], "scores": np.zeros(0)}
+
+    # Sparse (sentence, term) occurrence lists
+    vocab: Dict[str, int] = {}
+    sent_ids: List[int] = []
+    term_ids: List[int] = []
+    for s_idx, sentence in enumerate(sentences):
+        for token in tokenize(sentence):
+            term_ids.append(vocab.setdefault(token, len(vocab)))
+            sent_ids.append(s_idx)
+
+    n_sent = len(sentences)
+    n_terms = max(len(vocab), 1)
+    sent_arr = np.asarray(sent_ids, dtype=np.int64)
+    term_arr = np.asarray(term_ids, dtype=np.int64)
+
+    # Contiguous sections of roughly equal sentence count
+    section_of_sentence = (np.arange(n_sent) * section_count) // n_sent
+
+    # Term frequency per (sentence, term) pair and document frequency per term
+    pair_keys, tf = np.unique(sent_arr * n_terms + term_arr, return_counts=True)
+    pair_sent = pair_keys // n_terms
+    pair_term = pair_keys % n_terms
+    df = np.bincount(pair_term, minlength=n_terms)
+    idf = np.log((1 + n_sent) / (1 + df)) + 1.0
+    weights = (1 + np.log(tf)) * idf[pair_term]
+
+    # Per-sentence L2 norm, then section centroids of the normalised vectors
+    norms = np.sqrt(np.bincount(pair_sent, weights=weights ** 2, minlength=n_sent))
+    norms[norms == 0] = 1.0
+    unit = weights / norms[pair_sent]
+    pair_section = section_of_sentence[pair_sent]
+    centroids = np.bincount(
+        pair_section * n_terms + pair_term, weights=unit, minlength=section_count * n_terms
+    ).reshape(section_count, n_terms)
+
+    # Cosine-like relevance of each sentence to its own section
+    scores = np.bincount(pair_sent, weights=unit * centroids[pair_section, pair_term], minlength=n_sent)
+
+    inverse_vocab = np.empty(n_terms, dtype=object)
+    for token, idx in vocab.items():
+        inverse_vocab[idx] = token
+
+    sections = []
+    for sec in range(section_count):
+        members = np.flatnonzero(section_of_sentence == sec)
+        if members.size:
+            top = members[np.argsort(-scores[members], kind="stable")[:points_per_section]]
+            points = [sentences[i] for i in np.sort(top)]
+        else:
+            points = []
+
+        top_terms = np.argsort(-centroids[sec], kind="stable")[:title_terms] if len(vocab) else []
+        terms = [inverse_vocab[t] for t in top_terms if centroids[sec, t] > 0]
+        sections.append({"title": _format_title(terms), "points": points})
+
+    global_top = np.sort(np.argsort(-scores, kind="stable")[:3])
+    return {
+        "sentences": sentences,
+        "sections": sections,
+        "summary": [sentences[i] for i in global_top],
+        "scores": scores,
+    }
+
+
+def _format_title(terms: List[str]) -> str:
+    if not terms:
+        return ""
+    if len(terms) == 1:
+        return terms[0].capitalize()
+    return f"{', '.join(terms[:-1]).capitalize()} və {terms[-1]}"
+
+
+def find_recommendations(sentences: List[str], limit: int = 5) -> List[str]:
+    """Sentences that read like advice or next steps, in document order."""
+    found = []
+    for sentence in sentences:
+        lowered = sentence.lower()
+        if any(cue in lowered for cue in RECOMMENDATION_CUES):
+            found.append(sentence)
+            if len(found) >= limit:
+                break
+    return found
@@ -0,0 +1,138 @@
+"""
+Prompt-size reduction for extracted document text.
+Removes page furniture (repeated headers/footers, page numbers), fixes
+hyphenation and whitespace, drops boilerplate and trims to a token budget.
+"""
+import os
+import re
+from collections import Counter
+from typing import Dict, List, Tuple
+
+# Rough estimate used across the project: 1 token ≈ 4 characters
+CHARS_PER_TOKEN = 4
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "125000"))
+
+# Lines within this distance from the top/bottom of a page are header/footer candidates
+_EDGE_LINES = 3
+_MAX_FURNITURE_LENGTH = 120
+
+_PAGE_NUMBER = re.compile(
+    r"^(?:-\s*)?(?:page|səhifə|səh\.?|стр\.?)?\s*\d{1,4}(?:\s*(?:/|of|-|из)\s*\d{1,4})?(?:\s*-)?$",
+    re.IGNORECASE,
+)
+# Only checked on header/footer lines: in the body these can be real sentences
+_BOILERPLATE = [
+    re.compile(p, re.IGNORECASE) for p in (
+        r"^all rights reserved\.?$",
+        r"^bütün hüquqlar qorunur\.?$",
+        r"^(?:©|\(c\)|copyright)\s*\d{4}\b.{0,80}$",
+        r"^(?:confidential|məxfi)\.?$",
+    )
+]
+_TOC_LEADER = re.compile(r".*\.{4,}\s*\d+$")
+_HYPHEN_BREAK = re.compile(r"(\w)-\n(?=[a-zəğıöüçş])")
+_INLINE_SPACE = re.compile(r"[ \t ]+")
+_BLANK_LINES = re.compile(r"\n{3,}")
+_DIGITS = re.compile(r"\d+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate for budgeting (no tokenizer call)."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _line_key(line: str) -> str:
+    # Page headers often differ only by the page number
+    return _DIGITS.sub("#", line.strip().lower())
+
+
+def _edge_indices(lines: List[str]) -> set:
+    """Indices of the first/last few non-empty lines of a page."""
+    non_empty = [i for i, line in enumerate(lines) if line.strip()]
+    # Short pages: only their very first and last line can be furniture
+    edge = _EDGE_LINES if len(non_empty) > 4 * _EDGE_LINES else 1
+    return set(non_empty[:edge] + non_empty[-edge:])
+
+
+def _find_repeated_edge_lines(pages: List[List[str]]) -> set:
+    """Normalised header/footer lines that appear on a large share of pages."""
+    if len(pages) < 3:
+        return set()
+    counts = Counter()
+    for lines in pages:
+        counts.update({
+            _line_key(lines[i]) for i in _edge_indices(lines)
+            if len(lines[i].strip()) <= _MAX_FURNITURE_LENGTH
+        })
+    threshold = max(3, len(pages) // 2)
+    return {key for key, count in counts.items() if count >= threshold}
+
+
+def _trim_to_budget(text: str, max_chars: int) -> str:
+    truncated = text[:max_chars]
+    last_boundary = max(truncated.rfind('.'), truncated.rfind('\n'))
+    if last_boundary > max_chars * 0.9:
+        return truncated[:last_boundary + 1]
+    return truncated
+
+
+def reduce_prompt_text(text: str, token_budget: int = None) -> Tuple[str, Dict]:
+    """
+    Clean extracted text before it is put into the prompt.
+
+    Pages are expected to be separated by form feeds ('\\f'), as produced
+    by read_pdf. Returns the cleaned text and a stats dict describing how
+    many characters and estimated tokens were saved.
+    """
+    if token_budget is None:
+        token_budget = PROMPT_TOKEN_BUDGET
+
+    original_chars = len(text)
+    pages = [page.splitlines() for page in text.split("\f")]
+    repeated = _find_repeated_edge_lines(pages)
+
+    removed_repeated = 0
+    removed_boilerplate = 0
+    kept_pages = []
+    for lines in pages:
+        edges = _edge_indices(lines)
+        kept = []
+        for i, line in enumerate(lines):
+            stripped = line.strip()
+            if not stripped:
+                kept.append("")
+                continue
+            if i in edges and _line_key(stripped) in repeated:
+                removed_repeated += 1
+                continue
+            # A bare number or a "(c) ..." line inside the page is content, not page furniture
+            at_edge = i in edges and (
+                _PAGE_NUMBER.match(stripped) or any(p.match(stripped) for p in _BOILERPLATE)
+            )
+            if at_edge or _TOC_LEADER.match(stripped):
+                removed_boilerplate += 1
+                continue
+            kept.append(_INLINE_SPACE.sub(" ", stripped))
+        kept_pages.append("\n".join(kept))
+
+    cleaned = "\n".join(kept_pages)
+    cleaned = _HYPHEN_BREAK.sub(r"\1", cleaned)
+    cleaned = _BLANK_LINES.sub("\n\n", cleaned).strip()
+
+    truncated = False
+    max_chars = token_budget * CHARS_PER_TOKEN
+    if token_budget > 0 and len(cleaned) > max_chars:
+        cleaned = _trim_to_budget(cleaned, max_chars)
+        truncated = True
+
+    stats = {
+        "original_chars": original_chars,
+        "clean_chars": len(cleaned),
+        "chars_saved": original_chars - len(cleaned),
+        "estimated_tokens": estimate_tokens(cleaned),
+        "estimated_tokens_saved": estimate_tokens(text) - estimate_tokens(cleaned),
+        "repeated_lines_removed": removed_repeated,
+        "boilerplate_lines_removed": removed_boilerplate,
+        "truncated": truncated,
+    }
+    return cleaned, stats
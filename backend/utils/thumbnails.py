@@ -0,0 +1,296 @@
+"""
+Slide thumbnails rendered locally from slide JSON with Pillow.
+PNGs are cached by a hash of the slide content, so an edited slide gets a
+new thumbnail on its next request and unchanged slides are never redrawn.
+"""
+import hashlib
+import json
+import math
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+
+from .assets import resolve_image_path
+from .chart import safe_float_conversion
+from .storage import STORAGE_DIR, shard_path
+from .metrics import record_cache, timed_stage
+from .logging_setup import get_logger
+
+logger = get_logger(__name__)
+
+THUMBNAILS_DIR = STORAGE_DIR / "thumbnails"
+
+# 16:9 like the PPTX template; layout is designed at BASE_WIDTH and scaled
+THUMBNAIL_SIZES = {"small": (320, 180), "medium": (640, 360), "large": (1280, 720)}
+BASE_WIDTH = 1280
+# Bump when the drawing code changes so cached thumbnails are redrawn
+RENDER_VERSION = 1
+
+_FONT_CANDIDATES = [
+    os.getenv("PDF_FONT_PATH", ""),
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/TTF/DejaVuSans.ttf",
+    "/Library/Fonts/Arial Unicode.ttf",
+    "C:\\Windows\\Fonts\\arial.ttf",
+]
+
+ACCENT = (31, 56, 100)
+TEXT = (33, 33, 33)
+MUTED = (110, 110, 110)
+PALETTE = [(68, 114, 196), (237, 125, 49), (165, 165, 165), (255, 192, 0), (91, 155, 213), (112, 173, 71)]
+
+_font_lock = threading.Lock()
+_font_cache: Dict[Tuple[int, bool], ImageFont.ImageFont] = {}
+
+
+def _font(size: int, bold: bool = False):
+    key = (size, bold)
+    with _font_lock:
+        font = _font_cache.get(key)
+        if font is not None:
+            return font
+        for path in _FONT_CANDIDATES:
+            if bold and path:
+                bold_path = path.replace(".ttf", "-Bold.ttf")
+                path = bold_path if os.path.exists(bold_path) else path
+            if path and os.path.exists(path):
+                try:
+                    font = ImageFont.truetype(path, size)
+                    break
+                except OSError:
+                    continue
+        if font is None:
+            font = ImageFont.load_default()
+        _font_cache[key] = font
+        return font
+
+
+def _size(size_name: str) -> Tuple[int, int]:
+    if size_name not in THUMBNAIL_SIZES:
+        raise ValueError(f"Unknown thumbnail size '{size_name}'. Use one of: {', '.join(THUMBNAIL_SIZES)}")
+    return THUMBNAIL_SIZES[size_name]
+
+
+def slide_hash(slide: Dict) -> str:
+    """Hash of the slide content (and renderer version) used as the cache key."""
+    payload = json.dumps(slide, sort_keys=True, ensure_ascii=False) + f"|v{RENDER_VERSION}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:24]
+
+
+def _wrap(draw, text: str, font, width: int, max_lines: int) -> List[str]:
+    lines: List[str] = []
+    current = ""
+    for word in str(text or "").split():
+        candidate = f"{current} {word}".strip()
+        if current and draw.textlength(candidate, font=font) > width:
+            lines.append(current)
+            current = word
+        else:
+            current = candidate
+    if current:
+        lines.append(current)
+    if len(lines) > max_lines:
+        lines = lines[:max_lines]
+        lines[-1] = lines[-1].rstrip(".,;: ") + "…"
+    return lines
+
+
+def _text_block(draw, xy, text, font, width, max_lines, fill=TEXT, spacing=1.25) -> int:
+    """Draw wrapped text and return the y coordinate below it."""
+    x, y = xy
+    line_height = int(font.size * spacing) if hasattr(font, "size") else 14
+    for line in _wrap(draw, text, font, width, max_lines):
+        draw.text((x, y), line, font=font, fill=fill)
+        y += line_height
+    return y
+
+
+def _bullets(draw, items, box, s):
+    x, y, w, h = box
+    font = _font(int(26 * s))
+    bottom = y + h
+    for item in items:
+        if not item or y >= bottom:
+            continue
+        radius = int(5 * s)
+        cy = y + int(font.size * 0.6)
+        draw.ellipse((x, cy - radius, x + 2 * radius, cy + radius), fill=ACCENT)
+        y = _text_block(draw, (x + int(24 * s), y), item, font, w - int(24 * s), 3) + int(14 * s)
+
+
+def _header(draw, canvas_w, title, s) -> int:
+    band = int(110 * s)
+    draw.rectangle((0, 0, canvas_w, band), fill=ACCENT)
+    _text_block(draw, (int(48 * s), int(30 * s)), title, _font(int(40 * s), bold=True),
+                canvas_w - int(96 * s), 1, fill=(255, 255, 255))
+    return band
+
+
+def _chart(draw, visual, box, s):
+    x, y, w, h = box
+    kind = visual.get("type")
+    font = _font(int(18 * s))
+    if visual.get("title"):
+        y = _text_block(draw, (x, y), visual["title"], _font(int(22 * s), bold=True), w, 1) + int(8 * s)
+        h = box[1] + box[3] - y
+
+    if kind == "pie":
+        sizes = [v for v in safe_float_conversion(visual.get("sizes", [])) if v > 0]
+        total = sum(sizes)
+        diameter = min(w, h) - int(10 * s)
+        if not total or diameter <= 0:
+            return
+        left = x + (w - diameter) // 2
+        angle = -90.0
+        for i, value in enumerate(sizes):
+            sweep = 360.0 * value / total
+            draw.pieslice((left, y, left + diameter, y + diameter), angle, angle + sweep,
+                          fill=PALETTE[i % len(PALETTE)], outline=(255, 255, 255))
+            angle += sweep
+        return
+
+    values = safe_float_conversion(visual.get("y", []))
+    labels = [str(v) for v in visual.get("x", [])]
+    if not values:
+        return
+    label_h = int(24 * s)
+    plot_h = h - label_h
+    top_value = max(max(values), 0) or 1.0
+    step = w / len(values)
+    draw.line((x, y + plot_h, x + w, y + plot_h), fill=MUTED, width=max(1, int(2 * s)))
+
+    points = []
+    for i, value in enumerate(values):
+        bar_h = int(plot_h * max(value, 0) / top_value)
+        cx = x + int(step * (i + 0.5))
+        if kind == "bar":
+            half = int(step * 0.3)
+            draw.rectangle((cx - half, y + plot_h - bar_h, cx + half, y + plot_h), fill=PALETTE[0])
+        points.append((cx, y + plot_h - bar_h))
+        if i < len(labels):
+            label = _wrap(draw, labels[i], font, int(step), 1)
+            if label:
+                draw.text((cx - draw.textlength(label[0], font=font) / 2, y + plot_h + int(4 * s)),
+                          label[0], font=font, fill=MUTED)
+    if kind == "line" and len(points) > 1:
+        draw.line(points, fill=PALETTE[0], width=max(1, int(4 * s)))
+        r = int(5 * s)
+        for px, py in points:
+            draw.ellipse((px - r, py - r, px + r, py + r), fill=PALETTE[1])
+
+
+def _image(canvas, draw, visual, box, s):
+    x, y, w, h = box
+    image_path = resolve_image_path(visual)
+    if image_path:
+        try:
+            with Image.open(image_path) as picture:
+                picture = picture.convert("RGB")
+                picture.thumbnail((w, h))
+                canvas.paste(picture, (x + (w - picture.width) // 2, y + (h - picture.height) // 2))
+                return
+        except Exception as e:
+            logger.warning("Could not draw image '%s' in thumbnail: %s", image_path, e)
+    draw.rectangle((x, y, x + w, y + h), outline=MUTED, width=max(1, int(2 * s)))
+    _text_block(draw, (x + int(16 * s), y + int(16 * s)), f"[Şəkil təsviri: {visual.get('description', '')}]",
+                _font(int(20 * s)), w - int(32 * s), 6, fill=MUTED)
+
+
+def render_thumbnail(slide: Dict, size: Tuple[int, int]) -> Image.Image:
+    """Draw a simplified preview of one slide."""
+    width, height = size
+    s = width / BASE_WIDTH
+    canvas = Image.new("RGB", size, (255, 255, 255))
+    draw = ImageDraw.Draw(canvas)
+    margin = int(48 * s)
+    slide_type = slide.get("type")
+
+    if slide_type == "title":
+        draw.rectangle((0, 0, width, height), fill=ACCENT)
+        _text_block(draw, (margin, int(height * 0.35)), slide.get("title", ""), _font(int(60 * s), bold=True),
+                    width - 2 * margin, 3, fill=(255, 255, 255))
+    elif slide_type == "intro":
+        top = _header(draw, width, "Giriş", s) + margin // 2
+        y = _text_block(draw, (margin, top), "Məqsəd", _font(int(28 * s), bold=True), width - 2 * margin, 1)
+        y = _text_block(draw, (margin, y + int(6 * s)), slide.get("aim", ""), _font(int(24 * s)), width - 2 * margin, 3)
+        y = _text_block(draw, (margin, y + int(20 * s)), "Layihənin məzmunu", _font(int(28 * s), bold=True),
+                        width - 2 * margin, 1)
+        _text_block(draw, (margin, y + int(6 * s)), slide.get("summary", ""), _font(int(22 * s)),
+                    width - 2 * margin, 8)
+    elif slide_type == "recommendation":
+        top = _header(draw, width, "Növbəti addımlar", s) + margin // 2
+        recommendations = [slide.get(f"recommendation{i}", "") for i in range(1, 6)]
+        _bullets(draw, recommendations, (margin, top, width - 2 * margin, height - top - margin), s)
+    else:
+        top = _header(draw, width, slide.get("title", ""), s) + margin // 2
+        visual = slide.get("visual") or {}
+        has_visual = visual.get("type") not in (None, "", "none")
+        text_w = (width - 2 * margin) // 2 if has_visual else width - 2 * margin
+        points = [slide.get(f"point{i}", "") for i in range(1, 5)]
+        _bullets(draw, points, (margin, top, text_w - int(20 * s), height - top - margin), s)
+        if has_visual:
+            box = (margin + text_w + int(20 * s), top, text_w - int(20 * s), height - top - margin)
+            if visual["type"] == "image":
+                _image(canvas, draw, visual, box, s)
+            else:
+                _chart(draw, visual, box, s)
+    return canvas
+
+
+def _save_png(image: Image.Image, target: Path):
+    """Write through a temp file so concurrent readers never see a partial PNG."""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = target.with_suffix(f".{uuid.uuid4().hex[:8]}.tmp")
+    image.save(tmp_path, format="PNG", optimize=True)
+    os.replace(tmp_path, target)
+
+
+@timed_stage("thumbnail")
+def get_thumbnail(slide: Dict, size_name: str = "medium") -> Path:
+    """Path of the cached thumbnail for a slide, rendering it on a miss."""
+    size = _size(size_name)
+    digest = slide_hash(slide)
+    target = shard_path(THUMBNAILS_DIR, f"{digest}_{size_name}.png", digest)
+    if target.exists():
+        record_cache("thumbnail", hit=True)
+        return target
+    record_cache("thumbnail", hit=False)
+    _save_png(render_thumbnail(slide, size), target)
+    return target
+
+
+@timed_stage("contact_sheet")
+def get_contact_sheet(slides: List[Dict], size_name: str = "small", columns: int = 4) -> Path:
+    """Grid of numbered slide thumbnails for a whole deck, cached by the slide hashes."""
+    thumb_w, thumb_h = _size(size_name)
+    digests = [slide_hash(slide) for slide in slides]
+    sheet_key = hashlib.sha256(f"{'|'.join(digests)}|{size_name}|{columns}".encode("utf-8")).hexdigest()[:24]
+    target = shard_path(THUMBNAILS_DIR, f"sheet_{sheet_key}.png", sheet_key)
+    if target.exists():
+        record_cache("contact_sheet", hit=True)
+        return target
+    record_cache("contact_sheet", hit=False)
+
+    gap = max(8, thumb_w // 20)
+    label_h = max(16, thumb_h // 8)
+    columns = max(1, min(columns, len(slides) or 1))
+    rows = max(1, math.ceil(len(slides) / columns))
+    sheet = Image.new("RGB", (gap + columns * (thumb_w + gap), gap + rows * (thumb_h + label_h + gap)), (235, 235, 235))
+    draw = ImageDraw.Draw(sheet)
+    font = _font(max(10, label_h - 6))
+
+    for n, slide in enumerate(slides):
+        x = gap + (n % columns) * (thumb_w + gap)
+        y = gap + (n // columns) * (thumb_h + label_h + gap)
+        # Reuse the per-slide cache so the sheet and single previews share work
+        with Image.open(get_thumbnail(slide, size_name)) as thumb:
+            sheet.paste(thumb, (x, y))
+        draw.rectangle((x, y, x + thumb_w - 1, y + thumb_h - 1), outline=(200, 200, 200))
+        draw.text((x, y + thumb_h + 2), f"{n + 1}. {slide.get('type', '')}", font=font, fill=TEXT)
+
+    _save_png(sheet, target)
+    return target
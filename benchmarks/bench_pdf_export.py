@@ -0,0 +1,56 @@
+"""
+Benchmark for PDF export throughput.
+Renders many synthetic decks with one warmed-up renderer and reports pages per second.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_pdf_export --decks 50 --slides 12
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from backend.utils.pdf_export import PDFRenderer
+
+
+def make_deck(slide_count):
+    slides = [
+        {"type": "title", "title": "Benchmark təqdimatı"},
+        {"type": "intro", "aim": "Sürəti ölçmək", "summary": "Sintetik məzmun. " * 10},
+    ]
+    for i in range(max(slide_count - 3, 1)):
+        slides.append({
+            "type": "main",
+            "title": f"Mövzu {i + 1}",
+            **{f"point{p}": f"Bənd {p}: " + "nümunə mətn " * 8 for p in range(1, 5)},
+            "visual": {"type": "none"},
+        })
+    slides.append({"type": "recommendation", **{f"recommendation{r}": f"Tövsiyə {r}" for r in range(1, 6)}})
+    return slides
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--decks", type=int, default=50)
+    parser.add_argument("--slides", type=int, default=12)
+    args = parser.parse_args()
+
+    renderer = PDFRenderer()
+    deck = make_deck(args.slides)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Warm-up render (font loading, first-use caches)
+        renderer.render(deck, os.path.join(tmp, "warmup.pdf"))
+
+        pages = 0
+        start = time.perf_counter()
+        for n in range(args.decks):
+            pages += renderer.render(deck, os.path.join(tmp, f"deck_{n}.pdf"))
+        elapsed = time.perf_counter() - start
+
+    print(f"Rendered {args.decks} decks, {pages} pages in {elapsed:.3f}s")
+    print(f"Pages per second: {pages / elapsed:.1f}")
+
+
+if __name__ == "__main__":
+    main()
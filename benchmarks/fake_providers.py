@@ -0,0 +1,276 @@
+"""
+Local fake Gemini and Hugging Face providers for load testing.
+Speaks enough of the Gemini REST API (list models, generateContent,
+streamGenerateContent) and of the HF inference API (text-to-image) for the
+backend to run unchanged, with configurable latency, error rates and streaming.
+
+Usage (from the repository root):
+    python -m benchmarks.fake_providers --port 8100 --llm-latency lognormal:2:0.5 --llm-error-rate 0.05
+
+Then start the API with:
+    GOOGLE_API_KEY=fake GEMINI_API_ENDPOINT=http://127.0.0.1:8100 \\
+    HF_API_KEY=fake HF_INFERENCE_ENDPOINT=http://127.0.0.1:8100/hf/models/fake-diffusion \\
+    uvicorn backend.api:app
+"""
+import argparse
+import json
+import random
+import re
+import struct
+import threading
+import time
+import zlib
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from benchmarks import synthetic
+
+FAKE_MODELS = ("models/fake-gemini-flash", "models/fake-gemini-pro")
+
+_SLIDE_COUNT_RE = re.compile(r"İstifadəçi (\d+) slayd istəmişdir")
+_ERRORS = {
+    429: ("RESOURCE_EXHAUSTED", "Resource has been exhausted (e.g. check quota)."),
+    500: ("INTERNAL", "An internal error has occurred."),
+    503: ("UNAVAILABLE", "The service is currently unavailable."),
+}
+
+
+class Latency:
+    """
+    Latency distribution parsed from a spec string:
+    "0", "fixed:S", "uniform:LOW:HIGH" or "lognormal:MEDIAN:SIGMA" (seconds).
+    """
+
+    def __init__(self, spec: str):
+        parts = spec.split(":")
+        self.kind = parts[0] if len(parts) > 1 else "fixed"
+        self.params = [float(p) for p in (parts[1:] if len(parts) > 1 else parts)]
+        if self.kind not in ("fixed", "uniform", "lognormal"):
+            raise ValueError(f"unknown latency distribution: {spec}")
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "uniform":
+            return rng.uniform(*self.params)
+        if self.kind == "lognormal":
+            median, sigma = self.params
+            return rng.lognormvariate(0.0, sigma) * median
+        return self.params[0]
+
+
+def make_png(width: int, height: int) -> bytes:
+    """A small gradient PNG built with zlib only."""
+    rows = []
+    for y in range(height):
+        row = bytearray([0])
+        for x in range(width):
+            row += bytes((x * 255 // max(width - 1, 1), y * 255 // max(height - 1, 1), 160))
+        rows.append(bytes(row))
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header)
+            + chunk(b"IDAT", zlib.compress(b"".join(rows), 6)) + chunk(b"IEND", b""))
+
+
+class FakeProviders:
+    """Configuration, randomness and request counters shared by all handler threads."""
+
+    def __init__(self, args):
+        self.args = args
+        self.llm_latency = Latency(args.llm_latency)
+        self.image_latency = Latency(args.image_latency)
+        self.png = make_png(args.image_size, args.image_size)
+        self._rng = random.Random(args.seed)
+        self._lock = threading.Lock()
+        self.requests = Counter()
+
+    def draw(self, latency: Latency, error_rate: float):
+        """Return (delay, error status or None) for one request."""
+        with self._lock:
+            delay = latency.sample(self._rng)
+            failed = self._rng.random() < error_rate
+            status = self._rng.choice(self.args.error_codes) if failed else None
+            seed = self._rng.randrange(1 << 30)
+        return delay, status, seed
+
+    def count(self, route: str, status: int):
+        with self._lock:
+            self.requests[f"{route} {status}"] += 1
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "FakeProviders/1.0"
+
+    @property
+    def fakes(self) -> FakeProviders:
+        return self.server.fakes
+
+    def log_message(self, format, *args):
+        if self.fakes.args.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status, body: bytes, content_type="application/json", route="other"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.fakes.count(route, status)
+
+    def _send_json(self, status, payload, route="other"):
+        self._send(status, json.dumps(payload, ensure_ascii=False).encode("utf-8"), route=route)
+
+    def _send_error(self, status, route):
+        reason, message = _ERRORS.get(status, ("UNKNOWN", "Injected failure."))
+        self._send_json(status, {"error": {"code": status, "message": message, "status": reason}}, route)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b"{}"
+        try:
+            return json.loads(raw or b"{}")
+        except ValueError:
+            return {}
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path.endswith("/models"):
+            models = [{
+                "name": name,
+                "displayName": name.split("/")[-1],
+                "version": "001",
+                "inputTokenLimit": 1048576,
+                "outputTokenLimit": 8192,
+                "supportedGenerationMethods": ["generateContent", "streamGenerateContent", "countTokens"],
+            } for name in FAKE_MODELS]
+            self._send_json(200, {"models": models}, "list_models")
+        elif path == "/stats":
+            self._send_json(200, dict(self.fakes.requests), "stats")
+        else:
+            self._send_json(404, {"error": {"code": 404, "message": f"{path} not found", "status": "NOT_FOUND"}})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path.endswith(":generateContent"):
+            self._generate(url, stream=False)
+        elif url.path.endswith(":streamGenerateContent"):
+            self._generate(url, stream=True)
+        elif url.path.startswith("/hf/"):
+            self._text_to_image()
+        else:
+            self._read_json()
+            self._send_json(404, {"error": {"code": 404, "message": f"{url.path} not found", "status": "NOT_FOUND"}})
+
+    def _generate(self, url, stream):
+        route = "streamGenerateContent" if stream else "generateContent"
+        body = self._read_json()
+        args = self.fakes.args
+        model = url.path.rsplit("/", 1)[-1].split(":")[0]
+        if f"models/{model}" not in FAKE_MODELS:
+            self._send_json(404, {"error": {"code": 404, "message": f"models/{model} is not found",
+                                            "status": "NOT_FOUND"}}, route)
+            return
+
+        delay, error, seed = self.fakes.draw(self.fakes.llm_latency, args.llm_error_rate)
+        prompt = " ".join(part.get("text", "") for content in body.get("contents", [])
+                          for part in content.get("parts", []))
+        match = _SLIDE_COUNT_RE.search(prompt)
+        slide_count = int(match.group(1)) if match else 6
+
+        if error:
+            time.sleep(min(delay, args.error_latency))
+            self._send_error(error, route)
+            return
+        time.sleep(delay)
+
+        text = synthetic.make_model_response(slide_count, seed=seed, include_images=args.image_visuals)
+        if not stream:
+            self._send_json(200, self._candidate(text, final=True), route)
+            return
+
+        # Stream the text in chunks: SSE for alt=sse, otherwise a JSON array as the REST SDK expects
+        sse = parse_qs(url.query).get("alt", [""])[0] == "sse"
+        pieces = [text[i:i + args.stream_chunk_chars] for i in range(0, len(text), args.stream_chunk_chars)]
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream" if sse else "application/json")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        try:
+            if not sse:
+                self.wfile.write(b"[")
+            for n, piece in enumerate(pieces):
+                payload = json.dumps(self._candidate(piece, final=n == len(pieces) - 1), ensure_ascii=False)
+                if sse:
+                    self.wfile.write(f"data: {payload}\r\n\r\n".encode("utf-8"))
+                else:
+                    self.wfile.write((("," if n else "") + payload + "\n").encode("utf-8"))
+                self.wfile.flush()
+                time.sleep(args.stream_chunk_delay)
+            if not sse:
+                self.wfile.write(b"]")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        self.fakes.count(route, 200)
+
+    @staticmethod
+    def _candidate(text, final):
+        candidate = {"content": {"role": "model", "parts": [{"text": text}]}, "index": 0}
+        if final:
+            candidate["finishReason"] = "STOP"
+        return {
+            "candidates": [candidate],
+            "usageMetadata": {"promptTokenCount": 0, "candidatesTokenCount": len(text) // 4},
+        }
+
+    def _text_to_image(self):
+        self._read_json()
+        args = self.fakes.args
+        delay, error, _ = self.fakes.draw(self.fakes.image_latency, args.image_error_rate)
+        if error:
+            time.sleep(min(delay, args.error_latency))
+            self._send_error(error, "text_to_image")
+            return
+        time.sleep(delay)
+        self._send(200, self.fakes.png, content_type="image/png", route="text_to_image")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--llm-latency", default="lognormal:1.5:0.4", help="Latency spec for generateContent")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--image-latency", default="uniform:0.5:2", help="Latency spec for text-to-image")
+    parser.add_argument("--image-error-rate", type=float, default=0.0)
+    parser.add_argument("--error-codes", default="429,503",
+                        type=lambda value: [int(code) for code in value.split(",")],
+                        help="Statuses returned for injected failures")
+    parser.add_argument("--error-latency", type=float, default=0.2, help="Upper bound on latency of failed calls")
+    parser.add_argument("--stream-chunk-chars", type=int, default=256)
+    parser.add_argument("--stream-chunk-delay", type=float, default=0.05)
+    parser.add_argument("--image-size", type=int, default=512)
+    parser.add_argument("--image-visuals", action="store_true", help="Include image visuals in generated slides")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), Handler)
+    server.daemon_threads = True
+    server.fakes = FakeProviders(args)
+    print(f"Fake Gemini/HF providers listening on http://{args.host}:{args.port} "
+          f"(models: {', '.join(FAKE_MODELS)}; request counts at /stats)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
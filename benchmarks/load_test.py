@@ -0,0 +1,191 @@
+"""
+Load test for a running API instance.
+Drives a weighted mix of endpoints at a fixed concurrency and reports throughput
+and latency percentiles per endpoint. Run it against an API configured with the
+fake providers (benchmarks/fake_providers.py) to avoid spending real quota.
+
+Usage (from the repository root):
+    python -m benchmarks.load_test --base-url http://127.0.0.1:8000 --concurrency 16 --duration 60
+    python -m benchmarks.load_test --mix generate:1,list:2,get:4,export_pdf:1 --output load.json
+"""
+import argparse
+import json
+import math
+import random
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+
+from benchmarks import synthetic
+
+DEFAULT_MIX = "generate:1,list:2,get:4,export_pptx:1,export_pdf:1"
+PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class LoadTest:
+    def __init__(self, args, document_path):
+        self.args = args
+        self.base_url = args.base_url.rstrip("/")
+        self.document = Path(document_path)
+        self.document_bytes = self.document.read_bytes()
+        self.mix = [(name, float(weight)) for name, weight in
+                    (item.split(":") for item in args.mix.split(",") if item)]
+        self.presentation_ids = []
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    def _record(self, endpoint, seconds, status):
+        with self._lock:
+            self.latencies[endpoint].append(seconds)
+            self.statuses[endpoint][str(status)] += 1
+
+    def _presentation_id(self, rng):
+        with self._lock:
+            return rng.choice(self.presentation_ids) if self.presentation_ids else None
+
+    def _has_presentations(self):
+        with self._lock:
+            return bool(self.presentation_ids)
+
+    def call(self, session, endpoint, rng):
+        if endpoint == "generate":
+            files = {"file": (self.document.name, self.document_bytes)}
+            data = {"slide_count": self.args.slide_count, "include_visuals": self.args.include_visuals,
+                    "draft": self.args.draft, "store": True}
+            return session.post(f"{self.base_url}/generate", files=files, data=data, timeout=self.args.timeout)
+        if endpoint == "list":
+            return session.get(f"{self.base_url}/presentations", timeout=self.args.timeout)
+
+        presentation_id = self._presentation_id(rng)
+        if endpoint == "get":
+            return session.get(f"{self.base_url}/presentations/{presentation_id}", timeout=self.args.timeout)
+        if endpoint == "export_pptx":
+            return session.get(f"{self.base_url}/presentations/{presentation_id}/export/pptx",
+                               timeout=self.args.timeout)
+        if endpoint == "export_pdf":
+            return session.post(f"{self.base_url}/presentations/{presentation_id}/export/pdf",
+                                timeout=self.args.timeout)
+        raise ValueError(f"unknown endpoint in mix: {endpoint}")
+
+    def worker(self, worker_id, deadline, remaining):
+        rng = random.Random(worker_id)
+        names = [name for name, _ in self.mix]
+        weights = [weight for _, weight in self.mix]
+        with requests.Session() as session:
+            while time.monotonic() < deadline:
+                if remaining is not None:
+                    with self._lock:
+                        if remaining[0] <= 0:
+                            return
+                        remaining[0] -= 1
+                endpoint = rng.choices(names, weights)[0]
+                if endpoint not in ("generate", "list") and not self._has_presentations():
+                    # Id-based endpoints need something stored first
+                    endpoint = "generate"
+                started = time.perf_counter()
+                try:
+                    response = self.call(session, endpoint, rng)
+                except requests.RequestException as e:
+                    self._record(endpoint, time.perf_counter() - started, type(e).__name__)
+                    continue
+                elapsed = time.perf_counter() - started
+                self._record(endpoint, elapsed, response.status_code)
+                if endpoint == "generate" and response.status_code == 200:
+                    presentation_id = response.json().get("presentation_id")
+                    if presentation_id:
+                        with self._lock:
+                            self.presentation_ids.append(presentation_id)
+                if response.status_code == 429 and self.args.respect_retry_after:
+                    time.sleep(float(response.headers.get("Retry-After", "1")))
+
+    def run(self):
+        deadline = time.monotonic() + self.args.duration
+        remaining = [self.args.requests] if self.args.requests else None
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.args.concurrency) as executor:
+            for worker_id in range(self.args.concurrency):
+                executor.submit(self.worker, worker_id, deadline, remaining)
+        return time.perf_counter() - started
+
+    def report(self, elapsed):
+        endpoints = {}
+        for endpoint, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            statuses = dict(self.statuses[endpoint])
+            ok = sum(count for status, count in statuses.items() if status.startswith("2"))
+            endpoints[endpoint] = {
+                "requests": len(values),
+                "ok": ok,
+                "throughput_rps": len(values) / elapsed if elapsed else 0.0,
+                "statuses": statuses,
+                **{f"p{p}": percentile(values, p) for p in PERCENTILES},
+                "max": values[-1],
+            }
+        total = sum(len(v) for v in self.latencies.values())
+        return {
+            "base_url": self.base_url,
+            "concurrency": self.args.concurrency,
+            "mix": self.args.mix,
+            "elapsed_seconds": elapsed,
+            "total_requests": total,
+            "throughput_rps": total / elapsed if elapsed else 0.0,
+            "endpoints": endpoints,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run")
+    parser.add_argument("--requests", type=int, default=0, help="Stop after this many requests (0 = no limit)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Weighted endpoints: generate, list, get, export_pptx, export_pdf")
+    parser.add_argument("--document", help="PDF/DOCX to upload (default: a generated medium DOCX)")
+    parser.add_argument("--slide-count", type=int, default=8)
+    parser.add_argument("--include-visuals", action="store_true")
+    parser.add_argument("--draft", action="store_true", help="Use the local extractive generator")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--respect-retry-after", action="store_true", help="Back off on 429 responses")
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="taskd-load-") as tmp:
+        document = args.document or synthetic.write_docx(
+            Path(tmp) / "load_test.docx", synthetic.DOCUMENT_SIZES["medium"], seed=1
+        )
+        test = LoadTest(args, document)
+        print(f"Running {args.mix} against {test.base_url} at concurrency {args.concurrency}...")
+        report = test.report(test.run())
+
+    print(f"\n{report['total_requests']} requests in {report['elapsed_seconds']:.1f}s "
+          f"({report['throughput_rps']:.2f} req/s)\n")
+    header = f"{'endpoint':12s} {'reqs':>6s} {'ok':>6s} {'req/s':>8s}" + "".join(f"{'p' + str(p):>9s}" for p in PERCENTILES) + f"{'max':>9s}"
+    print(header)
+    for endpoint, stats in report["endpoints"].items():
+        print(f"{endpoint:12s} {stats['requests']:6d} {stats['ok']:6d} {stats['throughput_rps']:8.2f}"
+              + "".join(f"{stats[f'p{p}']:9.3f}" for p in PERCENTILES) + f"{stats['max']:9.3f}")
+        errors = {status: count for status, count in stats["statuses"].items() if not status.startswith("2")}
+        if errors:
+            print(f"{'':12s} errors: {errors}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"\nReport written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+"""
+Benchmark suite for the core pipeline.
+Times read_file, parse_gpt_response, generate_pptx, create_pdf_from_slides and the
+storage operations against synthetic corpora, and writes the results as JSON so
+runs from different commits can be compared. The import suite measures the cold
+import of backend.api and fails the run when it exceeds the import-time budget
+or loads heavy libraries eagerly.
+
+Usage (from the repository root):
+    python -m benchmarks.run_benchmarks
+    python -m benchmarks.run_benchmarks --suites storage --scales 100,10000
+    python -m benchmarks.run_benchmarks --compare benchmarks/results/<baseline>.json
+    python -m benchmarks.run_benchmarks --suites import --import-budget 1.0
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks import synthetic
+
+SUITES = ("import", "read_file", "parse", "pptx", "pdf", "storage")
+DEFAULT_SCALES = "100,10000,100000"
+RESULTS_DIR = Path(__file__).parent / "results"
+ROOT_DIR = Path(__file__).resolve().parent.parent
+IMPORT_TIME_BUDGET = float(os.getenv("IMPORT_TIME_BUDGET_SECONDS", "1.5"))
+
+_IMPORT_PROBE = """
+import json, time
+started = time.perf_counter()
+import backend.api
+imported = time.perf_counter() - started
+from backend.utils.lazy import loaded_heavy_modules, warm_up
+heavy = loaded_heavy_modules()
+print(json.dumps({"import": imported, "heavy": heavy, "warm_up": warm_up() if WARM else None}))
+"""
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    return {
+        "runs": len(samples),
+        "min": samples[0],
+        "median": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+        "p95": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        "max": samples[-1],
+    }
+
+
+def measure(func, repeat, warmup=1):
+    """Run func warmup + repeat times and summarise the timed runs (seconds)."""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def bench_import(results, work_dir, repeat, budget):
+    """
+    Cold-import backend.api in fresh interpreters. Returns budget violations.
+    The last run also times warm_up() so its cost is tracked between commits.
+    """
+    env = {**os.environ, "LOG_LEVEL": "WARNING"}
+    import_times, warm_up_times, heavy = [], [], set()
+    # One untimed run first so bytecode caches exist, like a deployed container
+    for run in range(repeat + 1):
+        warm = run == repeat
+        probe = subprocess.run([sys.executable, "-c", f"WARM = {warm}\n" + _IMPORT_PROBE], cwd=ROOT_DIR, env=env,
+                               capture_output=True, text=True)
+        if probe.returncode != 0:
+            raise RuntimeError(f"importing backend.api failed:\n{probe.stderr}")
+        sample = json.loads(probe.stdout.strip().splitlines()[-1])
+        if run:
+            import_times.append(sample["import"])
+        heavy.update(sample["heavy"])
+        if warm:
+            warm_up_times.append(sample["warm_up"])
+
+    results["import/backend.api"] = summarize(import_times)
+    results["import/warm_up"] = summarize(warm_up_times)
+
+    violations = []
+    median = results["import/backend.api"]["median"]
+    if median > budget:
+        violations.append(f"import of backend.api took {median:.3f}s (budget {budget:.3f}s)")
+    if heavy:
+        violations.append(f"importing backend.api loaded heavy modules: {', '.join(sorted(heavy))}")
+    return violations
+
+
+def bench_read_file(results, work_dir, repeat):
+    from backend.utils.file_reader import read_file
+
+    corpus_dir = work_dir / "corpus"
+    corpus_dir.mkdir(exist_ok=True)
+    for size, pages in synthetic.DOCUMENT_SIZES.items():
+        for ext, writer in (("pdf", synthetic.write_pdf), ("docx", synthetic.write_docx)):
+            path = writer(corpus_dir / f"{size}.{ext}", pages, seed=pages)
+            runs = repeat if size != "large" else max(1, repeat // 3)
+            results[f"read_file/{ext}/{size}"] = measure(lambda: read_file(str(path)), runs)
+
+
+def bench_parse(results, work_dir, repeat):
+    from backend.utils.slide import parse_gpt_response
+
+    for slide_count in (6, 20, 60):
+        response = synthetic.make_model_response(slide_count, seed=slide_count)
+        results[f"parse_gpt_response/{slide_count}_slides"] = measure(
+            lambda: parse_gpt_response(response), repeat * 10
+        )
+
+
+def bench_pptx(results, work_dir, repeat):
+    from backend.utils.slide import generate_pptx
+    from backend.utils.slide_cache import slide_part_cache
+
+    for slide_count in (6, 20, 150):
+        slides = synthetic.make_slides(slide_count, seed=slide_count)
+        output = str(work_dir / f"deck_{slide_count}.pptx")
+
+        def cold():
+            slide_part_cache.clear()
+            generate_pptx(slides, output)
+
+        edits = {"count": 0}
+
+        def one_edit():
+            # A different slide changes on every run, as after a single edit in the UI
+            edits["count"] += 1
+            edited = list(slides)
+            index = 2 + edits["count"] % (len(slides) - 3)
+            edited[index] = {**slides[index], "title": f"Edit {edits['count']}"}
+            generate_pptx(edited, output)
+
+        results[f"generate_pptx/{slide_count}_slides"] = measure(cold, repeat)
+        results[f"generate_pptx/{slide_count}_slides_cached"] = measure(lambda: generate_pptx(slides, output), repeat)
+        results[f"generate_pptx/{slide_count}_slides_one_edit"] = measure(one_edit, repeat)
+
+
+def bench_pdf(results, work_dir, repeat):
+    from backend.utils.pdf_export import create_pdf_from_slides
+
+    for slide_count in (6, 20):
+        slides = synthetic.make_slides(slide_count, seed=slide_count)
+        output = str(work_dir / f"deck_{slide_count}.pdf")
+        results[f"create_pdf_from_slides/{slide_count}_slides"] = measure(
+            lambda: create_pdf_from_slides(slides, output), repeat
+        )
+
+
+def _populate(storage, start, stop, decks):
+    for n in range(start, stop):
+        storage.save_presentation(f"bench-{n:06d}", decks[n % len(decks)], {"source": "benchmark"})
+
+
+def bench_storage(results, work_dir, repeat, scales):
+    from backend.utils import storage
+
+    rng = random.Random(0)
+    # A small pool of decks keeps population cheap; content does not matter for file I/O
+    decks = [synthetic.make_slides(8, seed=seed) for seed in range(20)]
+    deck = synthetic.make_slides(12, seed=1)
+    stored = 0
+
+    for scale in sorted(scales):
+        started = time.perf_counter()
+        _populate(storage, stored, scale, decks)
+        print(f"  storage: {scale} decks stored (+{scale - stored} in {time.perf_counter() - started:.1f}s)")
+        stored = scale
+
+        counter = iter(range(10 ** 9))
+        ops = repeat * 10
+
+        def save():
+            storage.save_presentation(f"bench-new-{scale}-{next(counter)}", deck)
+
+        def load():
+            storage.load_presentation(f"bench-{rng.randrange(scale):06d}")
+
+        def update():
+            storage.update_presentation(f"bench-{rng.randrange(scale):06d}", deck, {"benchmark": True})
+
+        results[f"storage/save_presentation/{scale}"] = measure(save, ops)
+        results[f"storage/load_presentation/{scale}"] = measure(load, ops)
+        results[f"storage/update_presentation/{scale}"] = measure(update, ops)
+
+        # Delete the decks created by save() so the next scale starts from exactly `scale` decks
+        new_ids = iter([f"bench-new-{scale}-{n}" for n in range(ops + 1)])
+        results[f"storage/delete_presentation/{scale}"] = measure(
+            lambda: storage.delete_presentation(next(new_ids)), ops, warmup=1
+        )
+
+        # Listing reads every file; keep the run count low at large scales
+        list_runs = repeat if scale <= 10000 else 1
+        results[f"storage/list_presentations/{scale}"] = measure(storage.list_presentations, list_runs, warmup=0)
+
+
+def git_revision():
+    root = ROOT_DIR
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=root, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=root,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return None, False
+    return commit, dirty
+
+
+def compare(current, baseline, threshold):
+    """Print median changes against a baseline run; returns the number of regressions."""
+    regressions = 0
+    print(f"\nComparison with {baseline.get('commit') or 'baseline'} (threshold {threshold:.0%}):")
+    for name, result in sorted(current["results"].items()):
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            print(f"  {name:55s} new")
+            continue
+        change = result["median"] / previous["median"] - 1 if previous["median"] else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        elif change < -threshold:
+            flag = "  improved"
+        print(f"  {name:55s} {previous['median'] * 1000:10.3f}ms -> {result['median'] * 1000:10.3f}ms "
+              f"({change:+.1%}){flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--suites", default=",".join(SUITES), help=f"Comma-separated subset of {', '.join(SUITES)}")
+    parser.add_argument("--scales", default=DEFAULT_SCALES, help="Stored deck counts for the storage suite")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per benchmark (some suites scale this)")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", help="Baseline result file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative median slowdown flagged as a regression")
+    parser.add_argument("--import-budget", type=float, default=IMPORT_TIME_BUDGET,
+                        help="Maximum median cold-import time of backend.api in seconds")
+    args = parser.parse_args()
+
+    suites = [s.strip() for s in args.suites.split(",") if s.strip()]
+    unknown = set(suites) - set(SUITES)
+    if unknown:
+        parser.error(f"unknown suites: {', '.join(sorted(unknown))}")
+    scales = [int(s) for s in args.scales.split(",") if s.strip()]
+
+    with tempfile.TemporaryDirectory(prefix="taskd-bench-") as tmp:
+        work_dir = Path(tmp)
+        # Point storage at a scratch directory before any backend module is imported
+        os.environ["STORAGE_DIR"] = str(work_dir / "storage")
+
+        results = {}
+        violations = []
+        for suite in suites:
+            print(f"Running {suite}...")
+            started = time.perf_counter()
+            if suite == "import":
+                violations += bench_import(results, work_dir, args.repeat, args.import_budget)
+            elif suite == "read_file":
+                bench_read_file(results, work_dir, args.repeat)
+            elif suite == "parse":
+                bench_parse(results, work_dir, args.repeat)
+            elif suite == "pptx":
+                bench_pptx(results, work_dir, args.repeat)
+            elif suite == "pdf":
+                bench_pdf(results, work_dir, args.repeat)
+            elif suite == "storage":
+                bench_storage(results, work_dir, args.repeat, scales)
+            print(f"  done in {time.perf_counter() - started:.1f}s")
+
+    commit, dirty = git_revision()
+    report = {
+        "commit": commit,
+        "dirty": dirty,
+        "timestamp": datetime.now().isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "suites": suites,
+        "scales": scales,
+        "import_budget": args.import_budget,
+        "violations": violations,
+        "results": results,
+    }
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{(commit or 'unknown')[:12]}{'-dirty' if dirty else ''}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    for name, result in sorted(results.items()):
+        print(f"{name:55s} median {result['median'] * 1000:10.3f}ms  p95 {result['p95'] * 1000:10.3f}ms")
+    print(f"\nResults written to {output}")
+
+    failed = bool(violations)
+    for violation in violations:
+        print(f"BUDGET EXCEEDED: {violation}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        failed = compare(report, baseline, args.threshold) > 0 or failed
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
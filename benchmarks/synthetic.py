@@ -0,0 +1,115 @@
+"""
+Synthetic corpora for benchmarks.
+Deterministic documents (text, PDF, DOCX), slide sets and model responses.
+"""
+import json
+import random
+
+WORDS = (
+    "layihə təhlil məlumat nəticə sistem inkişaf bazar strategiya investisiya risk "
+    "istifadəçi məhsul keyfiyyət xidmət texnologiya proses hesabat göstərici artım "
+    "performans resurs planlaşdırma idarəetmə tədqiqat innovasiya şəbəkə təhlükəsizlik "
+    "project analysis data result growth market revenue platform customer model"
+).split()
+
+# Approximate page counts for the document sizes
+DOCUMENT_SIZES = {"small": 2, "medium": 20, "large": 150}
+
+
+def make_sentence(rng, min_words=8, max_words=20):
+    words = [rng.choice(WORDS) for _ in range(rng.randint(min_words, max_words))]
+    return " ".join(words).capitalize() + "."
+
+
+def make_pages(pages, seed=0, paragraphs_per_page=5, sentences_per_paragraph=5):
+    """List of pages, each a list of paragraphs, with a running header and page numbers."""
+    rng = random.Random(seed)
+    result = []
+    for page in range(1, pages + 1):
+        paragraphs = [f"Benchmark Corp — İllik hesabat {2020 + seed % 5}"]
+        for _ in range(paragraphs_per_page):
+            paragraphs.append(" ".join(make_sentence(rng) for _ in range(sentences_per_paragraph)))
+        paragraphs.append(f"Səhifə {page} / {pages}")
+        result.append(paragraphs)
+    return result
+
+
+def make_text(pages, seed=0):
+    return "\f".join("\n".join(paragraphs) for paragraphs in make_pages(pages, seed))
+
+
+def write_pdf(path, pages, seed=0):
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, PageBreak
+
+    styles = getSampleStyleSheet()
+    story = []
+    for index, paragraphs in enumerate(make_pages(pages, seed)):
+        for paragraph in paragraphs:
+            story.append(Paragraph(paragraph, styles["Normal"]))
+        if index != pages - 1:
+            story.append(PageBreak())
+    SimpleDocTemplate(str(path), pagesize=A4).build(story)
+    return path
+
+
+def write_docx(path, pages, seed=0):
+    from docx import Document
+
+    doc = Document()
+    for paragraphs in make_pages(pages, seed):
+        for paragraph in paragraphs:
+            doc.add_paragraph(paragraph)
+    doc.save(str(path))
+    return path
+
+
+def make_visual(rng, index, include_images=False):
+    kinds = ("none", "bar", "image", "line", "pie") if include_images else ("none", "bar", "line", "pie")
+    kind = kinds[index % len(kinds)]
+    visual = {"type": kind, "title": "", "description": "", "xlabel": "", "ylabel": "",
+              "x": [], "y": [], "labels": [], "sizes": []}
+    if kind in ("bar", "line"):
+        visual.update({
+            "title": f"Göstərici {index}",
+            "xlabel": "İl",
+            "ylabel": "Dəyər",
+            "x": [str(2019 + i) for i in range(5)],
+            "y": [str(rng.randint(10, 100)) for _ in range(5)],
+        })
+    elif kind == "image":
+        visual.update({
+            "title": f"Şəkil {index}",
+            "description": f"Müasir ofisdə komanda {rng.choice(WORDS)} üzərində işləyir",
+        })
+    elif kind == "pie":
+        visual.update({
+            "title": f"Pay {index}",
+            "labels": ["A", "B", "C", "D"],
+            "sizes": [f"{rng.randint(5, 40)}%" for _ in range(4)],
+        })
+    return visual
+
+
+def make_slides(slide_count, seed=0, include_images=False):
+    """A valid deck (title, intro, mains with mixed visuals, recommendations)."""
+    rng = random.Random(seed)
+    slides = [
+        {"type": "title", "title": "Sintetik təqdimat"},
+        {"type": "intro", "aim": make_sentence(rng), "summary": " ".join(make_sentence(rng) for _ in range(3))},
+    ]
+    for i in range(max(slide_count - 3, 1)):
+        slide = {"type": "main", "title": f"Mövzu {i + 1}", "visual": make_visual(rng, i, include_images)}
+        for p in range(1, 5):
+            slide[f"point{p}"] = make_sentence(rng)
+        slides.append(slide)
+    slides.append({"type": "recommendation",
+                   **{f"recommendation{r}": make_sentence(rng, 5, 10) for r in range(1, 6)}})
+    return slides
+
+
+def make_model_response(slide_count, seed=0, include_images=False):
+    """Slides wrapped the way Gemini typically answers: fenced JSON."""
+    slides = make_slides(slide_count, seed, include_images)
+    return "```json\n" + json.dumps(slides, ensure_ascii=False, indent=2) + "\n```"
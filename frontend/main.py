@@ -1,9 +1,121 @@
-import streamlit as st
-import requests
-import tempfile
 import os
+import time
+import uuid
+
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+BACKEND_URL = os.getenv("BACKEND_URL", "https://taskd-backend-production.up.railway.app")
+
+# (connect, read) timeouts; polling keeps every request short
+REQUEST_TIMEOUT = (5, 60)
+POLL_INTERVAL_SECONDS = 1.0
+JOB_TIMEOUT_SECONDS = int(os.getenv("JOB_TIMEOUT_SECONDS", "900"))
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+STAGE_LABELS = {
+    "queued": "Növbədə gözləyir...",
+    "extract": "Sənəddən mətn çıxarılır...",
+    "generate": "Slaydlar yaradılır...",
+    "render": "Təqdimat hazırlanır...",
+    "done": "Hazırdır",
+}
+
+
+@st.cache_resource
+def get_session() -> requests.Session:
+    """One connection pool shared by all reruns and users of this app process."""
+    session = requests.Session()
+    # Only idempotent requests are retried; uploads are never sent twice
+    retry = Retry(total=3, backoff_factor=0.5, status_forcelist=(502, 503, 504), allowed_methods=("GET",))
+    session.mount("http://", HTTPAdapter(max_retries=retry, pool_maxsize=20))
+    session.mount("https://", HTTPAdapter(max_retries=retry, pool_maxsize=20))
+    return session
+
+
+class MultipartUpload:
+    """
+    multipart/form-data body produced chunk by chunk from the uploaded buffer,
+    so the file is neither written to disk nor copied into one large request body.
+    __len__ lets requests send a Content-Length instead of chunked encoding.
+    """
+
+    def __init__(self, fields: dict, filename: str, buffer: memoryview):
+        self.boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={self.boundary}"
+        safe_name = filename.replace('"', "%22")
+        head = b"".join(
+            f'--{self.boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode("utf-8")
+            for name, value in fields.items()
+        )
+        head += (
+            f'--{self.boundary}\r\nContent-Disposition: form-data; name="file"; filename="{safe_name}"\r\n'
+            f"Content-Type: application/octet-stream\r\n\r\n"
+        ).encode("utf-8")
+        self.head = head
+        self.tail = f"\r\n--{self.boundary}--\r\n".encode("utf-8")
+        self.buffer = buffer
+
+    def __len__(self):
+        return len(self.head) + len(self.buffer) + len(self.tail)
+
+    def __iter__(self):
+        yield self.head
+        for start in range(0, len(self.buffer), UPLOAD_CHUNK_SIZE):
+            yield bytes(self.buffer[start:start + UPLOAD_CHUNK_SIZE])
+        yield self.tail
+
+
+def submit_job(uploaded_file, slide_count: int, include_visuals: bool) -> dict:
+    body = MultipartUpload(
+        {"slide_count": slide_count, "include_visuals": str(include_visuals).lower()},
+        uploaded_file.name,
+        uploaded_file.getbuffer(),
+    )
+    resp = get_session().post(
+        f"{BACKEND_URL}/generate/jobs",
+        data=body,
+        headers={"Content-Type": body.content_type},
+        timeout=REQUEST_TIMEOUT,
+    )
+    resp.raise_for_status()
+    return resp.json()
+
+
+def wait_for_job(job_id: str) -> dict:
+    """Poll the job until it finishes, showing its stage in a progress bar."""
+    progress = st.progress(0.0, text=STAGE_LABELS["queued"])
+    deadline = time.monotonic() + JOB_TIMEOUT_SECONDS
+    while True:
+        resp = get_session().get(f"{BACKEND_URL}/jobs/{job_id}", timeout=REQUEST_TIMEOUT)
+        resp.raise_for_status()
+        job = resp.json()
+        progress.progress(job["progress"], text=STAGE_LABELS.get(job["stage"], job["stage"]))
+        if job["status"] in ("done", "error"):
+            progress.empty()
+            return job
+        if time.monotonic() > deadline:
+            progress.empty()
+            raise TimeoutError("Təqdimatın hazırlanması çox uzun çəkdi. Bir az sonra yenidən cəhd edin.")
+        time.sleep(POLL_INTERVAL_SECONDS)
+
+
+def fetch_presentation(presentation_id: str) -> dict:
+    # Not cached: it is small, and its version keys the cached PPTX below
+    resp = get_session().get(f"{BACKEND_URL}/presentations/{presentation_id}", timeout=REQUEST_TIMEOUT)
+    resp.raise_for_status()
+    return resp.json()
+
+
+@st.cache_data(ttl=600, show_spinner=False, max_entries=20)
+def fetch_pptx(presentation_id: str, version: int) -> bytes:
+    # version is only part of the cache key, so an edited deck is downloaded again
+    resp = get_session().get(f"{BACKEND_URL}/presentations/{presentation_id}/export/pptx", timeout=REQUEST_TIMEOUT)
+    resp.raise_for_status()
+    return resp.content
 
-BACKEND_URL = "https://taskd-backend-production.up.railway.app"
 
 def main():
     st.title("Sənəddən Təqdimat Yaratma")
@@ -13,37 +125,39 @@ def main():
     include_visuals = st.radio("Vizual əlavə olunsun?", ("Bəli", "Xeyr"), index=1)
 
     if uploaded_file and st.button("PPTX Yarat"):
-        # Save file temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(uploaded_file.name)[1]) as tmp:
-            tmp.write(uploaded_file.read())
-            tmp_path = tmp.name
-
-        with open(tmp_path, "rb") as f:
-            files = {"file": (uploaded_file.name, f, "application/octet-stream")}
-            data = {
-                "slide_count": slide_count,
-                "include_visuals": include_visuals == "Bəli",
-                "store": True
-            }
-
-            with st.spinner("Təqdimat yaradılır..."):
-                resp = requests.post(f"{BACKEND_URL}/generate", files=files, data=data)
-
-        os.unlink(tmp_path)
-
-        if resp.status_code != 200:
-            st.error(f"Xəta: {resp.text}")
+        try:
+            job = submit_job(uploaded_file, int(slide_count), include_visuals == "Bəli")
+            job = wait_for_job(job["id"])
+        except (requests.RequestException, TimeoutError) as e:
+            st.error(f"Xəta: {e}")
+            return
+
+        if job["status"] == "error":
+            st.error(f"Xəta: {job['error']['detail']}")
             return
+        # Kept across reruns (e.g. the download click) so nothing is generated twice
+        st.session_state["presentation_id"] = job["result"]["presentation_id"]
+
+    presentation_id = st.session_state.get("presentation_id")
+    if not presentation_id:
+        return
+
+    try:
+        presentation = fetch_presentation(presentation_id)
+        pptx_bytes = fetch_pptx(presentation_id, presentation.get("version", 0))
+    except requests.RequestException as e:
+        st.error(f"Xəta: {e}")
+        return
 
-        result = resp.json()
-        st.success("Təqdimat uğurla yaradıldı!")
-        st.json(result)
+    st.success("Təqdimat uğurla yaradıldı!")
+    st.json({"presentation_id": presentation_id, "slide_count": len(presentation["slides"])})
+    st.download_button(
+        "📥 PPTX faylını yüklə",
+        data=pptx_bytes,
+        file_name=f"presentation_{presentation_id}.pptx",
+        mime="application/vnd.openxmlformats-officedocument.presentationml.presentation",
+    )
 
-        # Download link
-        presentation_id = result.get("presentation_id")
-        if presentation_id:
-            pptx_url = f"{BACKEND_URL}/presentations/{presentation_id}/export/pptx"
-            st.markdown(f"[📥 PPTX faylını yüklə]({pptx_url})")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
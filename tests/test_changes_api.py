@@ -0,0 +1,85 @@
+import requests
+from concurrent.futures import ThreadPoolExecutor
+
+BASE_URL = "http://127.0.0.1:8000"
+
+
+def create_presentation():
+    """Store an extractive draft of test_rich.pdf and return its id."""
+    with open("test_rich.pdf", "rb") as f:
+        files = {"file": ("test_rich.pdf", f, "application/pdf")}
+        data = {"slide_count": 6, "draft": True, "store": True}
+        response = requests.post(f"{BASE_URL}/generate", files=files, data=data, timeout=120)
+    assert response.status_code == 200, response.text
+    return response.json()["presentation_id"]
+
+
+def get_presentation(presentation_id):
+    response = requests.get(f"{BASE_URL}/presentations/{presentation_id}")
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def replay(slides, patch):
+    """Apply a patch the way a client catching up from /changes would."""
+    slides = list(slides)
+    for operation in patch:
+        if operation["op"] == "replace":
+            slides[operation["index"]] = operation["slide"]
+        elif operation["op"] == "insert":
+            slides.insert(operation["index"], operation["slide"])
+        elif operation["op"] == "delete":
+            del slides[operation["index"]]
+        elif operation["op"] == "move":
+            slides.insert(operation["to"], slides.pop(operation["from"]))
+    return slides
+
+
+def test_changes_endpoint():
+    """Replaying /changes on an old copy must give the current slides, also after concurrent edits"""
+    presentation_id = create_presentation()
+    base = get_presentation(presentation_id)
+    count = len(base["slides"])
+    url = f"{BASE_URL}/presentations/{presentation_id}"
+
+    def edit(n):
+        if n % 3 == 0:
+            order = list(range(1, count)) + [0]
+            return requests.post(f"{url}/reorder", json={"slide_indices": order}, params={"response_mode": "delta"})
+        if n % 3 == 1:
+            slide = {"type": "main", "title": f"Redaktə {n}", "points": ["x"]}
+            return requests.post(f"{url}/slides/1", json=slide, params={"response_mode": "delta"})
+        slide = {"type": "main", "title": f"Əlavə {n}", "points": ["y"]}
+        return requests.post(f"{url}/ops", json={"operations": [
+            {"op": "insert", "index": 1, "slide": slide}, {"op": "delete", "index": 1}
+        ]})
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        responses = list(pool.map(edit, range(12)))
+    assert all(r.status_code == 200 for r in responses), [r.text for r in responses if r.status_code != 200]
+
+    current = get_presentation(presentation_id)
+    response = requests.get(f"{url}/changes", params={"since": base["version"]})
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert result["reset"] is False, result
+    assert result["version"] == current["version"] == base["version"] + 12
+
+    versions = [entry["version"] for entry in result["changes"]]
+    assert versions == list(range(base["version"] + 1, current["version"] + 1)), versions
+
+    slides = base["slides"]
+    for entry in result["changes"]:
+        slides = replay(slides, entry["patch"])
+    assert slides == current["slides"]
+    print(f"✅ Replayed {len(versions)} changes onto version {base['version']}")
+
+    response = requests.get(f"{url}/changes", params={"since": current["version"]})
+    assert response.json()["changes"] == []
+    response = requests.get(f"{url}/changes", params={"since": current["version"] + 1})
+    assert response.status_code == 400
+    print("✅ Up-to-date and future versions handled")
+
+
+if __name__ == "__main__":
+    test_changes_endpoint()
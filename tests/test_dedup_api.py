@@ -0,0 +1,65 @@
+import requests
+
+BASE_URL = "http://127.0.0.1:8000"
+
+
+def upload(slide_count=6, **extra):
+    with open("test_rich.pdf", "rb") as f:
+        files = {"file": ("test_rich.pdf", f, "application/pdf")}
+        data = {"slide_count": slide_count, "draft": True, "store": True, **extra}
+        response = requests.post(f"{BASE_URL}/generate", files=files, data=data, timeout=120)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_dedup_endpoint():
+    """Uploading the same file with the same options returns the stored presentation"""
+    first = upload()
+    second = upload()
+    assert second["deduplicated"] is True, second
+    assert second["presentation_id"] == first.get("duplicate_of", first["presentation_id"])
+    print(f"✅ Repeated upload returned {second['presentation_id']}")
+
+    other = upload(slide_count=7)
+    assert other["presentation_id"] != second["presentation_id"]
+    print("✅ Different options generate a new presentation")
+
+    copied = upload(on_duplicate="copy")
+    assert copied["deduplicated"] is True
+    assert copied["presentation_id"] != second["presentation_id"]
+    assert copied["duplicate_of"] == second["presentation_id"]
+    original = requests.get(f"{BASE_URL}/presentations/{second['presentation_id']}").json()
+    copy = requests.get(f"{BASE_URL}/presentations/{copied['presentation_id']}").json()
+    assert copy["slides"] == original["slides"]
+    print("✅ on_duplicate=copy stores an independent copy")
+
+    forced = upload(force=True)
+    assert not forced.get("deduplicated")
+    assert forced["presentation_id"] != second["presentation_id"]
+    print("✅ force=true regenerates")
+
+    # Deleting the remembered presentation must not leave a dangling dedup entry
+    for presentation_id in (forced["presentation_id"], second["presentation_id"]):
+        response = requests.delete(f"{BASE_URL}/presentations/{presentation_id}")
+        assert response.status_code == 200, response.text
+    fresh = upload()
+    assert not fresh.get("deduplicated"), fresh
+    assert requests.get(f"{BASE_URL}/presentations/{fresh['presentation_id']}").status_code == 200
+    print("✅ Deleted presentations are generated again")
+
+
+def test_fallback_not_remembered():
+    """A deck from the offline fallback is not reused for the next upload of the file"""
+    first = upload(draft=False, slide_count=8)
+    if not first.get("offline_fallback"):
+        print("⚠️ Model answered, fallback case not exercised (run the server without GOOGLE_API_KEY)")
+        return
+    second = upload(draft=False, slide_count=8)
+    assert not second.get("deduplicated"), second
+    assert second["presentation_id"] != first["presentation_id"]
+    print("✅ Offline fallback decks are not deduplicated")
+
+
+if __name__ == "__main__":
+    test_dedup_endpoint()
+    test_fallback_not_remembered()
@@ -0,0 +1,90 @@
+import requests
+from concurrent.futures import ThreadPoolExecutor
+
+BASE_URL = "http://127.0.0.1:8000"
+
+
+def create_presentation():
+    """Store an extractive draft of test_rich.pdf and return its id."""
+    with open("test_rich.pdf", "rb") as f:
+        files = {"file": ("test_rich.pdf", f, "application/pdf")}
+        data = {"slide_count": 6, "draft": True, "store": True}
+        response = requests.post(f"{BASE_URL}/generate", files=files, data=data, timeout=120)
+    assert response.status_code == 200, response.text
+    return response.json()["presentation_id"]
+
+
+def get_presentation(presentation_id):
+    response = requests.get(f"{BASE_URL}/presentations/{presentation_id}")
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def apply_ops(presentation_id, operations, **body):
+    return requests.post(
+        f"{BASE_URL}/presentations/{presentation_id}/ops",
+        json={"operations": operations, **body},
+        timeout=60
+    )
+
+
+def test_ops_endpoint():
+    """Apply a batch of operations and check that an invalid batch changes nothing"""
+    presentation_id = create_presentation()
+    before = get_presentation(presentation_id)
+
+    response = apply_ops(presentation_id, [
+        {"op": "insert", "index": 1, "slide": {"type": "main", "title": "Yeni slayd", "points": ["Birinci"]}},
+        {"op": "update", "index": 1, "fields": {"title": "Dəyişdirilmiş"}},
+        {"op": "move", "from": 1, "to": 2},
+    ], expected_version=before["version"])
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert result["version"] == before["version"] + 1
+    print(f"✅ Operations applied, version {result['version']}")
+
+    after = get_presentation(presentation_id)
+    assert len(after["slides"]) == len(before["slides"]) + 1
+    assert after["slides"][2]["title"] == "Dəyişdirilmiş"
+
+    # The second operation is invalid, so the first must not be written either
+    response = apply_ops(presentation_id, [
+        {"op": "delete", "index": 0},
+        {"op": "delete", "index": 1000},
+    ])
+    assert response.status_code == 400, response.text
+    assert "operations[1]" in response.json()["detail"]
+    assert get_presentation(presentation_id)["version"] == after["version"]
+    print("✅ Invalid batch rejected without changes")
+
+    response = apply_ops(presentation_id, [{"op": "delete", "index": 0}], expected_version=before["version"])
+    assert response.status_code == 409, response.text
+    print("✅ Stale expected_version rejected with 409")
+
+
+def test_concurrent_ops():
+    """Concurrent single inserts must all land, each with its own version"""
+    presentation_id = create_presentation()
+    before = get_presentation(presentation_id)
+    count = 16
+
+    def insert(n):
+        slide = {"type": "main", "title": f"Paralel {n}", "points": ["x"]}
+        return apply_ops(presentation_id, [{"op": "insert", "index": 1, "slide": slide}])
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        responses = list(pool.map(insert, range(count)))
+
+    assert all(r.status_code == 200 for r in responses), [r.text for r in responses if r.status_code != 200]
+    versions = sorted(r.json()["version"] for r in responses)
+    assert versions == list(range(before["version"] + 1, before["version"] + count + 1)), versions
+
+    after = get_presentation(presentation_id)
+    assert len(after["slides"]) == len(before["slides"]) + count
+    assert after["version"] == before["version"] + count
+    print(f"✅ {count} concurrent inserts applied, versions {versions[0]}..{versions[-1]}")
+
+
+if __name__ == "__main__":
+    test_ops_endpoint()
+    test_concurrent_ops()
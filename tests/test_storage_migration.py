@@ -0,0 +1,131 @@
+import json
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Storage reads STORAGE_DIR at import time, so point it at a scratch directory first
+STORAGE_DIR = Path(tempfile.mkdtemp(prefix="storage_migration_"))
+os.environ["STORAGE_DIR"] = str(STORAGE_DIR)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend.utils import storage  # noqa: E402
+from backend.utils import source_index  # noqa: E402
+
+
+def write_flat(presentation_id, title="Başlıq"):
+    """Write a presentation, its change log and source index the way the flat layout stored them."""
+    presentation = {
+        "id": presentation_id,
+        "slides": [{"type": "title", "title": title}],
+        "metadata": {"created_at": "2024-01-01T00:00:00", "updated_at": "2024-01-01T00:00:00"},
+        "version": 1,
+    }
+    (STORAGE_DIR / f"{presentation_id}.json").write_text(json.dumps(presentation, ensure_ascii=False), encoding="utf-8")
+    storage.CHANGES_DIR.mkdir(parents=True, exist_ok=True)
+    change = {"version": 1, "patch": [{"op": "insert", "index": 0, "slide": presentation["slides"][0]}]}
+    (storage.CHANGES_DIR / f"{presentation_id}.jsonl").write_text(json.dumps(change) + "\n", encoding="utf-8")
+    source_index.SOURCES_DIR.mkdir(parents=True, exist_ok=True)
+    (source_index.SOURCES_DIR / f"{presentation_id}.json").write_text(json.dumps({"chunks": []}), encoding="utf-8")
+    return presentation
+
+
+def test_flat_files_readable():
+    """Presentations and sidecars left in the flat layout are still served and listed"""
+    write_flat("flat-read")
+    assert storage.load_presentation("flat-read")["slides"][0]["title"] == "Başlıq"
+    assert "flat-read" in [p["id"] for p in storage.list_presentations()]
+    assert storage.load_changes("flat-read", 0, 1)[0]["version"] == 1
+    assert source_index.load_source_index("flat-read") == {"chunks": []}
+    print("✅ Flat-layout files are readable")
+
+
+def test_update_migrates():
+    """An update writes the sharded layout and moves the flat file and change log"""
+    write_flat("flat-update")
+    updated = storage.update_presentation("flat-update", [{"type": "title", "title": "Yeni"}], expected_version=1)
+    assert updated["version"] == 2
+    assert not (STORAGE_DIR / "flat-update.json").exists()
+    assert not (storage.CHANGES_DIR / "flat-update.jsonl").exists()
+    assert storage._presentation_path("flat-update").exists()
+    assert [c["version"] for c in storage.load_changes("flat-update", 0, 2)] == [1, 2]
+    print("✅ Update migrated the presentation and its change log")
+
+
+def test_migration_concurrent_with_loads():
+    """Every presentation stays loadable while the migration moves it"""
+    ids = [f"flat-{n}" for n in range(50)]
+    for presentation_id in ids:
+        write_flat(presentation_id)
+
+    def load(presentation_id):
+        return storage.load_presentation(presentation_id)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        migration = pool.submit(storage.migrate_flat_layout)
+        results = list(pool.map(load, ids * 4))
+        migration.result()
+
+    assert all(r is not None for r in results)
+    assert not list(STORAGE_DIR.glob("*.json"))
+    assert not list(storage.CHANGES_DIR.glob("*.jsonl"))
+    assert not list(source_index.SOURCES_DIR.glob("*.json"))
+    for presentation_id in ids:
+        assert storage.load_presentation(presentation_id)["id"] == presentation_id
+        assert storage.load_changes(presentation_id, 0, 1) is not None
+        assert source_index._source_path(presentation_id).exists()
+    print(f"✅ Migrated {len(ids)} presentations with their sidecars during concurrent loads")
+
+
+def test_migration_keeps_newer_copy():
+    """A flat file never overwrites a sharded copy that was already written"""
+    write_flat("flat-stale", title="Köhnə")
+    storage.update_presentation("flat-stale", [{"type": "title", "title": "Təzə"}])
+    write_flat("flat-stale", title="Köhnə")
+    storage.migrate_flat_layout()
+    assert not (STORAGE_DIR / "flat-stale.json").exists()
+    assert storage.load_presentation("flat-stale")["slides"][0]["title"] == "Təzə"
+    print("✅ Migration kept the newer sharded copy")
+
+
+def test_migration_without_hard_links():
+    """Without hard links the move still never replaces a newer sharded copy"""
+    real_link = os.link
+
+    def no_link(*args, **kwargs):
+        raise OSError("hard links not supported")
+
+    write_flat("flat-nolink", title="Köhnə")
+    write_flat("flat-nolink-new")
+    storage.update_presentation("flat-nolink", [{"type": "title", "title": "Təzə"}])
+    write_flat("flat-nolink", title="Köhnə")
+    os.link = no_link
+    try:
+        storage.migrate_flat_layout()
+    finally:
+        os.link = real_link
+    assert storage.load_presentation("flat-nolink")["slides"][0]["title"] == "Təzə"
+    assert storage._presentation_path("flat-nolink-new").exists()
+    assert not (STORAGE_DIR / "flat-nolink-new.json").exists()
+    print("✅ Migration without hard links moved files and kept the newer copy")
+
+
+def test_delete_both_layouts():
+    """Delete removes the presentation and its sidecars from either layout"""
+    write_flat("flat-delete")
+    assert storage.delete_presentation("flat-delete")
+    assert source_index.delete_source_index("flat-delete")
+    assert storage.load_presentation("flat-delete") is None
+    assert storage.load_changes("flat-delete", 0, 1) is None
+    assert source_index.load_source_index("flat-delete") is None
+    print("✅ Delete removed the flat-layout files")
+
+
+if __name__ == "__main__":
+    test_flat_files_readable()
+    test_update_migrates()
+    test_migration_concurrent_with_loads()
+    test_migration_keeps_newer_copy()
+    test_migration_without_hard_links()
+    test_delete_both_layouts()
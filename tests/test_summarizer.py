@@ -0,0 +1,48 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend.utils.summarizer import split_sentences  # noqa: E402
+
+
+def test_wrapped_lines_joined():
+    """A sentence wrapped over several PDF lines stays one sentence"""
+    text = "The committee reviewed the budget and\nagreed to fund the new\nlibrary next year. Construction starts in May."
+    assert split_sentences(text) == [
+        "The committee reviewed the budget and agreed to fund the new library next year.",
+        "Construction starts in May.",
+    ], split_sentences(text)
+    print("✅ Wrapped lines are joined into one sentence")
+
+
+def test_headings_kept_apart():
+    """A heading without final punctuation does not merge into the next sentence"""
+    sentences = split_sentences("Quarterly Report Summary\nRevenue grew by twelve percent in the third quarter.")
+    assert sentences == ["Quarterly Report Summary", "Revenue grew by twelve percent in the third quarter."], sentences
+    print("✅ Headings stay separate")
+
+
+def test_bullets_kept_apart():
+    """Bullet lines and DOCX paragraphs joined with single newlines stay separate"""
+    text = (
+        "Key risks for the coming year\n"
+        "• Rising interest rates on the new loans\n"
+        "• Delays in the supplier contracts\n"
+        "Bakı ofisi yeni layihəyə başlayıb\n"
+        "Layihənin büdcəsi artırılıb"
+    )
+    assert split_sentences(text) == [
+        "Key risks for the coming year",
+        "• Rising interest rates on the new loans",
+        "• Delays in the supplier contracts",
+        "Bakı ofisi yeni layihəyə başlayıb",
+        "Layihənin büdcəsi artırılıb",
+    ], split_sentences(text)
+    print("✅ Bullets and paragraphs stay separate")
+
+
+if __name__ == "__main__":
+    test_wrapped_lines_joined()
+    test_headings_kept_apart()
+    test_bullets_kept_apart()
@@ -0,0 +1,46 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend.utils.text_cleanup import reduce_prompt_text  # noqa: E402
+
+BODY = [
+    "Payment terms are set out below.",
+    "(c) Late payments incur a 2% fee.",
+    "Copyright law applies to all shared material.",
+    "Revenue grew in 2023.",
+    "2023",
+    "The contract renews every year.",
+]
+
+
+def page(number):
+    # Unique lines around the body keep it out of the three-line header/footer zones
+    return "\n".join([
+        "Annual Report", f"Part {number}", f"Notes for part {number}.", *BODY,
+        f"End of part {number}.", "© 2024 Example Corp. All rights reserved", str(number)
+    ])
+
+
+def test_body_lines_kept():
+    """Copyright-like sentences and bare numbers inside a page are content"""
+    cleaned, stats = reduce_prompt_text("\f".join(page(n) for n in range(1, 5)))
+    for line in BODY:
+        assert cleaned.splitlines().count(line) == 4, line
+    print("✅ Body lines starting with (c) or Copyright survive")
+
+
+def test_edge_furniture_removed():
+    """Page numbers and copyright footers at page edges are removed"""
+    text = "\n".join([*BODY, *BODY, *BODY, "© 2024 Example Corp. All rights reserved", "7"])
+    cleaned, stats = reduce_prompt_text(text)
+    assert "© 2024" not in cleaned
+    assert not cleaned.endswith("7")
+    assert stats["boilerplate_lines_removed"] == 2, stats
+    print("✅ Copyright footer and page number removed at the page edge")
+
+
+if __name__ == "__main__":
+    test_body_lines_kept()
+    test_edge_furniture_removed()